@@ -0,0 +1,2 @@
+python3 src/bench_nesting.py
+python3 src/bench_escaping.py
@@ -0,0 +1,60 @@
+import glob
+import os
+import time
+
+import htmlnode
+from blockfunctions import markdown_to_html_node
+
+REPEAT = 20
+ROUNDS = 10
+
+
+def render_all(markdowns):
+    for markdown in markdowns:
+        markdown_to_html_node(markdown).to_html()
+
+
+def time_once(markdowns):
+    start = time.perf_counter()
+    for _ in range(REPEAT):
+        render_all(markdowns)
+    return time.perf_counter() - start
+
+
+def without_escaping(markdowns):
+    escape_text, escape_attribute = htmlnode.escape_text, htmlnode.escape_attribute
+    htmlnode.escape_text = htmlnode.escape_attribute = lambda value: value
+    try:
+        return time_once(markdowns)
+    finally:
+        htmlnode.escape_text, htmlnode.escape_attribute = escape_text, escape_attribute
+
+
+def bench(name, markdowns):
+    # Both versions take turns, so the machine getting busier or quieter affects them alike, and the best
+    # round of each is compared
+    escaped_times = []
+    unescaped_times = []
+    for _ in range(ROUNDS):
+        escaped_times.append(time_once(markdowns))
+        unescaped_times.append(without_escaping(markdowns))
+
+    escaped, unescaped = min(escaped_times), min(unescaped_times)
+    overhead = (escaped - unescaped) / unescaped * 100
+    print(f"{name}: {unescaped:.3f}s without escaping, {escaped:.3f}s with it ({overhead:+.1f}%)")
+
+
+def main():
+    content_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "content")
+    pages = []
+    for path in sorted(glob.glob(os.path.join(content_dir, "**", "*.md"), recursive=True)):
+        with open(path, encoding="utf-8") as page_file:
+            pages.append(page_file.read())
+    bench(f"{len(pages)} content pages", pages)
+
+    # Worst case for the fast path, every text and attribute has something to escape
+    special = "\n\n".join(f"Is {i} < {i + 1} & [so](/a?b=1&c=\"{i}\") > `x<y`?" for i in range(2000))
+    bench("2000 paragraphs full of special characters", [special])
+
+
+main()
@@ -0,0 +1,28 @@
+import time
+
+from blockfunctions import markdown_to_html_node
+
+DEPTH = 10000
+
+
+def bench(name, markdown):
+    start = time.perf_counter()
+    html = markdown_to_html_node(markdown).to_html()
+    elapsed = time.perf_counter() - start
+    print(f"{name}: {len(markdown)} chars of markdown -> {len(html)} chars of html in {elapsed:.3f}s")
+
+
+def main():
+    # Every level is indented one more space, so the input grows quadratically with the depth.
+    nested_list = "\n".join(" " * depth + f"- item {depth}" for depth in range(DEPTH))
+    bench(f"{DEPTH} levels of nested lists", nested_list)
+
+    nested_emphasis = "**_" * (DEPTH // 2) + "deep" + "_**" * (DEPTH // 2)
+    bench(f"{DEPTH} levels of nested emphasis", nested_emphasis)
+
+    # Many shallow lists, to compare the cost per item with the deep ones above.
+    flat_lists = "\n\n".join("- a **b**\n  - c _d_\n- e" for _ in range(DEPTH))
+    bench(f"{DEPTH} small nested lists", flat_lists)
+
+
+main()
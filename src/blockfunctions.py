@@ -1,30 +1,120 @@
+import mmap
+import os
 import re
 from enum import Enum
 from textnode import TextNode, TextType
 from htmlnode import HTMLNode, LeafNode, ParentNode
-from inlinefunctions import text_to_textnodes, text_node_to_html_node
+from inlinefunctions import text_node_to_html_node, text_to_html_nodes
+
+LIST_ITEM = re.compile(r'- |(\d+)\. ')
+BLOCK_SPLIT = re.compile(r'\n\s*\n')
+
 
 def markdown_to_blocks(markdown):
-    # Strip the raw markdown from trailing whitespaces/empty lines
-    clean_markdown = markdown.strip()
     # Used regex to make sure the text is split into blocks when there's an empty line in between,
     # independently if the empty line is a new line or one or many whitespaces.
     # Using .split() would fail in cases where the empty space between blocks wasn't exclusively new lines (\n).
-    blocks = re.split(r'\n\s*\n', clean_markdown)
-    result = []
-    
-    for block in blocks:
-        # Strip each block from trailing whitespaces
-        clean_block = block.strip()
-        # Split each block into lines to handle multiple line blocks
-        lines = clean_block.split('\n')
-        # Strip each line from trailing whitespaces
-        processed_block = '\n'.join(line.strip() for line in lines)
+    # The raw markdown isn't stripped as a whole first, every block gets cleaned on its own anyway and this
+    # way the first block keeps the indentation of its first line (needed for nested lists).
+    return list(join_fenced_blocks(cleaned_blocks(markdown, BLOCK_SPLIT, 0, str)))
+
+
+def cleaned_blocks(source, boundary_pattern, start, decode):
+    # (block, line breaks before it) for every non-empty block of source, cut at the boundaries. The line
+    # breaks are the ones of the boundaries since the previous block (0 before the first one), so
+    # join_fenced_blocks() can put back as many empty lines as there were.
+    line_breaks = 0
+    for boundary in boundary_pattern.finditer(source, start):
+        processed_block = clean_block(decode(source[start:boundary.start()]))
         # Check if the block is not empty to filter excess of new lines
         if processed_block:
-            result.append(processed_block)
-    
-    return result
+            yield processed_block, line_breaks
+            line_breaks = 0
+        line_breaks += decode(boundary.group()).count("\n")
+        start = boundary.end()
+
+    processed_block = clean_block(decode(source[start:]))
+    if processed_block:
+        yield processed_block, line_breaks
+
+
+def is_unclosed_fence(block):
+    return block.startswith("```") and (len(block) < 6 or not block.endswith("```"))
+
+
+def join_fenced_blocks(blocks):
+    # Empty lines inside fenced code split it into several blocks, this glues them back together (with
+    # as many empty lines as the source had) from the opening ``` to the block that closes it. A fence
+    # that's never closed isn't code, its blocks are left as they were.
+    # blocks are (block, line breaks before it) pairs, see cleaned_blocks().
+    pending = []
+    for block, line_breaks in blocks:
+        if pending:
+            pending.append((block, line_breaks))
+            if block.endswith("```"):
+                yield "".join("\n" * pending_breaks + pending_block for pending_block, pending_breaks in pending)
+                pending = []
+        elif is_unclosed_fence(block):
+            pending.append((block, 0))
+        else:
+            yield block
+
+    # None of these ends with ```, so no fence among them could be closed either
+    yield from (pending_block for pending_block, _ in pending)
+
+
+def clean_block(block):
+    # Drop the empty lines around the block (the only place where they can be)
+    lines = [line for line in block.split('\n') if line.strip()]
+    if not lines:
+        return ""
+
+    base_indent = indentation(lines[0])
+    result = []
+    for line in lines:
+        # Strip each line from trailing whitespaces
+        clean_line = line.strip()
+        # Except nested list items, which keep their indentation relative to the first line of the block
+        # since that's the only thing telling how deep they are.
+        indent = indentation(line) - base_indent
+        if indent > 0 and LIST_ITEM.match(clean_line):
+            clean_line = " " * indent + clean_line
+        result.append(clean_line)
+
+    return '\n'.join(result)
+
+
+def indentation(line):
+    line = line.expandtabs(4)
+    return len(line) - len(line.lstrip())
+
+
+# Every character str patterns' \s matches (what markdown_to_blocks() splits on), the last one is U+3000
+UNICODE_WHITESPACE = [chr(code) for code in range(0x3001) if re.match(r"\s", chr(code))]
+# The same boundaries as markdown_to_blocks()' r'\n\s*\n', found on the raw bytes of memory-mapped files.
+# \s in a bytes pattern is only ASCII whitespace, so the UTF-8 encoding of every whitespace character is
+# spelled out instead, and both paths split a file into the same blocks. Every alternative is a whole
+# character, a match never ends in the middle of one.
+BLOCK_BOUNDARY = re.compile(rb"\n(?:" + b"|".join(re.escape(char.encode("utf-8")) for char in UNICODE_WHITESPACE) + rb")*\n")
+
+
+def markdown_file_to_blocks(path, start=0):
+    # Same blocks as markdown_to_blocks(), but for huge files: the file is memory-mapped and the block
+    # boundaries are searched directly on the bytes, so only the block currently being yielded is ever
+    # decoded into a str (instead of holding the whole file plus several stripped copies of it).
+    # Splitting the raw bytes is safe because multi-byte UTF-8 characters never contain ASCII whitespace.
+    with open(path, "rb") as md_file:
+        if os.fstat(md_file.fileno()).st_size == 0:
+            # mmap can't map empty files
+            return
+
+        with mmap.mmap(md_file.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+            # start skips whatever comes before the markdown itself (the front matter)
+            yield from join_fenced_blocks(cleaned_blocks(buffer, BLOCK_BOUNDARY, start, decode_utf8))
+
+
+def decode_utf8(data):
+    return data.decode("utf-8")
 
 
 class BlockType(Enum):
@@ -34,94 +124,182 @@ class BlockType(Enum):
     QUOTE = "quote"
     UNORDERED_LIST = "unordered_list"
     ORDERED_LIST = "ordered_list"
+    HORIZONTAL_RULE = "horizontal_rule"
+    TABLE = "table"
+    ADMONITION = "admonition"
 
 
-def block_to_block_type(block):
-    lines = [line.strip() for line in block.split('\n') if line.strip()]
+class BlockSyntax:
+    # One kind of block. detect(block, lines) is only tried on blocks starting with one of its prefixes
+    # (lines are the block's non-empty stripped lines), and to_html(block, page_index) renders it.
+    # block_type is what block_to_block_type() returns for it: a BlockType, or anything else for plugins.
+    def __init__(self, block_type, prefixes, detect, to_html):
+        self.block_type = block_type
+        self.prefixes = prefixes
+        self.detect = detect
+        self.to_html = to_html
 
-    def is_heading(block):
-        return re.match(r'^#{1,6} ', block.strip()) is not None
-        
-    def is_code(block):
-        return re.match(r'^```[\s\S]*```$', block.strip()) is not None
-    
-    def is_quote(block):
-        if not lines:
-            return False
-        # This helped me learn that .startswith() will return true to anything if the passed block is empty,
-        # so first I check that there's actually a non-empty line to check
-        for line in lines:
-            if not line.startswith(">"):
-                return False
-        return True
-    
-    def is_unordered_list(block):
-        if len(lines) < 2:
-            return False
-        for line in lines:
-            if not line.startswith("- "):
-                return False
-        return True
-    
-    def is_ordered_list(block):
-        if len(lines) < 2:
+    def __eq__(self, other):
+        return vars(self) == vars(other)
+
+    def __repr__(self):
+        return f"BlockSyntax(block_type={self.block_type}, prefixes={self.prefixes})"
+
+
+class BlockRegistry:
+    # Every block syntax markdown_to_html_node() knows about. Instead of trying every detect function on
+    # every block, compile() makes a table keyed by the first character of their prefixes, so a block is
+    # only checked against the syntaxes that could start like it (longest prefix first, then in the order
+    # they were added). Blocks nobody claims are paragraphs.
+    def __init__(self, paragraph):
+        self.paragraph = paragraph
+        self.syntaxes = [paragraph]
+        self.dispatch = None
+
+    def add(self, block_type, prefixes, detect, to_html):
+        if any(syntax.block_type == block_type for syntax in self.syntaxes):
+            raise ValueError(f"Block type {block_type} is already registered")
+        self.syntaxes.append(BlockSyntax(block_type, prefixes, detect, to_html))
+        # Compiled again on next use
+        self.dispatch = None
+
+    def compile(self):
+        candidates = [(prefix, syntax) for syntax in self.syntaxes for prefix in syntax.prefixes]
+        dispatch = {}
+        for prefix, syntax in sorted(candidates, key=lambda candidate: len(candidate[0]), reverse=True):
+            dispatch.setdefault(prefix[0], []).append((prefix, syntax))
+        self.dispatch = dispatch
+
+    def classify(self, block):
+        if self.dispatch is None:
+            self.compile()
+        start = block.lstrip()
+        candidates = self.dispatch.get(start[:1])
+        if candidates:
+            lines = [line.strip() for line in block.split('\n') if line.strip()]
+            for prefix, syntax in candidates:
+                if start.startswith(prefix) and syntax.detect(block, lines):
+                    return syntax
+        return self.paragraph
+
+    def syntax(self, block_type):
+        for syntax in self.syntaxes:
+            if syntax.block_type == block_type:
+                return syntax
+        raise ValueError(f"Unknown block type {block_type}")
+
+
+def is_heading(block, lines):
+    return re.match(r'^#{1,6} ', block.strip()) is not None
+
+
+def is_code(block, lines):
+    return re.match(r'^```[\s\S]*```$', block.strip()) is not None
+
+
+def is_quote(block, lines):
+    if not lines:
+        return False
+    # This helped me learn that .startswith() will return true to anything if the passed block is empty,
+    # so first I check that there's actually a non-empty line to check
+    for line in lines:
+        if not line.startswith(">"):
             return False
-        for i, line in enumerate(lines, 1):
-            if not line.startswith(f"{i}. "):
-                return False
-        return True
+    return True
+
+
+def is_unordered_list(block, lines):
+    if len(lines) < 2:
+        return False
+    items = list_items(block)
+    return items is not None and not items[0][1]
+
+
+def is_ordered_list(block, lines):
+    if len(lines) < 2:
+        return False
+    items = list_items(block)
+    return items is not None and items[0][1]
+
+
+HORIZONTAL_RULE = re.compile(r'([-*_])(?: *\1){2,} *')
+
+
+def is_horizontal_rule(block, lines):
+    return len(lines) == 1 and HORIZONTAL_RULE.fullmatch(lines[0]) is not None
+
 
-    check_type = {
-        is_heading: BlockType.HEADING,
-        is_code: BlockType.CODE,
-        is_quote: BlockType.QUOTE,
-        is_unordered_list: BlockType.UNORDERED_LIST,
-        is_ordered_list: BlockType.ORDERED_LIST
-    }
+TABLE_DELIMITER_CELL = re.compile(r':?-+:?')
 
-    for check_func, block_type in check_type.items():
-        if check_func(block):
-            return block_type
 
-    return BlockType.PARAGRAPH
+def is_table(block, lines):
+    # GFM table: a header row, a delimiter row (|---|:--:|) and body rows, every row starting with "|"
+    if len(lines) < 2 or not all(line.startswith("|") for line in lines):
+        return False
+    delimiter_cells = split_table_row(lines[1])
+    return bool(delimiter_cells) and all(TABLE_DELIMITER_CELL.fullmatch(cell) for cell in delimiter_cells)
 
 
-def markdown_to_html_node(markdown):
+ADMONITION = re.compile(r'>\s*\[!(NOTE|TIP|IMPORTANT|WARNING|CAUTION)\]\s*', re.IGNORECASE)
+
+
+def is_admonition(block, lines):
+    # GFM alerts: a quote whose first line is "> [!NOTE]" (or TIP, IMPORTANT, WARNING, CAUTION)
+    return ADMONITION.fullmatch(lines[0]) is not None and is_quote(block, lines)
+
+
+def markdown_to_html_node(markdown, page_index=None, registry=None):
+    registry = registry or DEFAULT_BLOCK_REGISTRY
     blocks = markdown_to_blocks(markdown)
     parent_node = ParentNode("div", [])
     
     for block in blocks:
-        block_type = block_to_block_type(block)
-        node = block_to_html_node(block, block_type)
+        node = registry.classify(block).to_html(block, page_index)
         parent_node.children.append(node)
+        if page_index is not None:
+            page_index.end_text()
 
     return parent_node
 
 
-def block_to_html_node(block, block_type):
-    match block_type:
-        case BlockType.PARAGRAPH:
-            return paragraph_to_html_node(block)
-        case BlockType.HEADING:
-            return heading_to_html_node(block)
-        case BlockType.CODE:
-            return code_to_html_node(block)
-        case BlockType.QUOTE:
-            return quote_to_html_node(block)
-        case BlockType.UNORDERED_LIST:
-            return ul_to_html_node(block)
-        case BlockType.ORDERED_LIST:
-            return ol_to_html_node(block)
-    
-def paragraph_to_html_node(block):
+def markdown_file_to_html_node(path, page_index=None, start=0, registry=None, title=None):
+    # Single pass over the memory-mapped blocks of a (big) file that also picks up the title on the way,
+    # so the source never has to be read a second time by extract_title(). A title given (from the front
+    # matter) wins over the first heading, like it does for pages read whole.
+    registry = registry or DEFAULT_BLOCK_REGISTRY
+    parent_node = ParentNode("div", [])
+
+    for block in markdown_file_to_blocks(path, start):
+        syntax = registry.classify(block)
+        if title is None and syntax.block_type == BlockType.HEADING:
+            title = block_title(block)
+        node = syntax.to_html(block, page_index)
+        parent_node.children.append(node)
+        if page_index is not None:
+            page_index.end_text()
+
+    if title is None:
+        raise Exception("No title found")
+
+    return parent_node, title
+
+
+def block_to_block_type(block, registry=None):
+    return (registry or DEFAULT_BLOCK_REGISTRY).classify(block).block_type
+
+
+def block_to_html_node(block, block_type, page_index=None, registry=None):
+    return (registry or DEFAULT_BLOCK_REGISTRY).syntax(block_type).to_html(block, page_index)
+
+def paragraph_to_html_node(block, page_index=None):
     text = block.replace("\n", " ")
     paragraph_node = ParentNode("p", [])
-    children = text_to_children(text)
+    children = text_to_children(text, page_index)
     paragraph_node.children = children
     
     return paragraph_node
 
-def heading_to_html_node(block):
+def heading_to_html_node(block, page_index=None):
     header_level = 0
     for char in block:
         # We can safely assume there won't be more than 6 "#"s and the syntax will be correct,
@@ -133,20 +311,47 @@ def heading_to_html_node(block):
     
     content = block[header_level + 1:].strip()
     heading_node = ParentNode(f"h{header_level}", [])
-    children = text_to_children(content)
-    heading_node.children = children
+
+    if page_index is None:
+        heading_node.children = text_to_children(content)
+    else:
+        # Grab the plain text of the heading while its children are created, for its id and the TOC entry.
+        text_nodes = []
+
+        def on_leaf(text_node, html_node):
+            text_nodes.append(text_node)
+            page_index.add_leaf(text_node, html_node)
+
+        heading_node.children = text_to_html_nodes(content, on_leaf)
+        slug = page_index.add_heading(header_level, "".join(node.text for node in text_nodes))
+        heading_node.props = {"id": slug}
     
     return heading_node
 
-def code_to_html_node(block):
+CODE_LANGUAGE = re.compile(r'[\w+#.-]+')
+
+
+def code_to_html_node(block, page_index=None):
     content = block.strip()[3:-3]
+    # A first line that's a single word (```python) is the language, not code
+    language = None
+    first_line, newline, rest = content.partition("\n")
+    if newline and CODE_LANGUAGE.fullmatch(first_line.strip()):
+        language = first_line.strip()
+        content = rest
     text_node = TextNode(content, TextType.CODE)
     code_node = text_node_to_html_node(text_node)
+    if language is not None:
+        code_node.props = {"class": f"language-{language}"}
     parent_node = ParentNode("pre", [code_node])
+    if page_index is not None:
+        page_index.add_leaf(text_node, code_node)
+        if language is not None:
+            page_index.add_code_block(language, content, parent_node)
     
     return parent_node
 
-def quote_to_html_node(block):
+def quote_to_html_node(block, page_index=None):
     lines = block.split("\n")
     # Process each line to remove '>' and join them with spaces
     processed_text = ""
@@ -157,67 +362,207 @@ def quote_to_html_node(block):
             line = line[1:].lstrip()
         processed_text += line + " "
     # Create the blockquote node with children from the processed text
-    children = text_to_children(processed_text.strip())
+    children = text_to_children(processed_text.strip(), page_index)
     
     return ParentNode("blockquote", children)
 
 
-def ul_to_html_node(block):
-    items = block.split("\n")
-    li_nodes = []
-    for item in items:
-        if not item.strip():
+def ul_to_html_node(block, page_index=None):
+    return list_to_html_node(block, page_index)
+
+
+def ol_to_html_node(block, page_index=None):
+    return list_to_html_node(block, page_index)
+
+
+def list_items(block):
+    # Returns a (depth, ordered, content) tuple for every item of a (possibly nested) list block,
+    # or None if the block isn't a valid list: every line has to be an item, items at the same level
+    # must use the same kind of marker and ordered items have to be numbered 1, 2, 3... inside their list.
+    items = []
+    # One [indent, ordered, next_number] entry for each list that's currently open, the outermost first.
+    levels = []
+
+    for line in block.split("\n"):
+        content = line.lstrip()
+        if not content:
             continue
-        content = item.lstrip("- ").strip()
-        children = text_to_children(content)
-        li_node = ParentNode("li", children)
-        li_nodes.append(li_node)
-    ul_node = ParentNode("ul", li_nodes)
-    return ul_node
-
-def ol_to_html_node(block):
-    items = block.split("\n")
-    li_nodes = []
-    for item in items:
-        if not item.strip():
+        match = LIST_ITEM.match(content)
+        if match is None:
+            return None
+        indent = indentation(line)
+        ordered = match.group(1) is not None
+
+        # Close the nested lists this item is outside of (the outermost list is never closed)
+        while len(levels) > 1 and indent < levels[-1][0]:
+            levels.pop()
+        # A deeper item only opens a nested list if it can be the first item of one, otherwise
+        # (like a "2. " that's just indented differently) it stays in the current list.
+        if not levels or (indent > levels[-1][0] and (not ordered or match.group(1) == "1")):
+            levels.append([indent, ordered, 1])
+
+        level = levels[-1]
+        if level[1] != ordered:
+            return None
+        if ordered:
+            if int(match.group(1)) != level[2]:
+                return None
+            level[2] += 1
+
+        items.append((len(levels) - 1, ordered, content[match.end():].strip()))
+
+    return items
+
+
+def list_to_html_node(block, page_index=None):
+    items = list_items(block)
+    if not items:
+        raise ValueError("Invalid list block")
+
+    # The list nodes that are currently open, the outermost first. A nested list goes inside the last
+    # <li> of its parent list. Using a stack instead of recursion means the nesting depth is unlimited.
+    stack = []
+    for depth, ordered, content in items:
+        del stack[depth + 1:]
+        if len(stack) == depth:
+            list_node = ParentNode("ol" if ordered else "ul", [])
+            if stack:
+                stack[-1].children[-1].children.append(list_node)
+            stack.append(list_node)
+
+        li_node = ParentNode("li", text_to_children(content, page_index))
+        stack[-1].children.append(li_node)
+        if page_index is not None:
+            page_index.end_text()
+
+    return stack[0]
+
+
+def horizontal_rule_to_html_node(block, page_index=None):
+    return LeafNode("hr", "")
+
+
+def split_table_row(line):
+    # Cells of a "| a | b |" row in one scan over the line. "\|" is a pipe inside a cell.
+    cells = []
+    cell = []
+    i = 0
+    line = line.strip()
+    if line.startswith("|"):
+        i = 1
+    while i < len(line):
+        char = line[i]
+        if char == "\\" and i + 1 < len(line) and line[i + 1] == "|":
+            cell.append("|")
+            i += 2
             continue
-        content = item.split(".", 1)[1].strip()
-        children = text_to_children(content)
-        li_node = ParentNode("li", children)
-        li_nodes.append(li_node)
-    ol_node = ParentNode("ol", li_nodes)
-    return ol_node
-
-def text_to_children(text):
-    text_nodes = text_to_textnodes(text)
-    html_nodes = []
-    for node in text_nodes:
-        html_node = text_node_to_html_node(node)
-        html_nodes.append(html_node)
-    return html_nodes
+        if char == "|":
+            cells.append("".join(cell).strip())
+            cell = []
+        else:
+            cell.append(char)
+        i += 1
+    # A row without the closing pipe still has its last cell
+    if cell and "".join(cell).strip():
+        cells.append("".join(cell).strip())
+    return cells
+
+
+def table_alignment(delimiter_cell):
+    if delimiter_cell.startswith(":") and delimiter_cell.endswith(":"):
+        return "center"
+    if delimiter_cell.endswith(":"):
+        return "right"
+    if delimiter_cell.startswith(":"):
+        return "left"
+    return None
+
+
+def table_to_html_node(block, page_index=None):
+    lines = [line for line in block.split("\n") if line.strip()]
+    header = split_table_row(lines[0])
+    alignments = [table_alignment(cell) for cell in split_table_row(lines[1])]
+    # Every row gets as many cells as the header, missing ones are empty and extra ones are dropped
+    alignments = (alignments + [None] * len(header))[:len(header)]
+
+    def row_node(cells, tag):
+        cells = (cells + [""] * len(header))[:len(header)]
+        cell_nodes = []
+        for cell, alignment in zip(cells, alignments):
+            props = {"style": f"text-align: {alignment}"} if alignment else None
+            cell_nodes.append(ParentNode(tag, text_to_children(cell, page_index), props))
+            if page_index is not None:
+                page_index.end_text()
+        return ParentNode("tr", cell_nodes)
+
+    children = [ParentNode("thead", [row_node(header, "th")])]
+    if len(lines) > 2:
+        children.append(ParentNode("tbody", [row_node(split_table_row(line), "td") for line in lines[2:]]))
+    return ParentNode("table", children)
+
+
+def admonition_to_html_node(block, page_index=None):
+    lines = block.split("\n")
+    kind = ADMONITION.fullmatch(lines[0].strip()).group(1).lower()
+    title = LeafNode("p", kind.capitalize(), {"class": "admonition-title"})
+    if page_index is not None:
+        page_index.add_leaf(TextNode(title.value, TextType.NORMAL), title)
+        page_index.end_text()
+
+    text = " ".join(line.strip()[1:].strip() for line in lines[1:] if line.strip())
+    children = [title]
+    if text:
+        children.append(ParentNode("p", text_to_children(text, page_index)))
+    return ParentNode("div", children, {"class": f"admonition {kind}"})
+
+
+def default_block_registry():
+    registry = BlockRegistry(BlockSyntax(BlockType.PARAGRAPH, [], None, paragraph_to_html_node))
+    registry.add(BlockType.HEADING, ["#"], is_heading, heading_to_html_node)
+    registry.add(BlockType.CODE, ["```"], is_code, code_to_html_node)
+    registry.add(BlockType.ADMONITION, [">"], is_admonition, admonition_to_html_node)
+    registry.add(BlockType.QUOTE, [">"], is_quote, quote_to_html_node)
+    registry.add(BlockType.HORIZONTAL_RULE, ["-", "*", "_"], is_horizontal_rule, horizontal_rule_to_html_node)
+    registry.add(BlockType.UNORDERED_LIST, ["-"], is_unordered_list, ul_to_html_node)
+    registry.add(BlockType.ORDERED_LIST, list("0123456789"), is_ordered_list, ol_to_html_node)
+    registry.add(BlockType.TABLE, ["|"], is_table, table_to_html_node)
+    return registry
+
+
+def text_to_children(text, page_index=None):
+    if page_index is None:
+        return text_to_html_nodes(text)
+    return text_to_html_nodes(text, page_index.add_leaf)
     
+
 def extract_title(markdown):
     blocks = markdown_to_blocks(markdown)
     
     for block in blocks:
         if block_to_block_type(block) == BlockType.HEADING:
-            # Split the heading block into lines to extract the title line only and not the whole block.
-            lines = block.split("\n")
-            for line in lines:
-                if line.strip().startswith("# "):
-                    # Split the line into text nodes for cases where the title includes
-                    # inner nodes (for example: "# This is a title with **bold** text inside."),
-                    # which will be useful to use it for the html title tag (In which case I assume the intention
-                    # would be it's content to be "This is a title with bold text inside." instead of "This is a
-                    # title with **bold** text inside.").
-                    nodes = text_to_textnodes(line.strip()[2:])
-                    title = ""
-                    # And then join only the text value of each node into the final result.
-                    for node in nodes:
-                        title += node.text
-
-                    return title
+            title = block_title(block)
+            if title is not None:
+                return title
     
     raise Exception("No title found")
 
-            
+
+def block_title(block):
+    # Split the heading block into lines to extract the title line only and not the whole block.
+    lines = block.split("\n")
+    for line in lines:
+        if line.strip().startswith("# "):
+            # Parse the line the way the heading itself is parsed for cases where the title includes
+            # inner nodes (for example: "# This is a title with **bold** text inside."),
+            # which will be useful to use it for the html title tag (In which case I assume the intention
+            # would be it's content to be "This is a title with bold text inside." instead of "This is a
+            # title with **bold** text inside."). Nested emphasis and strikethrough work like in the page.
+            leaves = []
+            text_to_html_nodes(line.strip()[2:], on_leaf=lambda text_node, html_node: leaves.append(text_node.text))
+            # And then join only the text value of each leaf into the final result.
+            return "".join(leaves)
+
+    return None
+
+
+DEFAULT_BLOCK_REGISTRY = default_block_registry()
@@ -0,0 +1,108 @@
+import hashlib
+import json
+import os
+import sys
+
+from discoveryfunctions import file_hash
+
+# The versions of optional packages change the output (image variants, highlighting, .br files)
+OPTIONAL_PACKAGES = ["PIL", "pygments", "brotli", "zstandard"]
+
+
+def generator_source():
+    # Hash of every module of the generator (tests aside), any change to the code means a new build
+    digest = hashlib.sha256()
+    src_dir = os.path.dirname(os.path.abspath(__file__))
+    for name in sorted(os.listdir(src_dir)):
+        if name.endswith(".py") and not name.startswith("test_"):
+            with open(os.path.join(src_dir, name), "rb") as module_file:
+                digest.update(name.encode("utf-8") + b"\0" + module_file.read())
+    return digest.hexdigest()
+
+
+def package_versions():
+    versions = {"python": sys.version}
+    for name in OPTIONAL_PACKAGES:
+        try:
+            module = __import__(name)
+        except ImportError:
+            versions[name] = None
+            continue
+        versions[name] = getattr(module, "__version__", "unknown")
+    return versions
+
+
+class FileHashes:
+    # Content hashes of input files, remembered by (size, modification time) in a JSON file the same way
+    # git's index does: a file whose stat didn't change isn't read again. Only the files asked for since
+    # the last save() are kept.
+    def __init__(self, path):
+        self.path = path
+        self.entries = {}
+        self.used = {}
+        if os.path.exists(path):
+            with open(path, "r", encoding="utf-8") as hashes_file:
+                self.entries = json.load(hashes_file)
+
+    def get(self, path):
+        # Returns (sha256, mtime in ns), or (None, None) for a file that doesn't exist (anymore)
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            return None, None
+        entry = self.entries.get(path)
+        if entry is None or entry[0] != stat.st_size or entry[1] != stat.st_mtime_ns:
+            entry = [stat.st_size, stat.st_mtime_ns, file_hash(path)]
+        self.used[path] = entry
+        return entry[2], entry[1]
+
+    def save(self):
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        tmp_path = f"{self.path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as hashes_file:
+            json.dump(self.used, hashes_file, sort_keys=True)
+        os.replace(tmp_path, self.path)
+        self.entries = self.used
+        self.used = {}
+
+
+def build_hash(settings, paths, file_hashes, with_mtimes=False):
+    # Everything the output depends on: the generator's code, package versions, the build settings and
+    # every input file's content. Modification times only count when the build dates pages by them
+    # (--mtime-dates), otherwise a fresh clone of the same sources gets the same hash.
+    digest = hashlib.sha256()
+    digest.update(json.dumps([generator_source(), package_versions(), settings], sort_keys=True).encode("utf-8"))
+    for path in sorted(set(paths)):
+        content_hash, mtime = file_hashes.get(path)
+        if not with_mtimes:
+            mtime = None
+        digest.update(f"{path}\0{content_hash}\0{mtime}\n".encode("utf-8"))
+    return digest.hexdigest()
+
+
+def output_hash(paths, file_hashes):
+    # What a build left behind: the path and content of every output file. A skipped build relies on the
+    # output still being there as it was written, this tells when it isn't (deleted files, a git checkout
+    # of docs/, a hand edit). Outputs whose stat didn't change aren't read again either.
+    digest = hashlib.sha256()
+    for path in sorted(paths):
+        content_hash, _ = file_hashes.get(path)
+        digest.update(f"{path}\0{content_hash}\n".encode("utf-8"))
+    return digest.hexdigest()
+
+
+def read_build_state(path):
+    # {"hash", "templates", "output"} of the last successful build, or None
+    try:
+        with open(path, "r", encoding="utf-8") as state_file:
+            return json.load(state_file)
+    except (FileNotFoundError, ValueError):
+        return None
+
+
+def write_build_state(path, state):
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as state_file:
+        json.dump(state, state_file, sort_keys=True)
+    os.replace(tmp_path, path)
@@ -0,0 +1,93 @@
+import gzip
+import hashlib
+import os
+import shutil
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+
+from discoveryfunctions import list_files
+
+# Brotli is optional, without it only .gz files are written.
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+COMPRESSIBLE_EXTENSIONS = (".html", ".css", ".js", ".json", ".xml", ".svg", ".txt")
+# Below this the compressed file (plus headers) isn't meaningfully smaller than the original.
+MIN_SIZE = 256
+
+
+def compression_levels(size):
+    # (gzip level, brotli quality): maximum effort for the usual pages and stylesheets, which compress
+    # in a blink, and cheaper settings for huge files where max effort costs seconds for a few bytes.
+    if size < 1024 * 1024:
+        return 9, 11
+    if size < 16 * 1024 * 1024:
+        return 9, 9
+    return 6, 5
+
+
+def encoders(size):
+    gzip_level, brotli_quality = compression_levels(size)
+    result = [(".gz", gzip_level, lambda data: gzip.compress(data, compresslevel=gzip_level, mtime=0))]
+    if brotli is not None:
+        result.append((".br", brotli_quality, lambda data: brotli.compress(data, quality=brotli_quality)))
+    return result
+
+
+def compress_cached(data, cache_dir):
+    # The compressed encodings of data, kept in cache_dir by hash of the content, so data that didn't change
+    # since a previous build is never compressed again.
+    # Returns ([(extension, cached path)], how many had to be compressed, how many came from the cache).
+    digest = hashlib.sha256(data).hexdigest()
+    encodings = []
+    compressed_count = 0
+    cached_count = 0
+    for extension, level, compress in encoders(len(data)):
+        cached_path = os.path.join(cache_dir, f"{digest}-{level}{extension}")
+        if os.path.exists(cached_path):
+            cached_count += 1
+        else:
+            # A unique temporary file: precompress() runs this on threads, and several outputs can have the
+            # same content
+            tmp_fd, tmp_path = tempfile.mkstemp(dir=cache_dir, suffix=".tmp")
+            with os.fdopen(tmp_fd, "wb") as cached_file:
+                cached_file.write(compress(data))
+            os.replace(tmp_path, cached_path)
+            compressed_count += 1
+        encodings.append((extension, cached_path))
+    return encodings, compressed_count, cached_count
+
+
+def precompress_file(path, cache_dir):
+    # Writes path.gz (and path.br) next to path.
+    # Returns how many encodings had to be compressed and how many came from the cache.
+    with open(path, "rb") as source_file:
+        data = source_file.read()
+    if len(data) < MIN_SIZE:
+        return 0, 0
+
+    encodings, compressed_count, cached_count = compress_cached(data, cache_dir)
+    for extension, cached_path in encodings:
+        shutil.copyfile(cached_path, path + extension)
+    return compressed_count, cached_count
+
+
+def precompress(dest_dir, cache_dir, workers=None):
+    # zlib and brotli release the GIL while compressing, so threads are enough to use every core.
+    paths = [
+        os.path.join(dest_dir, rel_path)
+        for rel_path in list_files(dest_dir)
+        if rel_path.endswith(COMPRESSIBLE_EXTENSIONS)
+    ]
+    os.makedirs(cache_dir, exist_ok=True)
+
+    compressed_count = 0
+    cached_count = 0
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        for compressed, cached in executor.map(lambda path: precompress_file(path, cache_dir), paths):
+            compressed_count += compressed
+            cached_count += cached
+
+    return compressed_count, cached_count
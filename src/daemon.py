@@ -0,0 +1,150 @@
+import argparse
+import contextlib
+import io
+import json
+import os
+import socket
+import socketserver
+import sys
+import traceback
+from concurrent.futures import ProcessPoolExecutor
+
+from main import CACHE_DIR, BuildState, build, parse_args
+
+SOCKET_PATH = os.path.join(CACHE_DIR, "daemon.sock")
+
+# The protocol is one JSON object per line each way:
+#   {"command": "build", "args": ["--minify", "/Python-Static_site_generator/"]}
+#   -> {"ok": true, "pages": [{"source": ..., "url": ..., "status": "rendered"}, ...], "log": "...", ...}
+#   {"command": "ping"} -> {"ok": true, "builds": 3}
+#   {"command": "stop"} -> {"ok": true}
+# Failed builds answer {"ok": false, "error": "...", "log": "..."}.
+
+
+class BuildRequestHandler(socketserver.StreamRequestHandler):
+    def handle(self):
+        for line in self.rfile:
+            if not line.strip():
+                continue
+            try:
+                response = self.server.run(json.loads(line))
+            except ValueError as e:
+                response = {"ok": False, "error": f"Invalid request: {e}"}
+            self.wfile.write((json.dumps(response) + "\n").encode("utf-8"))
+            self.wfile.flush()
+
+
+class BuildServer(socketserver.UnixStreamServer):
+    # Serves build requests one at a time from the directory it was started in. Templates, rendered pages
+    # and the process pool stay warm in self.state, so after the first build a request only pays for what
+    # actually changed (no interpreter startup, no imports, no cold caches).
+    def __init__(self, socket_path=SOCKET_PATH, executor=None):
+        remove_stale_socket(socket_path)
+        super().__init__(socket_path, BuildRequestHandler)
+        self.socket_path = socket_path
+        self.state = BuildState(executor)
+        self.builds = 0
+        self.stopping = False
+
+    def run(self, request):
+        if not isinstance(request, dict):
+            return {"ok": False, "error": f"Invalid request: expected a JSON object, got {json.dumps(request)}"}
+        command = request.get("command")
+        if command == "ping":
+            return {"ok": True, "builds": self.builds}
+        if command == "stop":
+            self.stopping = True
+            return {"ok": True}
+        if command != "build":
+            return {"ok": False, "error": f"Unknown command: {command}"}
+
+        args = request.get("args", [])
+        if not isinstance(args, list) or not all(isinstance(arg, str) for arg in args):
+            return {"ok": False, "error": f"Invalid build arguments: {json.dumps(args)}, expected a list of strings"}
+
+        log = io.StringIO()
+        try:
+            with contextlib.redirect_stdout(log):
+                result = build(parse_args(args), self.state)
+        except SystemExit:
+            # argparse exits on bad arguments, its message went to stderr
+            return {"ok": False, "error": f"Invalid build arguments: {args}", "log": log.getvalue()}
+        except Exception as e:
+            return {"ok": False, "error": str(e), "traceback": traceback.format_exc(), "log": log.getvalue()}
+
+        self.builds += 1
+        result.update({"ok": True, "log": log.getvalue()})
+        return result
+
+    def serve_until_stopped(self):
+        try:
+            while not self.stopping:
+                self.handle_request()
+        finally:
+            self.server_close()
+            if os.path.exists(self.socket_path):
+                os.remove(self.socket_path)
+
+
+def remove_stale_socket(socket_path):
+    # A socket file left behind by a daemon that died. If something still answers on it, don't steal it.
+    if not os.path.exists(socket_path):
+        return
+    try:
+        send_request({"command": "ping"}, socket_path)
+    except OSError:
+        os.remove(socket_path)
+        return
+    raise Exception(f"A build daemon is already listening on {socket_path}")
+
+
+def send_request(request, socket_path=SOCKET_PATH):
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as client:
+        client.connect(socket_path)
+        client.sendall((json.dumps(request) + "\n").encode("utf-8"))
+        with client.makefile("rb") as response_file:
+            return json.loads(response_file.readline())
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Keep a warm build process around and send builds to it.")
+    parser.add_argument("--socket", default=SOCKET_PATH, help=f"Unix socket path (default: {SOCKET_PATH})")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    serve_parser = subparsers.add_parser("serve", help="start the daemon in the site's directory")
+    serve_parser.add_argument("--workers", type=int, default=None, help="image worker processes (default: one per CPU)")
+    subparsers.add_parser("build", help="ask the daemon for a build (same arguments as main.py)")
+    subparsers.add_parser("ping", help="check that the daemon is up")
+    subparsers.add_parser("stop", help="stop the daemon")
+    # Whatever isn't ours belongs to the build
+    args, build_args = parser.parse_known_args()
+    if build_args and args.command != "build":
+        parser.error(f"unrecognized arguments: {' '.join(build_args)}")
+
+    if args.command == "serve":
+        os.makedirs(os.path.dirname(args.socket) or ".", exist_ok=True)
+        with ProcessPoolExecutor(max_workers=args.workers) as executor:
+            server = BuildServer(args.socket, executor)
+            print(f"Build daemon listening on {args.socket}")
+            server.serve_until_stopped()
+        return
+
+    request = {"command": args.command}
+    if args.command == "build":
+        request["args"] = build_args
+    response = send_request(request, args.socket)
+
+    if args.command == "build":
+        for page in response.get("pages", []):
+            print(f"{page['status']:>8}  {page['source']}")
+        if response["ok"]:
+            print(f"Built in {response['seconds']:.3f}s")
+    if not response["ok"]:
+        print(response.get("log", ""), end="")
+        print(f"Error: {response['error']}", file=sys.stderr)
+        sys.exit(1)
+    if args.command == "ping":
+        print(f"Build daemon is up ({response['builds']} build(s) served)")
+
+
+if __name__ == "__main__":
+    main()
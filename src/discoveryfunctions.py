@@ -0,0 +1,100 @@
+import hashlib
+import os
+from fnmatch import fnmatchcase
+
+# Drafts, private folders, hidden files and editor leftovers (vim swap files, emacs backups...)
+# are never turned into pages.
+DEFAULT_IGNORE = ["drafts", "_*", ".*", "*.swp", "*.swo", "*~", "#*#"]
+
+
+class Page:
+    def __init__(self, source_path, dest_path, rel_path):
+        self.source_path = source_path
+        self.dest_path = dest_path
+        self.rel_path = rel_path
+
+    def __eq__(self, other):
+        if not isinstance(other, Page):
+            return False
+        return vars(self) == vars(other)
+
+    def __repr__(self):
+        return f"Page(source_path={self.source_path}, dest_path={self.dest_path}, rel_path={self.rel_path})"
+
+
+def is_ignored(name, ignore):
+    for pattern in ignore:
+        if fnmatchcase(name, pattern):
+            return True
+    return False
+
+
+def discover_pages(content_dir, dest_dir, ignore=DEFAULT_IGNORE):
+    pages = []
+    # Walk with an explicit stack instead of recursion. os.scandir() gives us DirEntry objects whose
+    # is_file()/is_dir() answers come from the directory listing itself (d_type), so in the common case
+    # there's no extra stat() call per entry like with os.path.isfile()/os.path.isdir().
+    stack = [""]
+
+    while stack:
+        rel_dir = stack.pop()
+        with os.scandir(os.path.join(content_dir, rel_dir)) as entries:
+            for entry in entries:
+                if is_ignored(entry.name, ignore):
+                    continue
+
+                rel_path = os.path.join(rel_dir, entry.name)
+
+                if entry.is_dir():
+                    stack.append(rel_path)
+                elif entry.name.endswith(".md") and entry.is_file():
+                    dest_rel_path = rel_path[:-len(".md")] + ".html"
+                    pages.append(Page(entry.path, os.path.join(dest_dir, dest_rel_path), dest_rel_path))
+
+    # Sorting makes the manifest independent of the order the filesystem happens to list entries in.
+    pages.sort(key=lambda page: page.rel_path)
+    return pages
+
+
+def list_files(root):
+    # Relative paths of every file under root (same scandir walk as discover_pages, without filtering)
+    files = []
+    stack = [""]
+
+    while stack:
+        rel_dir = stack.pop()
+        with os.scandir(os.path.join(root, rel_dir)) as entries:
+            for entry in entries:
+                rel_path = os.path.join(rel_dir, entry.name)
+                if entry.is_dir():
+                    stack.append(rel_path)
+                elif entry.is_file():
+                    files.append(rel_path)
+
+    files.sort()
+    return files
+
+
+def file_hash(path):
+    # sha256 of a file's content, read in pieces so big files aren't held whole. Kept here with list_files()
+    # rather than with the images, so the modules hashing inputs don't need Pillow.
+    digest = hashlib.sha256()
+    with open(path, "rb") as source_file:
+        for chunk in iter(lambda: source_file.read(1024 * 1024), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def page_dest_dirs(pages):
+    # Every distinct output directory, so each one only needs a single os.makedirs() call.
+    return sorted({os.path.dirname(page.dest_path) for page in pages})
+
+
+def page_url(rel_path):
+    # "blog/tom/index.html" -> "blog/tom/", the way pages link to each other
+    rel_path = rel_path.replace(os.sep, "/")
+    if rel_path == "index.html":
+        return ""
+    if rel_path.endswith("/index.html"):
+        return rel_path[:-len("index.html")]
+    return rel_path
@@ -0,0 +1,111 @@
+import os
+import shutil
+from datetime import datetime, timezone
+from xml.sax.saxutils import escape
+
+# The sitemaps protocol allows at most 50,000 URLs per file, bigger sites need a sitemap index.
+SITEMAP_MAX_URLS = 50000
+# Atom needs an <updated> on every entry. Pages without a date get the epoch, which at least stays the same
+# from one build (and one machine) to the next.
+UNDATED = 0
+
+
+def w3c_datetime(timestamp):
+    return datetime.fromtimestamp(timestamp, timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
+class SitemapWriter:
+    # Writes sitemap entries to disk as soon as they're added, nothing is collected in memory. Entries go to
+    # numbered shards of max_urls each, and on close() either the only shard becomes sitemap.xml or a
+    # sitemap index pointing to all of them is written as sitemap.xml.
+    def __init__(self, dest_dir, base_url, max_urls=SITEMAP_MAX_URLS):
+        self.dest_dir = dest_dir
+        self.base_url = base_url
+        self.max_urls = max_urls
+        self.shard_count = 0
+        self.shard_file = None
+        self.shard_urls = 0
+
+    def add(self, url, lastmod=None):
+        # <lastmod> is optional, pages without a date go without
+        if self.shard_file is None or self.shard_urls >= self.max_urls:
+            self.open_shard()
+        if lastmod is None:
+            self.shard_file.write(f"<url><loc>{escape(url)}</loc></url>\n")
+        else:
+            self.shard_file.write(f"<url><loc>{escape(url)}</loc><lastmod>{w3c_datetime(lastmod)}</lastmod></url>\n")
+        self.shard_urls += 1
+
+    def open_shard(self):
+        self.close_shard()
+        self.shard_count += 1
+        self.shard_urls = 0
+        self.shard_file = open(self.shard_path(self.shard_count), "w", encoding="utf-8", newline="\n")
+        self.shard_file.write('<?xml version="1.0" encoding="UTF-8"?>\n')
+        self.shard_file.write('<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">\n')
+
+    def close_shard(self):
+        if self.shard_file is not None:
+            self.shard_file.write("</urlset>\n")
+            self.shard_file.close()
+            self.shard_file = None
+
+    def shard_path(self, number):
+        return os.path.join(self.dest_dir, f"sitemap-{number}.xml")
+
+    def close(self):
+        if self.shard_count == 0:
+            # An empty site still gets a valid (empty) sitemap
+            self.open_shard()
+        self.close_shard()
+
+        sitemap_path = os.path.join(self.dest_dir, "sitemap.xml")
+        if self.shard_count == 1:
+            os.replace(self.shard_path(1), sitemap_path)
+            return
+
+        with open(sitemap_path, "w", encoding="utf-8", newline="\n") as index_file:
+            index_file.write('<?xml version="1.0" encoding="UTF-8"?>\n')
+            index_file.write('<sitemapindex xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">\n')
+            for number in range(1, self.shard_count + 1):
+                index_file.write(f"<sitemap><loc>{escape(self.base_url)}sitemap-{number}.xml</loc></sitemap>\n")
+            index_file.write("</sitemapindex>\n")
+
+
+class AtomFeedWriter:
+    # Same idea as SitemapWriter: every entry is written as soon as it's added, to a temporary file next to
+    # the feed. The feed's <updated> (the newest entry's) has to come before the entries, so on close() the
+    # header is written and the entries are copied after it.
+    def __init__(self, path, feed_url, site_url, title):
+        self.path = path
+        self.feed_url = feed_url
+        self.site_url = site_url
+        self.title = title
+        self.updated = UNDATED
+        self.entries_path = path + ".entries.tmp"
+        self.entries_file = open(self.entries_path, "w+", encoding="utf-8", newline="\n")
+
+    def add(self, title, url, updated=None):
+        if updated is None:
+            updated = UNDATED
+        self.updated = max(self.updated, updated)
+        self.entries_file.write(
+            f'<entry><title>{escape(title)}</title><id>{escape(url)}</id><link href="{escape(url)}"/>'
+            f"<updated>{w3c_datetime(updated)}</updated></entry>\n"
+        )
+
+    def close(self):
+        with open(self.path, "w", encoding="utf-8", newline="\n") as feed_file:
+            feed_file.write('<?xml version="1.0" encoding="utf-8"?>\n')
+            feed_file.write('<feed xmlns="http://www.w3.org/2005/Atom">\n')
+            feed_file.write(f"<title>{escape(self.title)}</title>\n")
+            feed_file.write(f"<id>{escape(self.feed_url)}</id>\n")
+            feed_file.write(f'<link rel="self" href="{escape(self.feed_url)}"/>\n')
+            feed_file.write(f'<link href="{escape(self.site_url)}"/>\n')
+            feed_file.write(f"<updated>{w3c_datetime(self.updated)}</updated>\n")
+            feed_file.write(f"<author><name>{escape(self.title)}</name></author>\n")
+            self.entries_file.seek(0)
+            shutil.copyfileobj(self.entries_file, feed_file)
+            feed_file.write("</feed>\n")
+        self.entries_file.close()
+        os.remove(self.entries_path)
@@ -0,0 +1,109 @@
+import hashlib
+from concurrent.futures import ProcessPoolExecutor
+
+from htmlnode import ParentNode, RawNode
+from pagecache import DirectoryStore
+
+try:
+    import pygments
+    from pygments import highlight
+    from pygments.formatters import HtmlFormatter
+    from pygments.lexers import get_lexer_by_name
+    from pygments.util import ClassNotFound
+except ImportError:
+    pygments = None
+
+HIGHLIGHT_THEME = "default"
+# Below this many blocks to highlight on a page, starting work on the pool costs more than it saves
+POOL_MIN_BLOCKS = 4
+# What's stored in the cache for languages Pygments doesn't know, so they aren't looked up again
+NOT_HIGHLIGHTED = b""
+
+
+def highlight_code(code, language, theme):
+    # Runs on the worker processes. Returns the highlighted HTML (inline styles, so the theme doesn't need a
+    # stylesheet) or None when there's no lexer for the language.
+    try:
+        lexer = get_lexer_by_name(language)
+    except ClassNotFound:
+        return None
+    return highlight(code, lexer, HtmlFormatter(nowrap=True, noclasses=True, style=theme))
+
+
+class Highlighter:
+    # Highlights the fenced code blocks of every page that says its language (```python). Results are kept
+    # in a content-addressed store by hash(code, language, theme, Pygments version), so a code block that
+    # didn't change is never highlighted again, and the misses of each page run on a process pool.
+    # Without Pygments installed code blocks are left as they are.
+    def __init__(self, cache_dir, theme=HIGHLIGHT_THEME, executor=None, workers=None):
+        self.store = DirectoryStore(cache_dir)
+        self.theme = theme
+        self.executor = executor
+        self.own_executor = None
+        self.workers = workers
+        self.hits = 0
+        self.misses = 0
+
+    def fingerprint(self):
+        # Part of the page cache context, so pages get highlighted again if any of this changes
+        if pygments is None:
+            return None
+        return [self.theme, pygments.__version__]
+
+    def key(self, code, language):
+        content = f"{language}\0{self.theme}\0{pygments.__version__}\0{code}"
+        return hashlib.sha256(content.encode("utf-8")).hexdigest()
+
+    def highlight(self, code_blocks):
+        # code_blocks: (language, code, <pre> node) from the page index. Their <code> child gets replaced by
+        # the highlighted one.
+        if pygments is None or not code_blocks:
+            return
+
+        pending = []
+        for language, code, pre_node in code_blocks:
+            key = self.key(code, language)
+            html = self.store.get(key)
+            if html is None:
+                self.misses += 1
+                pending.append((key, language, code, pre_node))
+                continue
+            self.hits += 1
+            if html != NOT_HIGHLIGHTED:
+                replace_code_node(pre_node, html.decode("utf-8"))
+
+        if not pending:
+            return
+        jobs = [(code, language, self.theme) for _, language, code, _ in pending]
+        if len(pending) < POOL_MIN_BLOCKS:
+            results = [highlight_code(*job) for job in jobs]
+        else:
+            results = list(self.pool().map(highlight_code, *zip(*jobs)))
+
+        for (key, _, _, pre_node), html in zip(pending, results):
+            if html is None:
+                self.store.put(key, NOT_HIGHLIGHTED)
+                continue
+            self.store.put(key, html.encode("utf-8"))
+            replace_code_node(pre_node, html)
+
+    def pool(self):
+        if self.executor is not None:
+            return self.executor
+        if self.own_executor is None:
+            self.own_executor = ProcessPoolExecutor(max_workers=self.workers)
+        return self.own_executor
+
+    def close(self):
+        if self.own_executor is not None:
+            self.own_executor.shutdown()
+            self.own_executor = None
+
+    def hit_rate(self):
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+
+def replace_code_node(pre_node, html):
+    code_node = pre_node.children[0]
+    pre_node.children[0] = ParentNode("code", [RawNode(html)], code_node.props)
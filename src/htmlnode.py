@@ -1,3 +1,45 @@
+import re
+
+# Used by the minified serialization (to_html(minify=True)), see the HTML spec on optional tags:
+# https://html.spec.whatwg.org/multipage/syntax.html#optional-tags
+VOID_ELEMENTS = {"area", "base", "br", "col", "embed", "hr", "img", "input", "link", "meta", "source", "track", "wbr"}
+# A </p> can be left out when the next sibling is one of these...
+P_CLOSING_SIBLINGS = {
+    "address", "article", "aside", "blockquote", "details", "div", "dl", "fieldset", "figcaption", "figure",
+    "footer", "form", "h1", "h2", "h3", "h4", "h5", "h6", "header", "hgroup", "hr", "main", "menu", "nav",
+    "ol", "p", "pre", "section", "table", "ul",
+}
+# ...or when it's the last child, unless its parent is one of these.
+P_KEEP_END_PARENTS = {"a", "audio", "del", "ins", "map", "noscript", "video"}
+UNQUOTED_ATTRIBUTE = re.compile(r'[^\s"\'=<>`]+')
+
+
+# Text only needs &, < and > escaped, attribute values (always written in double quotes unless they can do
+# without) also need ". Most values have none of these, so the escape functions check first and return
+# the value as it is. When there is something to escape, chained str.replace beats str.translate by about
+# 10x: translate goes through its slow path as soon as a character maps to more than one character.
+def escape_text(text):
+    if "&" in text or "<" in text or ">" in text:
+        return text.replace("&", "&amp;").replace("<", "&lt;").replace(">", "&gt;")
+    return text
+
+
+def escape_attribute(value):
+    if "&" in value or "<" in value or ">" in value or '"' in value:
+        return value.replace("&", "&amp;").replace("<", "&lt;").replace(">", "&gt;").replace('"', "&quot;")
+    return value
+
+
+def can_omit_end_tag(tag, next_sibling, parent_tag):
+    if tag == "li":
+        return next_sibling is None or next_sibling.tag == "li"
+    if tag == "p":
+        if next_sibling is None:
+            return parent_tag not in P_KEEP_END_PARENTS
+        return next_sibling.tag in P_CLOSING_SIBLINGS
+    return False
+
+
 class HTMLNode:
     def __init__(self, tag=None, value=None, children=None, props=None):
         self.tag = tag
@@ -5,14 +47,20 @@ class HTMLNode:
         self.children = children
         self.props = props
 
-    def to_html(self):
+    def to_html(self, minify=False):
         raise NotImplementedError()
     
-    def props_to_html(self):
+    def props_to_html(self, minify=False):
         result = ""
         if self.props != None:
-            for key, value in self.props.items():
-                result += f' {key}="{value}"'
+            # Sorted, so the same node is always written the same way, however its props were put together
+            for key, value in sorted(self.props.items()):
+                value = escape_attribute(value)
+                # Minified output leaves the quotes out whenever the value doesn't need them
+                if minify and UNQUOTED_ATTRIBUTE.fullmatch(value):
+                    result += f' {key}={value}'
+                else:
+                    result += f' {key}="{value}"'
             return result
         else:
             return result
@@ -27,14 +75,26 @@ class LeafNode(HTMLNode):
         if self.value == None:
             raise ValueError("Value is missing")
 
-    def to_html(self):
+    def to_html(self, minify=False, end_tag=True):
         if self.value == None:
             raise ValueError("Value is missing")
+        value = escape_text(self.value)
         if self.tag == None:
-            return f"{self.value}"
-        return f"<{self.tag}{self.props_to_html()}>{self.value}</{self.tag}>"
+            return value
+        if minify and (not end_tag or self.tag in VOID_ELEMENTS):
+            return f"<{self.tag}{self.props_to_html(minify)}>{value}"
+        return f"<{self.tag}{self.props_to_html(minify)}>{value}</{self.tag}>"
     
 
+class RawNode(HTMLNode):
+    # HTML that's already serialized (like highlighted code), written out exactly as it is
+    def __init__(self, html):
+        super().__init__(None, html, [], None)
+
+    def to_html(self, minify=False):
+        return self.value
+
+
 class ParentNode(HTMLNode):
     def __init__(self, tag, children, props=None):
         super().__init__(tag, None, children, props)
@@ -43,18 +103,48 @@ class ParentNode(HTMLNode):
         if self.children == None:
             raise ValueError("Parent node must have children")
         
-    def to_html(self):
-        props = ""
-        if self.tag == None or self.tag == "":
-            raise ValueError("Tag missing")
-        if self.children == None:
-            raise ValueError("Parent node must have children")
-        if self.props != None:
-            props = self.props_to_html()
-        opening_tag = f"<{self.tag}{props}>"
-        closing_tag = f"</{self.tag}>"
-        result = ""
-        for child in self.children:
-            result += child.to_html()
-        return opening_tag + result + closing_tag
-        
\ No newline at end of file
+    def to_html(self, minify=False, end_tag=True):
+        # Walk the tree with an explicit stack instead of recursing into the children, so really deep
+        # trees (like lists nested thousands of levels) can't hit Python's recursion limit.
+        # Stack items are (node, closing_tag, end_tag) tuples: either a node to render (and whether it needs
+        # its end tag) or a closing tag to write.
+        # When minifying, optional end tags (</li>, most </p>) are left out. Whether that's possible depends
+        # on the next sibling, which is known right when the children are pushed, so it's still one pass.
+        # end_tag=False leaves out this node's own end tag, like LeafNode.to_html() (for nodes serialized
+        # one at a time, whose next sibling only their caller knows).
+        parts = []
+        stack = [(self, None, end_tag)]
+
+        while stack:
+            node, closing_tag, end_tag = stack.pop()
+            if closing_tag is not None:
+                parts.append(closing_tag)
+                continue
+            if isinstance(node, LeafNode):
+                parts.append(node.to_html(minify, end_tag))
+                continue
+            if not isinstance(node, ParentNode):
+                parts.append(node.to_html(minify))
+                continue
+
+            props = ""
+            if node.tag == None or node.tag == "":
+                raise ValueError("Tag missing")
+            if node.children == None:
+                raise ValueError("Parent node must have children")
+            if node.props != None:
+                props = node.props_to_html(minify)
+
+            parts.append(f"<{node.tag}{props}>")
+            if end_tag:
+                stack.append((None, f"</{node.tag}>", True))
+
+            next_sibling = None
+            for child in reversed(node.children):
+                child_end_tag = True
+                if minify and child is not None:
+                    child_end_tag = not can_omit_end_tag(child.tag, next_sibling, node.tag)
+                stack.append((child, None, child_end_tag))
+                next_sibling = child
+
+        return "".join(parts)
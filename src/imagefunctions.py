@@ -0,0 +1,184 @@
+import hashlib
+import json
+import os
+import shutil
+import struct
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from discoveryfunctions import file_hash, list_files
+from jobscheduler import JobStats, longest_first, run_timed
+from memorybudget import IMAGE_BYTES_PER_PIXEL, run_within_budget
+from outputfunctions import DirectoryOutput
+
+# Pillow is optional: without it images are still copied as they are and PNGs still get their
+# width/height attributes (read straight from the file header), there are just no resized variants.
+try:
+    from PIL import Image
+except ImportError:
+    Image = None
+
+IMAGE_EXTENSIONS = (".png", ".jpg", ".jpeg")
+VARIANT_WIDTHS = (480, 960, 1440)
+WEBP_QUALITY = 80
+# Variants are named after the whole source path (tom.png-480w.webp), so tom.png and tom.jpg don't get the
+# same ones.
+VARIANT_NAME = "{rel_path}-{width}w.webp"
+# Part of the cache key, so changing how variants are made invalidates the cached ones.
+PIPELINE_PARAMS = f"widths={VARIANT_WIDTHS};webp_quality={WEBP_QUALITY};name={VARIANT_NAME}"
+# How long making the variants took per pixel for every image format, to start the slowest images first
+# next time. Kept in the cache directory.
+TIMINGS_NAME = "timings.json"
+# Seconds of make_variants() per pixel before any image was timed (WebP encoding dominates)
+SECONDS_PER_PIXEL = 1e-6
+
+
+class ImageInfo:
+    def __init__(self, width, height, variants=None):
+        self.width = width
+        self.height = height
+        # (relative path, width) of every derivative, smallest first
+        self.variants = variants or []
+
+    def __eq__(self, other):
+        if not isinstance(other, ImageInfo):
+            return False
+        return vars(self) == vars(other)
+
+    def __repr__(self):
+        return f"ImageInfo(width={self.width}, height={self.height}, variants={self.variants})"
+
+    def props(self, basepath):
+        props = {"width": str(self.width), "height": str(self.height)}
+        if self.variants:
+            props["srcset"] = ", ".join(f"{basepath}{path.replace(os.sep, '/')} {width}w" for path, width in self.variants)
+        return props
+
+
+def png_size(path):
+    # The IHDR chunk always comes first: 8 bytes of signature, 8 of chunk header, then width and height.
+    with open(path, "rb") as image_file:
+        header = image_file.read(24)
+    if len(header) < 24 or header[:8] != b"\x89PNG\r\n\x1a\n":
+        return None
+    return struct.unpack(">II", header[16:24])
+
+
+def make_variants(source_path, rel_path, out_dir):
+    # Runs in the worker processes. Writes the derivatives of one image plus an info.json describing
+    # them into out_dir (its cache entry), which is only renamed into place once complete.
+    tmp_dir = out_dir + ".tmp"
+    if os.path.exists(tmp_dir):
+        shutil.rmtree(tmp_dir)
+    os.makedirs(tmp_dir)
+
+    variants = []
+    with Image.open(source_path) as image:
+        width, height = image.size
+        if image.mode not in ("RGB", "RGBA"):
+            image = image.convert("RGBA")
+
+        widths = [variant_width for variant_width in VARIANT_WIDTHS if variant_width < width] + [width]
+        for variant_width in widths:
+            variant_height = max(1, round(height * variant_width / width))
+            variant = image if variant_width == width else image.resize((variant_width, variant_height), Image.LANCZOS)
+            variant_rel_path = VARIANT_NAME.format(rel_path=rel_path, width=variant_width)
+            variant.save(os.path.join(tmp_dir, os.path.basename(variant_rel_path)), "WEBP", quality=WEBP_QUALITY, method=6)
+            variants.append((variant_rel_path, variant_width))
+
+    with open(os.path.join(tmp_dir, "info.json"), "w") as info_file:
+        json.dump({"width": width, "height": height, "variants": variants}, info_file)
+    os.replace(tmp_dir, out_dir)
+
+
+def image_pixels(source_path):
+    # What both the time and the memory make_variants() needs grow with. Pillow only reads the header here.
+    with Image.open(source_path) as image:
+        width, height = image.size
+    return width * height
+
+
+def image_format(rel_path):
+    extension = os.path.splitext(rel_path)[1].lower()
+    return "jpeg" if extension == ".jpg" else extension[1:]
+
+
+def read_cached_info(entry_dir):
+    with open(os.path.join(entry_dir, "info.json"), "r") as info_file:
+        info = json.load(info_file)
+    return ImageInfo(info["width"], info["height"], [tuple(variant) for variant in info["variants"]])
+
+
+def process_images(static_dir, dest_dir, cache_dir, workers=None, executor=None, output=None, memory_budget=None):
+    # Returns {"/images/x.png": ImageInfo} for every image under static_dir. Derivatives are cached in
+    # cache_dir by hash(source bytes + pipeline params), so only new or changed images are processed
+    # (on a process pool), everything else is just copied from the cache into dest_dir.
+    # A long-running caller can pass its own (already started) executor instead of paying for a new pool.
+    # The variants are written through output (loose files by default, see outputfunctions).
+    # Images are started slowest first, estimated from their size and how fast their format went before, so
+    # a big image doesn't start last and keep the build waiting while the other workers are idle. Idle
+    # workers take the next job from the pool's shared queue, so none waits while there's work left.
+    # With a memory_budget, big images don't all get decoded at the same time (see memorybudget).
+    images = [rel_path for rel_path in list_files(static_dir) if rel_path.lower().endswith(IMAGE_EXTENSIONS)]
+    manifest = {}
+
+    if Image is None:
+        if images:
+            print("Pillow is not installed, skipping responsive image variants.")
+        for rel_path in images:
+            size = png_size(os.path.join(static_dir, rel_path))
+            if size is not None:
+                manifest[image_url(rel_path)] = ImageInfo(*size)
+        return manifest
+
+    entries = {}
+    pending = []
+    for rel_path in images:
+        source_path = os.path.join(static_dir, rel_path)
+        key = hashlib.sha256(f"{file_hash(source_path)};{rel_path};{PIPELINE_PARAMS}".encode("utf-8")).hexdigest()
+        entry_dir = os.path.join(cache_dir, key)
+        entries[rel_path] = entry_dir
+        if not os.path.exists(entry_dir):
+            pending.append((source_path, rel_path, entry_dir))
+
+    if pending:
+        print(f"Processing {len(pending)} new image(s), {len(images) - len(pending)} cached.")
+        os.makedirs(cache_dir, exist_ok=True)
+        stats = JobStats(os.path.join(cache_dir, TIMINGS_NAME))
+        pixels = [image_pixels(source_path) for source_path, _, _ in pending]
+        order = longest_first([stats.estimate(image_format(rel_path), size, SECONDS_PER_PIXEL) for (_, rel_path, _), size in zip(pending, pixels)])
+        jobs = [(make_variants, *pending[index]) for index in order]
+        start = time.perf_counter()
+        pool = executor or ProcessPoolExecutor(max_workers=workers)
+        try:
+            if memory_budget is not None:
+                estimates = [pixels[index] * IMAGE_BYTES_PER_PIXEL for index in order]
+                results = run_within_budget(pool, run_timed, jobs, estimates, memory_budget)
+            else:
+                futures = [pool.submit(run_timed, *job) for job in jobs]
+                results = [future.result() for future in futures]
+        finally:
+            if executor is None:
+                pool.shutdown()
+
+        for index, (_, seconds) in zip(order, results):
+            stats.record(image_format(pending[index][1]), pixels[index], seconds)
+        stats.save()
+        work = sum(seconds for _, seconds in results)
+        print(f"Images processed in {time.perf_counter() - start:.2f}s ({work:.2f}s of work on the workers).")
+
+    if output is None:
+        output = DirectoryOutput()
+    for rel_path, entry_dir in entries.items():
+        info = read_cached_info(entry_dir)
+        for variant_rel_path, _ in info.variants:
+            variant_dest = os.path.join(dest_dir, variant_rel_path)
+            output.makedirs(os.path.dirname(variant_dest))
+            output.copy(os.path.join(entry_dir, os.path.basename(variant_rel_path)), variant_dest)
+        manifest[image_url(rel_path)] = info
+
+    return manifest
+
+
+def image_url(rel_path):
+    return "/" + rel_path.replace(os.sep, "/")
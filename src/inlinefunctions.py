@@ -1,7 +1,7 @@
 import re
 
 from textnode import TextType, TextNode
-from htmlnode import LeafNode
+from htmlnode import LeafNode, ParentNode
 
 
 def text_node_to_html_node(text_node):
@@ -12,6 +12,8 @@ def text_node_to_html_node(text_node):
             return LeafNode("b", text_node.text)
         case TextType.ITALIC:
             return LeafNode("i", text_node.text)
+        case TextType.STRIKETHROUGH:
+            return LeafNode("del", text_node.text)
         case TextType.CODE:
             return LeafNode("code", text_node.text)
         case TextType.LINK:
@@ -28,114 +30,84 @@ def split_nodes_delimiter(old_nodes, delimiter, text_type):
         if node.text_type != TextType.NORMAL:
             result.append(node)
             continue
-        
-        opener_index = node.text.find(delimiter)
-        
-        if opener_index == -1:
-            result.append(node)
-            continue
-        
-        closer_index = node.text.find(delimiter, opener_index + len(delimiter))
 
-        if closer_index == -1:
-            raise Exception(f"Closing delimiter {delimiter} not found")
-        
-        before = node.text[:opener_index]
-        content = node.text[opener_index + len(delimiter):closer_index]
-        after = node.text[closer_index + len(delimiter):]
+        # Walks the text with an index instead of recursing on the text after every pair: recursion slices a
+        # new copy of the rest of the text per pair (quadratic) and hits the recursion limit on long paragraphs.
+        position = 0
+        while True:
+            opener_index = node.text.find(delimiter, position)
 
-        if before:
-            result.append(TextNode(before, TextType.NORMAL))
+            if opener_index == -1:
+                break
 
-        result.append(TextNode(content, text_type))
+            closer_index = node.text.find(delimiter, opener_index + len(delimiter))
 
-        if after:
-            # Used recursion to check if there are more delimiter pairs in the "after" text
-            remaining_node = TextNode(after, TextType.NORMAL)
-            remaining_processed = split_nodes_delimiter([remaining_node], delimiter, text_type)
-            result.extend(remaining_processed)
+            if closer_index == -1:
+                raise Exception(f"Closing delimiter {delimiter} not found")
+
+            before = node.text[position:opener_index]
+            content = node.text[opener_index + len(delimiter):closer_index]
+
+            if before:
+                result.append(TextNode(before, TextType.NORMAL))
+
+            result.append(TextNode(content, text_type))
+            position = closer_index + len(delimiter)
+
+        if position == 0:
+            result.append(node)
+        elif position < len(node.text):
+            result.append(TextNode(node.text[position:], TextType.NORMAL))
 
     return result
 
 
+IMAGE = re.compile(r"!\[([^\[\]]*)\]\(([^\(\)]*)\)")
+LINK = re.compile(r"(?<!!)\[([^\[\]]*)\]\(([^\(\)]*)\)")
+
+
 def extract_markdown_images(text):
-    matches = re.findall(r"!\[([^\[\]]*)\]\(([^\(\)]*)\)", text)
+    matches = IMAGE.findall(text)
     return matches
 
 
 def extract_markdown_links(text):
-    matches = re.findall(r"(?<!!)\[([^\[\]]*)\]\(([^\(\)]*)\)", text)
+    matches = LINK.findall(text)
     return matches
 
 
 def split_nodes_image(old_nodes):
-    result = []
-    
-    for node in old_nodes:
-        
-        if not node.text:
-            continue
-            
-        images = extract_markdown_images(node.text)
-        
-        if not images:
-            result.append(node)
-            continue
-
-        remaining_text = node.text
-        
-        for image in images:
-            split_text = remaining_text.split(f"![{image[0]}]({image[1]})", 1)
-            before = split_text[0]
-            
-            if before:
-                result.append(TextNode(before, node.text_type))
-            
-            result.append(TextNode(image[0], TextType.IMAGE, image[1]))
-
-            if len(split_text) > 1:
-                remaining_text = split_text[1]
-            else:
-                remaining_text = ""
+    return split_nodes_pattern(old_nodes, IMAGE, TextType.IMAGE)
 
-        if remaining_text:
-            result.append(TextNode(remaining_text, node.text_type))
 
-    return result
+def split_nodes_link(old_nodes):
+    return split_nodes_pattern(old_nodes, LINK, TextType.LINK)
 
 
-def split_nodes_link(old_nodes):
+def split_nodes_pattern(old_nodes, pattern, text_type):
+    # Cuts the text at the positions where the pattern matched, instead of splitting the rest of the text
+    # again for every image or link (which copied the rest of the text each time).
     result = []
-    
+
     for node in old_nodes:
-        
+
         if not node.text:
             continue
-            
-        links = extract_markdown_links(node.text)
-        
-        if not links:
-            result.append(node)
-            continue
 
-        remaining_text = node.text
-        
-        for link in links:
-            split_text = remaining_text.split(f"[{link[0]}]({link[1]})", 1)
-            before = split_text[0]
-            
+        position = 0
+        for match in pattern.finditer(node.text):
+            before = node.text[position:match.start()]
+
             if before:
                 result.append(TextNode(before, node.text_type))
-            
-            result.append(TextNode(link[0], TextType.LINK, link[1]))
 
-            if len(split_text) > 1:
-                remaining_text = split_text[1]
-            else:
-                remaining_text = ""
+            result.append(TextNode(match.group(1), text_type, match.group(2)))
+            position = match.end()
 
-        if remaining_text:
-            result.append(TextNode(remaining_text, node.text_type))
+        if position == 0:
+            result.append(node)
+        elif position < len(node.text):
+            result.append(TextNode(node.text[position:], node.text_type))
 
     return result
 
@@ -150,5 +122,208 @@ def text_to_textnodes(text):
     italic = split_nodes_delimiter(code, "_", TextType.ITALIC)
     bold = split_nodes_delimiter(italic, "**", TextType.BOLD)
     return bold
-    # Note: Nested nodes (for example "This is a text that has **bold text with _italic text_ nested inside**") 
-    # will not be handled in this project (for the moment).
\ No newline at end of file
+    # Note: Nested nodes (for example "This is a text that has **bold text with _italic text_ nested inside**")
+    # can't be represented with flat text nodes, text_to_html_nodes() below is the one that handles them.
+
+
+IMAGE_AT = re.compile(r"!\[([^\[\]]*)\]\(([^\(\)]*)\)")
+LINK_AT = re.compile(r"\[([^\[\]]*)\]\(([^\(\)]*)\)")
+AUTOLINK_AT = re.compile(r"<(https?://[^\s<>]+)>")
+
+
+class InlineSyntax:
+    # One piece of inline syntax, started by trigger. There are two kinds:
+    # - leaves: parse(text, start) returns (text_node, end) or None when the text at start turns out not to
+    #   be this syntax after all, and to_html(text_node) makes its html node.
+    # - delimiters: whatever is between two triggers gets wrapped in tag, and they can nest. An unclosed one
+    #   raises, unless it's optional: then it's just text (like "costs ~~5 dollars").
+    def __init__(self, trigger, parse=None, to_html=text_node_to_html_node, tag=None, text_type=None, optional=False):
+        self.trigger = trigger
+        self.parse = parse
+        self.to_html = to_html
+        self.tag = tag
+        self.text_type = text_type
+        self.optional = optional
+
+    def __eq__(self, other):
+        return vars(self) == vars(other)
+
+    def __repr__(self):
+        return f"InlineSyntax(trigger={self.trigger}, tag={self.tag}, text_type={self.text_type})"
+
+    def is_delimiter(self):
+        return self.parse is None
+
+
+class InlineRegistry:
+    # Every inline syntax text_to_html_nodes() knows about. compile() turns them into a dispatch table keyed
+    # by their first character (plus one regex that finds those characters), so the text is still read in a
+    # single pass however many syntaxes are registered: new ones only make the table bigger.
+    def __init__(self):
+        self.syntaxes = []
+        self.dispatch = None
+        self.trigger_pattern = None
+
+    def add_leaf(self, trigger, parse, to_html=text_node_to_html_node):
+        self.add(InlineSyntax(trigger, parse, to_html))
+
+    def add_delimiter(self, delimiter, tag, text_type, optional=False):
+        self.add(InlineSyntax(delimiter, tag=tag, text_type=text_type, optional=optional))
+
+    def add(self, syntax):
+        if any(existing.trigger == syntax.trigger for existing in self.syntaxes):
+            raise ValueError(f"Inline syntax {syntax.trigger} is already registered")
+        self.syntaxes.append(syntax)
+        # Compiled again on next use
+        self.dispatch = None
+
+    def compile(self):
+        dispatch = {}
+        # Longer triggers first, so "**" wins over a shorter trigger starting with "*"
+        for syntax in sorted(self.syntaxes, key=lambda syntax: len(syntax.trigger), reverse=True):
+            dispatch.setdefault(syntax.trigger[0], []).append(syntax)
+        self.trigger_pattern = re.compile("[" + "".join(re.escape(char) for char in dispatch) + "]")
+        self.dispatch = dispatch
+
+
+def parse_image(text, start):
+    match = IMAGE_AT.match(text, start)
+    if match is None:
+        return None
+    return TextNode(match.group(1), TextType.IMAGE, match.group(2)), match.end()
+
+
+def parse_link(text, start):
+    match = LINK_AT.match(text, start)
+    if match is None:
+        return None
+    return TextNode(match.group(1), TextType.LINK, match.group(2)), match.end()
+
+
+def parse_code(text, start):
+    # Code is literal, nothing nests inside of it.
+    closer_index = text.find("`", start + 1)
+    if closer_index == -1:
+        raise Exception("Closing delimiter ` not found")
+    return TextNode(text[start + 1:closer_index], TextType.CODE), closer_index + 1
+
+
+def parse_autolink(text, start):
+    # <https://example.com> is a link to itself
+    match = AUTOLINK_AT.match(text, start)
+    if match is None:
+        return None
+    return TextNode(match.group(1), TextType.LINK, match.group(1)), match.end()
+
+
+def default_inline_registry():
+    registry = InlineRegistry()
+    registry.add_leaf("![", parse_image)
+    registry.add_leaf("[", parse_link)
+    registry.add_leaf("`", parse_code)
+    registry.add_leaf("<", parse_autolink)
+    registry.add_delimiter("**", "b", TextType.BOLD)
+    registry.add_delimiter("_", "i", TextType.ITALIC)
+    # "~~" showed up in text before it was syntax, that text still builds
+    registry.add_delimiter("~~", "del", TextType.STRIKETHROUGH, optional=True)
+    return registry
+
+
+DEFAULT_INLINE_REGISTRY = default_inline_registry()
+
+
+def text_to_html_nodes(text, on_leaf=None, registry=DEFAULT_INLINE_REGISTRY):
+    # Single left to right pass over the text that supports nested emphasis (bold inside italic and the
+    # other way around). Open delimiters live in an explicit stack instead of recursive calls, so any
+    # nesting depth works without hitting Python's recursion limit, and every character is looked at
+    # a constant number of times.
+    # on_leaf(text_node, html_node) gets called for every leaf that is created, for whoever needs to
+    # know about the plain text, links or images of the page without parsing it again.
+    if registry.dispatch is None:
+        registry.compile()
+    dispatch = registry.dispatch
+
+    root = []
+    # Each open delimiter is a [syntax, children] pair, the last one is the innermost.
+    stack = []
+    children = root
+    text_start = 0
+    position = 0
+
+    def add_leaf(text_node, html_node):
+        children.append(html_node)
+        if on_leaf is not None:
+            on_leaf(text_node, html_node)
+
+    def add_text(end):
+        if end > text_start:
+            text_node = TextNode(text[text_start:end], TextType.NORMAL)
+            add_leaf(text_node, text_node_to_html_node(text_node))
+
+    while True:
+        match = registry.trigger_pattern.search(text, position)
+        if match is None:
+            break
+        start = match.start()
+
+        syntax = None
+        parsed = None
+        # How far to skip when nothing matches: past the longest trigger found here, so a "[" right after
+        # a failed "![" can't start a link either.
+        skip = 1
+        for candidate in dispatch[text[start]]:
+            if not text.startswith(candidate.trigger, start):
+                continue
+            skip = max(skip, len(candidate.trigger))
+            if candidate.is_delimiter():
+                syntax = candidate
+                break
+            parsed = candidate.parse(text, start)
+            if parsed is not None:
+                syntax = candidate
+                break
+
+        closing = stack and stack[-1][0] is syntax
+        if syntax is not None and syntax.optional and not closing and text.find(syntax.trigger, start + skip) == -1:
+            # Nothing left to close it with, so it's text. The search stops at the closer when there is one,
+            # so the text is still read about once.
+            syntax = None
+
+        if syntax is None:
+            position = start + skip
+            continue
+
+        add_text(start)
+        if parsed is not None:
+            text_node, end = parsed
+            add_leaf(text_node, syntax.to_html(text_node))
+            position = text_start = end
+        elif closing:
+            # Closing the innermost delimiter
+            stack.pop()
+            inner_children = children
+            children = stack[-1][1] if stack else root
+            children.append(emphasis_node(syntax, inner_children))
+            position = text_start = start + len(syntax.trigger)
+        else:
+            # Anything else opens a new (nested) one. Delimiters that overlap instead of nesting,
+            # like "**bold _italic** text_", end up with an unclosed delimiter and raise below.
+            children = []
+            stack.append([syntax, children])
+            position = text_start = start + len(syntax.trigger)
+
+    add_text(len(text))
+
+    if stack:
+        raise Exception(f"Closing delimiter {stack[-1][0].trigger} not found")
+
+    return root
+
+
+def emphasis_node(syntax, children):
+    # Plain "**bold**" keeps being a single leaf, just like text_node_to_html_node() would create it.
+    if not children:
+        return LeafNode(syntax.tag, "")
+    if len(children) == 1 and isinstance(children[0], LeafNode) and children[0].tag is None:
+        return LeafNode(syntax.tag, children[0].value)
+    return ParentNode(syntax.tag, children)
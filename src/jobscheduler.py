@@ -0,0 +1,62 @@
+import json
+import os
+import time
+
+
+class JobStats:
+    # Seconds per unit of size of the jobs of previous builds, by kind of job (an image format...), kept in a
+    # JSON file as {kind: [size, seconds]}. Every kind keeps the totals of the last build that ran jobs of
+    # that kind, so the file stays as small as the number of kinds and follows changes to the pipeline.
+    # Jobs rarely run twice with the same input (that's what the caches are for), so a kind is the closest
+    # thing to a previous run there is.
+    def __init__(self, path):
+        self.path = path
+        self.entries = {}
+        if os.path.exists(path):
+            try:
+                with open(path, "r", encoding="utf-8") as stats_file:
+                    self.entries = json.load(stats_file)
+            except ValueError:
+                # Only estimates are lost
+                self.entries = {}
+        # Worked out once, estimate() is called for every job
+        self.rates = {kind: seconds / size for kind, (size, seconds) in self.entries.items() if size > 0}
+        total_size = sum(size for size, _ in self.entries.values())
+        self.overall_rate = sum(seconds for _, seconds in self.entries.values()) / total_size if total_size > 0 else None
+        self.measured = {}
+
+    def estimate(self, kind, size, default_rate):
+        # Expected seconds for a job of this kind and size: at the rate of its kind, or of every kind measured
+        # when it's a new one, or default_rate when nothing was measured yet
+        rate = self.rates.get(kind, self.overall_rate)
+        if rate is None:
+            rate = default_rate
+        return size * rate
+
+    def record(self, kind, size, seconds):
+        entry = self.measured.setdefault(kind, [0, 0.0])
+        entry[0] += size
+        entry[1] += seconds
+
+    def save(self):
+        entries = dict(self.entries)
+        entries.update(self.measured)
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        tmp_path = f"{self.path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as stats_file:
+            json.dump(entries, stats_file, sort_keys=True)
+        os.replace(tmp_path, self.path)
+
+
+def longest_first(costs):
+    # Indexes of the jobs, most expensive first. Started in that order on a pool, the big jobs run while the
+    # small ones fill in around them, instead of one big job starting last and running on its own at the
+    # end. Jobs that cost the same keep their order.
+    return sorted(range(len(costs)), key=lambda index: costs[index], reverse=True)
+
+
+def run_timed(function, *args):
+    # Runs on the worker processes: the job's result and how long it took there
+    start = time.perf_counter()
+    result = function(*args)
+    return result, time.perf_counter() - start
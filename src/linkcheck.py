@@ -0,0 +1,78 @@
+import posixpath
+
+
+class BrokenLink:
+    def __init__(self, page_url, url, kind):
+        self.page_url = page_url
+        self.url = url
+        self.kind = kind
+
+    def __eq__(self, other):
+        if not isinstance(other, BrokenLink):
+            return False
+        return vars(self) == vars(other)
+
+    def __repr__(self):
+        return f"BrokenLink(page_url={self.page_url}, url={self.url}, kind={self.kind})"
+
+
+class LinkChecker:
+    # Collects the links and images of every page while the site is built (from the page index, so
+    # nothing gets parsed again) and checks them all at the end against the set of paths the build
+    # produced. That's a set lookup per reference, the filesystem is never asked about any of them.
+    def __init__(self):
+        # (page url, url, "link" or "image") for every internal reference found
+        self.references = []
+
+    def add_page(self, page_url, page_index):
+        for url in page_index.links:
+            if is_internal(url):
+                self.references.append((page_url, url, "link"))
+        for url in page_index.images:
+            if is_internal(url):
+                self.references.append((page_url, url, "image"))
+
+    def check(self, output_paths):
+        output_paths = {path.replace("\\", "/") for path in output_paths}
+        broken = []
+        for page_url, url, kind in self.references:
+            if not any(candidate in output_paths for candidate in candidate_paths(page_url, url)):
+                broken.append(BrokenLink(page_url, url, kind))
+        return broken
+
+
+def is_internal(url):
+    if not url or url.startswith("#") or url.startswith("//"):
+        return False
+    # Anything with a scheme (https:, mailto:, tel:...) points outside of the site
+    scheme, separator, _ = url.partition(":")
+    if separator and "/" not in scheme:
+        return False
+    return True
+
+
+def candidate_paths(page_url, url):
+    # The output files a link could be pointing to: "/blog/tom" works for "blog/tom/index.html",
+    # "blog/tom.html" or a "blog/tom" file (like an image) in the output.
+    path = url.split("#", 1)[0].split("?", 1)[0]
+    if path.startswith("/"):
+        path = path.lstrip("/")
+    else:
+        # Relative links are relative to the directory of the page
+        path = posixpath.join(posixpath.dirname("/" + page_url), path).lstrip("/")
+
+    directory_link = path == "" or path.endswith("/")
+    path = posixpath.normpath(path) if path else ""
+    if path == ".":
+        path = ""
+
+    if directory_link or not path:
+        return [posixpath.join(path, "index.html")]
+    return [path, f"{path}/index.html", f"{path}.html"]
+
+
+def broken_links_report(broken):
+    lines = [f"Found {len(broken)} broken internal reference(s):"]
+    for link in broken:
+        lines.append(f"  /{link.page_url}: {link.kind} {link.url}")
+    return "\n".join(lines)
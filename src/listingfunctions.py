@@ -0,0 +1,136 @@
+import hashlib
+import json
+import os
+
+from htmlnode import LeafNode, ParentNode
+from outputfunctions import DirectoryOutput
+from pageindex import slugify
+
+ARCHIVE_DIR = "archive"
+TAGS_DIR = "tags"
+
+
+class Listing:
+    # One page of a paginated listing. Pages are numbered from the oldest one, so adding a post doesn't move
+    # every entry (and URL) one place down: page 1 always holds the oldest entries and only the front page
+    # (the newest, at rel_dir/index.html) and maybe the one before it change.
+    def __init__(self, rel_dir, title, entries, number, total):
+        self.rel_dir = rel_dir
+        self.title = title
+        self.entries = entries
+        self.number = number
+        self.total = total
+
+    def __eq__(self, other):
+        return vars(self) == vars(other)
+
+    def __repr__(self):
+        return f"Listing(rel_dir={self.rel_dir}, title={self.title}, number={self.number}, total={self.total})"
+
+    def page_dir(self, number):
+        if number == self.total:
+            return self.rel_dir
+        return f"{self.rel_dir}/page/{number}"
+
+    def rel_path(self):
+        return f"{self.page_dir(self.number)}/index.html"
+
+    def newer_dir(self):
+        return self.page_dir(self.number + 1) if self.number < self.total else None
+
+    def older_dir(self):
+        return self.page_dir(self.number - 1) if self.number > 1 else None
+
+    def key(self, context):
+        # Everything the rendered page depends on, context covers the rest (template, basepath, options...).
+        # The total isn't part of it, a new page at the front only changes the links of the one before it.
+        content = [
+            self.title,
+            self.rel_path(),
+            self.newer_dir(),
+            self.older_dir(),
+            [[entry["url"], entry["title"], entry["date"]] for entry in self.entries],
+            context,
+        ]
+        return hashlib.sha256(json.dumps(content).encode("utf-8")).hexdigest()
+
+    def html_node(self):
+        items = []
+        for entry in self.entries:
+            link = LeafNode("a", entry["title"], {"href": f"/{entry['url']}"})
+            if not entry["date"]:
+                # Undated page
+                items.append(ParentNode("li", [link]))
+                continue
+            date = LeafNode("time", entry["date"], {"datetime": entry["date"]})
+            items.append(ParentNode("li", [date, LeafNode(None, " "), link]))
+
+        children = [LeafNode("h1", self.title), ParentNode("ul", items)]
+        if self.total > 1:
+            links = []
+            if self.newer_dir() is not None:
+                links.append(LeafNode("a", "Newer", {"href": f"/{self.newer_dir()}/", "rel": "prev"}))
+                links.append(LeafNode("span", f"Page {self.number}"))
+            if self.older_dir() is not None:
+                links.append(LeafNode("a", "Older", {"href": f"/{self.older_dir()}/", "rel": "next"}))
+            children.append(ParentNode("nav", links, {"class": "pagination"}))
+        return ParentNode("div", children)
+
+
+def paginate(rel_dir, title, entries, page_size):
+    # entries: newest first. They're only sliced, nothing gets sorted or filtered again per page. The older
+    # pages are filled with page_size entries each counting from the oldest, the front page gets the rest.
+    total = max(1, -(-len(entries) // page_size))
+    listings = []
+    for number in range(1, total + 1):
+        start = len(entries) - number * page_size if number < total else 0
+        listings.append(Listing(rel_dir, title, entries[start:len(entries) - (number - 1) * page_size], number, total))
+    # Front page first
+    listings.reverse()
+    return listings
+
+
+def build_listings(pages, page_size):
+    # pages: newest first (as returned by MetadataIndex.pages()). One pass groups them by tag,
+    # which keeps every tag's entries in the same order.
+    by_tag = {}
+    for page in pages:
+        for tag in page["tags"]:
+            by_tag.setdefault(tag, []).append(page)
+
+    listings = paginate(ARCHIVE_DIR, "Archive", pages, page_size)
+    for tag in sorted(by_tag):
+        listings.extend(paginate(f"{TAGS_DIR}/{slugify(tag)}", f"Tagged “{tag}”", by_tag[tag], page_size))
+    return listings
+
+
+def write_listings(listings, dest_dir, cache_dir, render, context, output=None):
+    # render(title, html_node) returns the final page. Rendered pages are cached by Listing.key(), so adding
+    # a post only renders the listing pages whose entries actually moved, the rest are copied from the cache.
+    # Pages are written through output (loose files by default, see outputfunctions).
+    # Returns (rendered, reused).
+    os.makedirs(cache_dir, exist_ok=True)
+    if output is None:
+        output = DirectoryOutput()
+    used = set()
+    rendered = 0
+
+    for listing in listings:
+        key = listing.key(context)
+        used.add(f"{key}.html")
+        cached_path = os.path.join(cache_dir, f"{key}.html")
+        if not os.path.exists(cached_path):
+            with open(cached_path, "w", encoding="utf-8", newline="\n") as cached_file:
+                cached_file.write(render(listing.title, listing.html_node()))
+            rendered += 1
+
+        dest_path = os.path.join(dest_dir, *listing.rel_path().split("/"))
+        output.makedirs(os.path.dirname(dest_path))
+        output.copy(cached_path, dest_path)
+
+    # Listing pages that don't exist anymore (or changed) leave the cache
+    for name in os.listdir(cache_dir):
+        if name not in used:
+            os.remove(os.path.join(cache_dir, name))
+
+    return rendered, len(listings) - rendered
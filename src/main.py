@@ -1,9 +1,55 @@
 from textnode import *
 from htmlnode import *
-from blockfunctions import markdown_to_html_node, extract_title
+from blockfunctions import (
+    DEFAULT_BLOCK_REGISTRY, BlockType, block_title, extract_title, markdown_file_to_blocks, markdown_file_to_html_node,
+    markdown_to_blocks, markdown_to_html_node,
+)
+from buildhash import FileHashes, build_hash, output_hash, read_build_state, write_build_state
+from discoveryfunctions import discover_pages, file_hash, list_files, page_dest_dirs, page_url
+from compressfunctions import precompress
+from feedfunctions import AtomFeedWriter, SitemapWriter
+from highlightfunctions import Highlighter
+from imagefunctions import process_images
+from linkcheck import LinkChecker, broken_links_report
+from listingfunctions import build_listings, write_listings
+from memorybudget import MemoryBudget
+from metadata import MetadataIndex, page_timestamp, read_front_matter, split_front_matter
+from outputfunctions import ArchiveOutput, DirectoryOutput
+from pageindex import PageIndex, page_index_from_dict
+from pagecache import DEFAULT_MAX_BYTES, DirectoryStore, PageCache
+from profiling import PROFILE_THRESHOLD, Profiler
+from searchindex import SearchIndex
+from templatefunctions import TemplateCache
+import argparse
+import hashlib
 import os
 import shutil
 import sys
+import tempfile
+import time
+
+# Sources bigger than this are memory-mapped and parsed block by block instead of read whole.
+MMAP_THRESHOLD = 32 * 1024 * 1024
+# A streamed page's content is read back from its temporary file in pieces this big.
+STREAM_CHUNK = 1024 * 1024
+# What rebase_urls() looks for. Streamed output that ends in the middle of one of these is held back.
+URL_ATTRIBUTES = ('href="/', 'src="/', 'href=/', 'src=/')
+# Everything that survives between builds (search index, caches...) lives here.
+CACHE_DIR = ".cache"
+# Sitemaps and feeds need absolute URLs
+SITE_URL = "https://miguelsoffarelli.github.io"
+SITE_TITLE = "Tolkien Fan Club"
+# Pages under this folder are the posts that go into the feed
+BLOG_DIR = "blog"
+
+
+def output_files(archive, dest_dir):
+    # What a build leaves behind: the archive, or every file in docs/
+    if archive:
+        return [archive]
+    if not os.path.isdir(dest_dir):
+        return []
+    return [os.path.join(dest_dir, rel_path) for rel_path in list_files(dest_dir)]
 
 
 def copy_static(src, destination):
@@ -12,7 +58,7 @@ def copy_static(src, destination):
 
     os.mkdir(destination)
 
-    for item in os.listdir(src):
+    for item in sorted(os.listdir(src)):
         src_path = os.path.join(src, item)
         dest_path = os.path.join(destination, item)
 
@@ -23,26 +69,72 @@ def copy_static(src, destination):
             print(f"Creating directory: {dest_path}")
             copy_static(src_path, dest_path)
 
-def generate_page(from_path, template_path, dest_path, basepath):
-    print(f"Generating page from {from_path} to {dest_path} using {template_path}")
-
+def generate_page(from_path, template_path, dest_path, basepath, *, images=None, minify=False, drafts=False, templates=None, page_cache=None, highlighter=None, output=None, memory_budget=None):
     try:
-        with open(from_path, "r") as md_file:
-            md_content = md_file.read()
+        # The front matter is parsed once here, and whoever needs it later gets it from the page index.
+        page_index = PageIndex()
+        source_size = os.path.getsize(from_path)
+        large_file = source_size >= MMAP_THRESHOLD
+        if large_file:
+            metadata, markdown_start = read_front_matter(from_path)
+        else:
+            with open(from_path, "r", encoding="utf-8") as md_file:
+                source = md_file.read()
+            metadata, md_content = split_front_matter(source)
+        page_index.metadata = metadata
+
+        if metadata.get("draft") and not drafts:
+            print(f"Skipping draft {from_path}")
+            return page_index
+
+        # Pages can pick their own template in the front matter
+        template_path = metadata.get("template", template_path)
+        if templates is None:
+            templates = TemplateCache()
+        template = templates.get(template_path, minify)
+        if output is None:
+            output = DirectoryOutput()
 
-        with open(template_path, "r") as template_file:
-            template_content = template_file.read()
+        if memory_budget is not None and memory_budget.should_stream(source_size):
+            # Not cached either way: a cached page is read whole
+            print(f"Streaming page from {from_path} to {dest_path} using {template_path} (too big for the memory budget)")
+            blocks = markdown_file_to_blocks(from_path, markdown_start) if large_file else markdown_to_blocks(md_content)
+            write_streamed_page(blocks, template, dest_path, basepath, page_index, metadata.get("title"), images, minify, highlighter, output)
+            memory_budget.streamed_pages += 1
+            print(f"Page streamed successfully from {from_path} to {dest_path} using {template_path}.")
+            return page_index
 
-        html_content = markdown_to_html_node(md_content).to_html()
-        title = extract_title(md_content)
-        result = template_content.replace("{{ Title }}", title).replace("{{ Content }}", html_content).replace('href="/', f'href="{basepath}').replace('src="/', f'src="{basepath}')
+        if page_cache is not None:
+            source_hash = file_hash(from_path) if large_file else hashlib.sha256(source.encode("utf-8")).hexdigest()
+            cache_key = page_cache.key(source_hash, template.fingerprint)
+            cached = page_cache.get(dest_path, cache_key)
+            if cached is not None:
+                result, page_index_dict = cached
+                output.write(dest_path, result)
+                print(f"Page {dest_path} is up to date, reused from cache.")
+                return page_index_from_dict(page_index_dict)
 
-        os.makedirs(os.path.dirname(dest_path), exist_ok=True)
+        print(f"Generating page from {from_path} to {dest_path} using {template_path}")
 
-        with open(dest_path, "w") as output_file:
-            output_file.write(result)
+        if large_file:
+            html_node, title = markdown_file_to_html_node(from_path, page_index, markdown_start, title=metadata.get("title"))
+        else:
+            html_node = markdown_to_html_node(md_content, page_index)
+            title = metadata["title"] if "title" in metadata else extract_title(md_content)
+        page_index.title = title
+        finish_nodes(page_index, basepath, images, highlighter)
+
+        html_content = html_node.to_html(minify)
+        # The title is plain text (the page index keeps it that way for the feed and search), the template
+        # gets it escaped like every other text in the page
+        result = rebase_urls(template.render({"Title": escape_text(title), "TOC": page_index.toc_html(), "Content": html_content}), basepath, minify)
+
+        output.write(dest_path, result)
+        if page_cache is not None:
+            page_cache.put(dest_path, cache_key, result, page_index.to_dict())
 
         print((f"Page generated successfully from {from_path} to {dest_path} using {template_path}."))
+        return page_index
 
     except FileNotFoundError as e:
         print(f"Error: One of the files was not found—{e.filename}. Please check the file paths.")
@@ -54,38 +146,327 @@ def generate_page(from_path, template_path, dest_path, basepath):
         print(f"An unexpected error occurred: {e}")
         raise
 
-def generate_pages_recursive(dir_path_content, template_path, dest_dir_path, basepath):
-    content_dir = os.listdir(dir_path_content)
+def finish_nodes(page_index, basepath, images=None, highlighter=None):
+    # Last changes to the rendered nodes, which aren't serialized yet: highlighted code, and the size and
+    # srcset of the <img> tags.
+    if highlighter is not None:
+        highlighter.highlight(page_index.code_blocks)
 
-    for item in content_dir:
-        item_content_path = os.path.join(dir_path_content, item)
-        
-        if os.path.isfile(item_content_path) and item.endswith(".md"):
-            item_dest = item.replace(".md", ".html")
-            item_dest_path = os.path.join(dest_dir_path, item_dest)
-            
-            os.makedirs(os.path.dirname(item_dest_path), exist_ok=True)
-            
-            generate_page(item_content_path, template_path, item_dest_path, basepath)
-        elif os.path.isdir(item_content_path):
-            new_dest_dir = os.path.join(dest_dir_path, item)
-            os.makedirs(new_dest_dir, exist_ok=True)
-            
-            generate_pages_recursive(item_content_path, template_path, new_dest_dir, basepath)
+    if images:
+        for url, image_node in page_index.image_nodes:
+            if url in images:
+                image_node.props.update(images[url].props(basepath))
 
+def write_streamed_page(blocks, template, dest_path, basepath, page_index, title=None, images=None, minify=False, highlighter=None, output=None):
+    # The same page generate_page() writes, for pages too big to hold their whole node tree and HTML in
+    # memory (see --max-memory): every block is rendered, serialized into a temporary file and dropped
+    # before the next one. The title and TOC come before the content in the template but are only known
+    # once every block is done, so the page is written from the temporary file at the end.
+    if output is None:
+        output = DirectoryOutput()
+    with tempfile.TemporaryFile("w+", encoding="utf-8", newline="") as content_file:
+        content_file.write("<div>")
+        previous = None
+        for block in blocks:
+            syntax = DEFAULT_BLOCK_REGISTRY.classify(block)
+            if title is None and syntax.block_type == BlockType.HEADING:
+                title = block_title(block)
+            node = syntax.to_html(block, page_index)
+            page_index.end_text()
+            finish_nodes(page_index, basepath, images, highlighter)
+            # The nodes of the blocks already written can go
+            page_index.image_nodes = []
+            page_index.code_blocks = []
+            # A node's end tag may be left out depending on its next sibling, so each one is written when
+            # the next block is rendered
+            if previous is not None:
+                content_file.write(child_to_html(previous, node, minify))
+            previous = node
+        if previous is not None:
+            content_file.write(child_to_html(previous, None, minify))
+        content_file.write("</div>")
 
+        if title is None:
+            raise Exception("No title found")
+        page_index.title = title
 
+        def content():
+            content_file.seek(0)
+            return iter(lambda: content_file.read(STREAM_CHUNK), "")
 
-def main():
-    basepath = "/"
-    if len(sys.argv) > 1:
-        basepath = sys.argv[1]
+        chunks = template.render_chunks({"Title": escape_text(title), "TOC": page_index.toc_html(), "Content": content})
+        output.write_chunks(dest_path, rebase_chunks(chunks, basepath, minify))
+
+def child_to_html(node, next_sibling, minify):
+    # A child of the page's <div> serialized on its own, exactly like ParentNode.to_html() would inside it
+    if not isinstance(node, (LeafNode, ParentNode)):
+        return node.to_html(minify)
+    return node.to_html(minify, not minify or not can_omit_end_tag(node.tag, next_sibling, "div"))
+
+def rebase_urls(html, basepath, minify=False):
+    result = html.replace('href="/', f'href="{basepath}').replace('src="/', f'src="{basepath}')
+    if minify:
+        # Minified attributes may have lost their quotes
+        result = result.replace('href=/', f'href={basepath}').replace('src=/', f'src={basepath}')
+    return result
+
+def rebase_chunks(chunks, basepath, minify=False):
+    # rebase_urls() for a page that comes in pieces: the end of a piece that could be the start of an
+    # attribute is glued to the next piece, so no URL is missed at a boundary.
+    pending = ""
+    for chunk in chunks:
+        text = pending + chunk
+        keep = partial_attribute_length(text)
+        pending = text[len(text) - keep:]
+        yield rebase_urls(text[:len(text) - keep], basepath, minify)
+    yield rebase_urls(pending, basepath, minify)
+
+def partial_attribute_length(text):
+    for length in range(min(len(text), max(map(len, URL_ATTRIBUTES)) - 1), 0, -1):
+        tail = text[-length:]
+        if any(attribute.startswith(tail) for attribute in URL_ATTRIBUTES):
+            return length
+    return 0
+
+def generate_pages_recursive(dir_path_content, template_path, dest_dir_path, basepath, *, on_page=None, images=None, minify=False, drafts=False, templates=None, page_cache=None, profiler=None, highlighter=None, output=None, memory_budget=None):
+    pages = discover_pages(dir_path_content, dest_dir_path)
+    if output is None:
+        output = DirectoryOutput()
+
+    for dest_dir in page_dest_dirs(pages):
+        output.makedirs(dest_dir)
+
+    # The same for every page, passed by name so adding one can't shift the others
+    page_options = {
+        "images": images,
+        "minify": minify,
+        "drafts": drafts,
+        "templates": templates,
+        "page_cache": page_cache,
+        "highlighter": highlighter,
+        "output": output,
+        "memory_budget": memory_budget,
+    }
+    for page in pages:
+        page_args = (page.source_path, template_path, page.dest_path, basepath)
+        if profiler is not None:
+            page_index = profiler.profile(page.source_path, generate_page, *page_args, **page_options)
+        else:
+            page_index = generate_page(*page_args, **page_options)
+        if on_page is not None:
+            on_page(page, page_index)
+
+    return pages
+
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(description="Build the static site from content/ and static/ into docs/.")
+    parser.add_argument("basepath", nargs="?", default="/", help="path the site is served from (default: /)")
+    parser.add_argument("--minify", action="store_true", help="write minified HTML")
+    parser.add_argument("--drafts", action="store_true", help="also build pages marked as draft in their front matter")
+    parser.add_argument("--page-size", type=int, default=10, help="entries per archive and tag listing page (default: 10)")
+    parser.add_argument("--profile", action="store_true", help="time every page and report the slowest ones with their hottest functions")
+    parser.add_argument("--profile-threshold", type=float, default=PROFILE_THRESHOLD, help=f"seconds after which a page's cProfile stats are kept (default: {PROFILE_THRESHOLD})")
+    parser.add_argument("--render-cache", default=os.path.join(CACHE_DIR, "pages"), help="directory of the rendered pages cache, can be shared between machines (default: .cache/pages)")
+    parser.add_argument("--render-cache-size", type=int, default=DEFAULT_MAX_BYTES // 1024 // 1024, help="size limit of the rendered pages cache in MiB (default: %(default)s)")
+    parser.add_argument("--archive", help="write the site into this .tar, .tar.zst or .zip (with a manifest, see outputfunctions.py) instead of docs/")
+    parser.add_argument("--max-memory", type=int, help="memory budget of the build in MiB: big images are processed fewer at a time and pages too big for what's left are streamed (see memorybudget.py)")
+    parser.add_argument("--mtime-dates", action="store_true", help="date pages without a date in their front matter by their source's modification time (the output then depends on it)")
+    parser.add_argument("--force", action="store_true", help="build even when nothing changed since the last build")
+    parser.add_argument("--site-url", default=SITE_URL, help=f"site origin for the sitemap and feed (default: {SITE_URL})")
+    return parser.parse_args(argv)
+
+
+class BuildState:
+    # What a long-running process (the build daemon) keeps warm between builds: compiled templates, the
+    # rendered pages cache and a started process pool. A plain build just starts with an empty one.
+    def __init__(self, executor=None):
+        self.templates = TemplateCache()
+        self.page_entries = {}
+        self.executor = executor
+
+
+def build(args, state=None):
+    # Builds the whole site and returns a summary, with the status of every page
+    if state is None:
+        state = BuildState()
+    state.templates.new_build()
+    start = time.perf_counter()
+
+    basepath = args.basepath
     static_dir = "static"
     dest_dir = "docs"
     content_dir = "content"
     template = "template.html"
-    copy_static(static_dir, dest_dir)
+
+    # Identical inputs make an identical site, so if nothing changed since the last build there's nothing to
+    # do, as long as the site it wrote is still there untouched. Templates can include others, the previous
+    # build knows which files that came down to.
+    settings = {key: value for key, value in vars(args).items() if key not in ("force", "max_memory")}
+    content_files = [os.path.join(content_dir, rel_path) for rel_path in list_files(content_dir)]
+    input_files = content_files + [os.path.join(static_dir, rel_path) for rel_path in list_files(static_dir)]
+    build_state_path = os.path.join(CACHE_DIR, "build.json")
+    previous_build = read_build_state(build_state_path)
+    template_files = previous_build["templates"] if previous_build is not None else [template]
+    file_hashes = FileHashes(os.path.join(CACHE_DIR, "file-hashes.json"))
+    current_hash = build_hash(settings, input_files + template_files, file_hashes, args.mtime_dates)
+    print(f"Build hash: {current_hash}")
+    if (
+        not args.force
+        and not args.profile
+        and previous_build is not None
+        and previous_build["hash"] == current_hash
+        and previous_build.get("output") == output_hash(output_files(args.archive, dest_dir), file_hashes)
+    ):
+        print("Nothing changed since the last build, skipping it.")
+        return {
+            "pages": [],
+            "listings": {"rendered": 0, "reused": 0},
+            "seconds": time.perf_counter() - start,
+            "build_hash": current_hash,
+            "skipped": True,
+        }
+
+    if args.archive:
+        # Nothing goes to docs/: pages and assets are streamed into the archive (compressible ones with their
+        # .gz/.br), and the few files other modules write themselves (sitemap, feed, search index) are
+        # written to a temporary directory that's added at the end.
+        output = ArchiveOutput(args.archive, dest_dir, os.path.join(CACHE_DIR, "compressed"))
+        staging_dir = tempfile.TemporaryDirectory()
+        extras_dir = staging_dir.name
+        output.copytree(static_dir, dest_dir)
+    else:
+        output = DirectoryOutput()
+        staging_dir = None
+        extras_dir = dest_dir
+        copy_static(static_dir, dest_dir)
     print("Static files copied successfully!")
-    generate_pages_recursive(content_dir, template, dest_dir, basepath)
+    memory_budget = MemoryBudget(args.max_memory * 1024 * 1024) if args.max_memory else None
+    try:
+        images = process_images(static_dir, dest_dir, os.path.join(CACHE_DIR, "images"), executor=state.executor, output=output, memory_budget=memory_budget)
+        print("Images processed successfully!")
+
+        search_index = SearchIndex(os.path.join(CACHE_DIR, "search"))
+        link_checker = LinkChecker()
+        metadata_index = MetadataIndex(os.path.join(CACHE_DIR, "metadata.sqlite"))
+        base_url = args.site_url.rstrip("/") + basepath
+        sitemap = SitemapWriter(extras_dir, base_url)
+        feed = AtomFeedWriter(os.path.join(extras_dir, "atom.xml"), base_url + "atom.xml", base_url, SITE_TITLE)
+
+        page_results = []
+
+        def on_page(page, page_index):
+            url = page_url(page.rel_path)
+            # Dates come from the front matter (or modification times with --mtime-dates), so the same
+            # sources make the same sitemap, feed and listings on every machine
+            modified = page_timestamp(page_index.metadata, page.source_path, args.mtime_dates)
+            if page_index.title is None:
+                # Skipped draft: it goes in the metadata index (listings leave drafts out) and nowhere else
+                metadata_index.update(url, page.source_path, "", page_index.metadata, modified)
+                page_results.append({"source": page.source_path, "url": url, "status": "draft"})
+                return
+            page_results.append({"source": page.source_path, "url": url, "status": "cached" if page_index.from_cache else "rendered"})
+            metadata_index.update(url, page.source_path, page_index.title, page_index.metadata, modified)
+
+            search_index.update_page(url, page_index.title, page_index.plain_text())
+            link_checker.add_page(url, page_index)
+
+            sitemap.add(base_url + url, modified)
+            if url.startswith(BLOG_DIR + "/") and url != BLOG_DIR + "/":
+                feed.add(page_index.title, base_url + url, modified)
+
+        templates = state.templates
+        # Pages also depend on the sizes of the images they show
+        image_props = {url: info.props(basepath) for url, info in sorted(images.items())}
+        render_store = DirectoryStore(args.render_cache, args.render_cache_size * 1024 * 1024)
+        highlighter = Highlighter(os.path.join(CACHE_DIR, "highlight"), executor=state.executor)
+        page_cache = PageCache(render_store, [basepath, args.minify, image_props, highlighter.fingerprint()], state.page_entries)
+        profiler = None
+        if args.profile:
+            # Cached pages would hide the slow ones
+            page_cache = None
+            profiler = Profiler(args.profile_threshold, os.path.join(CACHE_DIR, "profiles"))
+        try:
+            generate_pages_recursive(
+                content_dir, template, dest_dir, basepath,
+                on_page=on_page, images=images, minify=args.minify, drafts=args.drafts, templates=templates, page_cache=page_cache,
+                profiler=profiler, highlighter=highlighter, output=output, memory_budget=memory_budget,
+            )
+        finally:
+            highlighter.close()
+        if page_cache is not None:
+            print(f"Pages generated successfully! ({page_cache.misses} rendered, {page_cache.hits} reused from cache)")
+        else:
+            print("Pages generated successfully!")
+        if highlighter.hits or highlighter.misses:
+            print(f"Code blocks highlighted: {highlighter.hits + highlighter.misses} ({highlighter.hit_rate():.0%} cache hit rate)")
+        if profiler is not None:
+            print(profiler.report())
+        if memory_budget is not None:
+            print(memory_budget.report())
+        sitemap.close()
+        feed.close()
+        print("Sitemap and feed written successfully!")
+        metadata_index.remove_unseen()
+        # Sorted once by the index, every listing page is a slice of this
+        posts = [post for post in metadata_index.pages() if post["url"].startswith(BLOG_DIR + "/") and post["url"] != BLOG_DIR + "/"]
+        metadata_index.close()
+        print(f"Metadata index updated successfully! ({len(metadata_index.changed)} page(s) with changed metadata)")
+
+        listing_template = templates.get(template, args.minify)
+
+        def render_listing(title, html_node):
+            return rebase_urls(listing_template.render({"Title": escape_text(title), "Content": html_node.to_html(args.minify)}), basepath, args.minify)
+
+        listings = build_listings(posts, args.page_size)
+        rendered, reused = write_listings(listings, dest_dir, os.path.join(CACHE_DIR, "listings"), render_listing, [listing_template.fingerprint, basepath, args.minify], output)
+        print(f"Listing pages written successfully! ({rendered} rendered, {reused} reused from cache)")
+
+        search_index.write(os.path.join(extras_dir, "search"))
+        print("Search index written successfully!")
+        if args.archive:
+            output.copytree(extras_dir, dest_dir)
+
+        # Against everything the build wrote, so links to the feed, the sitemap, the search index or image
+        # variants resolve like links to pages
+        broken = link_checker.check(output.written_paths(dest_dir))
+        if broken:
+            raise Exception(broken_links_report(broken))
+        print("Internal links checked successfully!")
+
+        if args.archive:
+            compressed, cached = output.compressed, output.cached
+        else:
+            compressed, cached = precompress(dest_dir, os.path.join(CACHE_DIR, "compressed"))
+        print(f"Precompressed outputs successfully! ({compressed} compressed, {cached} reused from cache)")
+    except BaseException:
+        output.discard()
+        raise
+    finally:
+        if staging_dir is not None:
+            staging_dir.cleanup()
+    output.close()
+    if args.archive:
+        print(f"Archive written successfully! ({len(output.manifest)} entries in {args.archive})")
+
+    used_templates = sorted({dep_path for compiled in state.templates.compiled.values() for dep_path in compiled.dependencies})
+    if used_templates != template_files:
+        current_hash = build_hash(settings, input_files + used_templates, file_hashes, args.mtime_dates)
+    written_hash = output_hash(output_files(args.archive, dest_dir), file_hashes)
+    file_hashes.save()
+    write_build_state(build_state_path, {"hash": current_hash, "templates": used_templates, "output": written_hash})
+
+    return {
+        "pages": page_results,
+        "listings": {"rendered": rendered, "reused": reused},
+        "seconds": time.perf_counter() - start,
+        "build_hash": current_hash,
+        "skipped": False,
+    }
+
+
+def main():
+    build(parse_args(sys.argv[1:]))
 
-main()
\ No newline at end of file
+if __name__ == "__main__":
+    main()
\ No newline at end of file
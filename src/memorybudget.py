@@ -0,0 +1,96 @@
+import os
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, wait
+
+# Peak memory of rendering a page in one piece (node tree, HTML string, filled-in template and the page
+# index) measured with tracemalloc on the blog posts: about 10x the size of the markdown source, plus some
+# margin.
+PAGE_MEMORY_FACTOR = 12
+# Making the variants of an image holds the decoded RGBA pixels, a resized copy and the WebP encoder's
+# buffers.
+IMAGE_BYTES_PER_PIXEL = 12
+
+
+def current_rss():
+    # Resident set size of this process in bytes, or None where there's no /proc to read it from
+    try:
+        with open("/proc/self/statm", "r") as statm_file:
+            resident_pages = int(statm_file.read().split()[1])
+    except (OSError, IndexError, ValueError):
+        return None
+    return resident_pages * os.sysconf("SC_PAGE_SIZE")
+
+
+def run_measured(function, *args):
+    # Runs on the worker processes: the job's result plus which worker ran it and how big it is now
+    return function(*args), os.getpid(), current_rss()
+
+
+class MemoryBudget:
+    # --max-memory: a limit for the resident memory of the build, this process and its pool workers
+    # together. Workers report their RSS after every job (see run_within_budget()). The limit is only as
+    # good as the estimates, it decides what runs at the same time and which pages are streamed, it
+    # doesn't stop a process from going over it.
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        # {pid: RSS in bytes} as last reported by every worker. Workers keep what they allocated even when
+        # idle, so they all count.
+        self.worker_rss = {}
+        self.peak = 0
+        self.streamed_pages = 0
+
+    def used(self):
+        used = (current_rss() or 0) + sum(self.worker_rss.values())
+        self.peak = max(self.peak, used)
+        return used
+
+    def available(self):
+        return self.max_bytes - self.used()
+
+    def record_worker(self, pid, rss):
+        if rss is not None:
+            self.worker_rss[pid] = rss
+        self.used()
+
+    def should_stream(self, source_size):
+        # Pages whose estimated rendering memory doesn't fit in what's left are written block by block
+        return source_size * PAGE_MEMORY_FACTOR > self.available()
+
+    def report(self):
+        rss = current_rss()
+        if rss is None:
+            return f"Memory budget: {mib(self.max_bytes)} (RSS can't be measured on this platform), {self.streamed_pages} page(s) streamed"
+        return f"Memory budget: peak {mib(self.peak)} of {mib(self.max_bytes)} ({len(self.worker_rss)} worker(s)), {self.streamed_pages} page(s) streamed"
+
+
+def run_within_budget(pool, function, jobs, estimates, budget):
+    # Like submitting every job to the pool at once, except a job only starts when its estimated memory fits
+    # in what's left of the budget, counting the jobs already running. Whatever the estimates, one job is
+    # always running, so a job bigger than the whole budget still gets done, alone.
+    # Returns the results in the order of jobs.
+    queue = deque(zip(range(len(jobs)), jobs, estimates))
+    running = {}
+    reserved = 0
+    results = [None] * len(jobs)
+
+    while queue or running:
+        while queue:
+            index, job, estimate = queue[0]
+            if running and reserved + estimate > budget.available():
+                break
+            queue.popleft()
+            running[pool.submit(run_measured, function, *job)] = (index, estimate)
+            reserved += estimate
+
+        done, _ = wait(running, return_when=FIRST_COMPLETED)
+        for future in done:
+            index, estimate = running.pop(future)
+            reserved -= estimate
+            results[index], pid, rss = future.result()
+            budget.record_worker(pid, rss)
+
+    return results
+
+
+def mib(size):
+    return f"{size / 1024 / 1024:.0f} MiB"
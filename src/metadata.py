@@ -0,0 +1,175 @@
+import hashlib
+import json
+import os
+import re
+import sqlite3
+from datetime import datetime, timezone
+
+from feedfunctions import w3c_datetime
+
+FRONT_MATTER_DELIMITER = "---"
+# Front matter bigger than this is not front matter, it's someone's horizontal rule
+MAX_FRONT_MATTER_BYTES = 64 * 1024
+# The front matter of memory-mapped sources, found on the raw bytes
+MAPPED_FRONT_MATTER = re.compile(rb"---\r?\n(?:(.*?)\r?\n)??---\r?\n", re.DOTALL)
+
+
+def parse_value(value):
+    value = value.strip()
+    if len(value) >= 2 and value[0] == value[-1] and value[0] in "\"'":
+        return value[1:-1]
+    if value.lower() in ("true", "yes"):
+        return True
+    if value.lower() in ("false", "no"):
+        return False
+    if value.startswith("[") and value.endswith("]"):
+        return [parse_value(item) for item in value[1:-1].split(",") if item.strip()]
+    return value
+
+
+def parse_front_matter_lines(lines):
+    # The small YAML subset pages use: "key: value" lines, with booleans, quoted strings and [a, b] lists.
+    # "tags" can also be a plain comma separated list.
+    metadata = {}
+    for line in lines:
+        line = line.strip()
+        if not line or line.startswith("#"):
+            continue
+        key, separator, value = line.partition(":")
+        if not separator:
+            raise ValueError(f"Invalid front matter line: {line}")
+        metadata[key.strip().lower()] = parse_value(value)
+
+    tags = metadata.get("tags")
+    if isinstance(tags, str):
+        metadata["tags"] = [tag.strip() for tag in tags.split(",") if tag.strip()]
+    return metadata
+
+
+def split_front_matter(markdown):
+    # Returns (metadata, markdown without the front matter)
+    if not markdown.startswith(FRONT_MATTER_DELIMITER + "\n"):
+        return {}, markdown
+    end = markdown.find("\n" + FRONT_MATTER_DELIMITER + "\n", len(FRONT_MATTER_DELIMITER))
+    if end == -1:
+        if markdown.endswith("\n" + FRONT_MATTER_DELIMITER):
+            end = len(markdown) - len(FRONT_MATTER_DELIMITER) - 1
+        else:
+            return {}, markdown
+
+    lines = markdown[len(FRONT_MATTER_DELIMITER) + 1:end].split("\n")
+    return parse_front_matter_lines(lines), markdown[end + len(FRONT_MATTER_DELIMITER) + 2:]
+
+
+def read_front_matter(path):
+    # For files too big to be read whole: reads just the front matter and returns (metadata, byte offset
+    # where the markdown starts).
+    with open(path, "rb") as md_file:
+        head = md_file.read(MAX_FRONT_MATTER_BYTES)
+
+    match = MAPPED_FRONT_MATTER.match(head)
+    if match is None:
+        return {}, 0
+    # Windows line endings are fine too, the offset is into the bytes as they are
+    lines = (match.group(1) or b"").decode("utf-8").splitlines()
+    return parse_front_matter_lines(lines), match.end()
+
+
+def parse_date(value):
+    # Front-matter dates: 2024-05-01, or with a time (2024-05-01T10:00:00, UTC unless there's an offset).
+    # Returns a timestamp.
+    parsed = datetime.fromisoformat(str(value))
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed.timestamp()
+
+
+def page_timestamp(metadata, source_path, mtime_dates=False):
+    # When the page last changed, for the sitemap, the feed and the listings: its front-matter date, or with
+    # mtime_dates the modification time of its source, otherwise None. Modification times change with every
+    # checkout of the same sources, so by default nothing in the output depends on them.
+    if metadata.get("date"):
+        try:
+            return parse_date(metadata["date"])
+        except ValueError:
+            raise ValueError(f"Invalid date in {source_path}: {metadata['date']!r}, expected YYYY-MM-DD")
+    if mtime_dates:
+        return os.stat(source_path).st_mtime
+    return None
+
+
+class MetadataIndex:
+    # Metadata of every page (title, date, tags, draft, template) in a SQLite file that outlives the build,
+    # so listing pages, tag pages and feeds can be made from it without opening the markdown sources.
+    def __init__(self, path):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.connection = sqlite3.connect(path)
+        self.connection.execute(
+            """CREATE TABLE IF NOT EXISTS pages (
+                url TEXT PRIMARY KEY,
+                source TEXT NOT NULL,
+                title TEXT NOT NULL,
+                date TEXT NOT NULL,
+                tags TEXT NOT NULL,
+                draft INTEGER NOT NULL,
+                template TEXT,
+                metadata_hash TEXT NOT NULL
+            )"""
+        )
+        self.seen = set()
+        # Pages whose metadata changed (or that appeared/disappeared) in this build
+        self.changed = set()
+
+    def update(self, url, source, title, metadata, timestamp=None):
+        # Returns True when the page is new or its metadata changed since the last build. Pages without a
+        # date in their front matter are dated by timestamp (see page_timestamp()), if there's one.
+        self.seen.add(url)
+        date = str(metadata.get("date") or (w3c_date(timestamp) if timestamp is not None else ""))
+        tags = json.dumps(sorted(set(metadata.get("tags", []))))
+        draft = bool(metadata.get("draft", False))
+        template = metadata.get("template")
+        metadata_hash = hashlib.sha256(json.dumps([source, title, date, tags, draft, template]).encode("utf-8")).hexdigest()
+
+        row = self.connection.execute("SELECT metadata_hash FROM pages WHERE url = ?", (url,)).fetchone()
+        if row is not None and row[0] == metadata_hash:
+            return False
+
+        self.connection.execute(
+            "INSERT OR REPLACE INTO pages VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            (url, source, title, date, tags, int(draft), template, metadata_hash),
+        )
+        self.changed.add(url)
+        return True
+
+    def remove_unseen(self):
+        urls = [row[0] for row in self.connection.execute("SELECT url FROM pages")]
+        for url in urls:
+            if url not in self.seen:
+                self.connection.execute("DELETE FROM pages WHERE url = ?", (url,))
+                self.changed.add(url)
+
+    def pages(self, tag=None, include_drafts=False):
+        # Newest first, as dicts
+        query = "SELECT url, source, title, date, tags, draft, template FROM pages"
+        if not include_drafts:
+            query += " WHERE draft = 0"
+        query += " ORDER BY date DESC, url"
+
+        result = []
+        for url, source, title, date, tags, draft, template in self.connection.execute(query):
+            tags = json.loads(tags)
+            if tag is not None and tag not in tags:
+                continue
+            result.append({"url": url, "source": source, "title": title, "date": date, "tags": tags, "draft": bool(draft), "template": template})
+        return result
+
+    def commit(self):
+        self.connection.commit()
+
+    def close(self):
+        self.connection.commit()
+        self.connection.close()
+
+
+def w3c_date(timestamp):
+    return w3c_datetime(timestamp)[:10]
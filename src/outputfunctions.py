@@ -0,0 +1,346 @@
+import argparse
+import hashlib
+import io
+import json
+import os
+import shutil
+import tarfile
+import tempfile
+import zipfile
+
+from compressfunctions import COMPRESSIBLE_EXTENSIONS, MIN_SIZE, compress_cached
+from discoveryfunctions import list_files
+
+# zstandard is optional, it's only needed for .tar.zst archives.
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+# Archive format by file extension
+ARCHIVE_FORMATS = {".tar": "tar", ".tar.zst": "tar.zst", ".zip": "zip"}
+# Path and content hash of every entry, written as the last entry of every archive. The extraction step
+# keeps it next to the extracted files to know what's already there.
+MANIFEST_NAME = ".site-manifest.json"
+# Entries get fixed timestamps, so the same site always makes the same archive. The extraction step only
+# rewrites changed files, so the ones on the server keep their real modification times.
+ENTRY_MTIME = 0
+ZIP_DATE_TIME = (1980, 1, 1, 0, 0, 0)
+COPY_CHUNK = 1024 * 1024
+
+
+def archive_format(archive_path):
+    for extension, archive_type in ARCHIVE_FORMATS.items():
+        if archive_path.endswith(extension):
+            return archive_type
+    raise ValueError(f"Unknown archive type for {archive_path}, use one of: {', '.join(ARCHIVE_FORMATS)}")
+
+
+class DirectoryOutput:
+    # The build output as loose files, which is what every writer did before archives: paths are written
+    # exactly where they point.
+    def makedirs(self, path):
+        os.makedirs(path, exist_ok=True)
+
+    def write(self, path, data):
+        if isinstance(data, str):
+            # No newline translation, so the output is the same on every platform
+            data = data.encode("utf-8")
+        with open(path, "wb") as output_file:
+            output_file.write(data)
+
+    def write_chunks(self, path, chunks):
+        # For outputs too big to be joined in memory first (streamed pages)
+        with open(path, "wb") as output_file:
+            for chunk in chunks:
+                output_file.write(chunk.encode("utf-8"))
+
+    def copy(self, source_path, path):
+        shutil.copyfile(source_path, path)
+
+    def copytree(self, source_dir, path):
+        if os.path.exists(path):
+            shutil.rmtree(path)
+        shutil.copytree(source_dir, path)
+
+    def exists(self, path):
+        return os.path.exists(path)
+
+    def written_paths(self, root):
+        # Paths relative to root of everything written so far. The build starts from an empty directory, so
+        # that's whatever is in it.
+        return list_files(root)
+
+    def close(self):
+        pass
+
+    def discard(self):
+        pass
+
+
+class HashingReader:
+    # Hashes whatever is read through it, so entries are hashed while they're streamed into the archive
+    def __init__(self, source_file, digest):
+        self.source_file = source_file
+        self.digest = digest
+
+    def read(self, size=-1):
+        data = self.source_file.read(size)
+        self.digest.update(data)
+        return data
+
+
+class ArchiveOutput:
+    # The build output as a single .tar, .tar.zst or .zip, written sequentially while the build produces
+    # it: pages and assets go straight into the archive instead of into thousands of loose files. Paths
+    # are the same ones the build would write to, and their place in the archive is relative to root.
+    # With a compress_cache directory, compressible entries also get their .gz (and .br) right after them,
+    # like precompress() does for loose files.
+    # The archive is written to a temporary file that only replaces archive_path on close(), so a failed
+    # build never leaves half an archive behind.
+    def __init__(self, archive_path, root, compress_cache=None):
+        self.archive_type = archive_format(archive_path)
+        if self.archive_type == "tar.zst" and zstandard is None:
+            raise Exception("Writing .tar.zst archives needs the zstandard package (pip install zstandard)")
+        self.archive_path = archive_path
+        self.root = root
+        self.compress_cache = compress_cache
+        if compress_cache is not None:
+            os.makedirs(compress_cache, exist_ok=True)
+        # {name: {"sha256": ..., "size": ...}} of every entry so far
+        self.manifest = {}
+        self.compressed = 0
+        self.cached = 0
+
+        if os.path.dirname(archive_path):
+            os.makedirs(os.path.dirname(archive_path), exist_ok=True)
+        self.tmp_path = f"{archive_path}.{os.getpid()}.tmp"
+        self.archive_file = open(self.tmp_path, "wb")
+        self.stream = None
+        self.tar = None
+        self.zip = None
+        if self.archive_type == "zip":
+            self.zip = zipfile.ZipFile(self.archive_file, "w")
+        else:
+            self.stream = self.archive_file
+            if self.archive_type == "tar.zst":
+                self.stream = zstandard.ZstdCompressor().stream_writer(self.archive_file)
+            # "w|" writes the tar as a stream, it never seeks back
+            self.tar = tarfile.open(fileobj=self.stream, mode="w|", format=tarfile.PAX_FORMAT)
+
+    def entry_name(self, path):
+        rel_path = os.path.relpath(path, self.root)
+        if rel_path == ".." or rel_path.startswith(".." + os.sep):
+            raise ValueError(f"{path} is outside of {self.root}")
+        return rel_path.replace(os.sep, "/")
+
+    def makedirs(self, path):
+        # Archives don't need directory entries
+        pass
+
+    def write(self, path, data):
+        if isinstance(data, str):
+            data = data.encode("utf-8")
+        self.add_data(self.entry_name(path), data)
+
+    def write_chunks(self, path, chunks):
+        # Entries need their size up front, so the chunks are spooled to a temporary file that's added
+        # like a copied one
+        name = self.entry_name(path)
+        spool_fd, spool_path = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(self.tmp_path)), suffix=".tmp")
+        try:
+            with os.fdopen(spool_fd, "wb") as spool_file:
+                for chunk in chunks:
+                    spool_file.write(chunk.encode("utf-8"))
+            self.add_file(spool_path, name)
+        finally:
+            os.remove(spool_path)
+
+    def copy(self, source_path, path):
+        self.add_file(source_path, self.entry_name(path))
+
+    def copytree(self, source_dir, path):
+        for rel_path in list_files(source_dir):
+            self.copy(os.path.join(source_dir, rel_path), os.path.join(path, rel_path))
+
+    def exists(self, path):
+        return self.entry_name(path) in self.manifest
+
+    def written_paths(self, root):
+        return [os.path.relpath(os.path.join(self.root, name), root) for name in self.manifest]
+
+    def add_data(self, name, data):
+        self.add_stream(name, io.BytesIO(data), len(data))
+        if self.compress_cache is None or not name.endswith(COMPRESSIBLE_EXTENSIONS) or len(data) < MIN_SIZE:
+            return
+        encodings, compressed, cached = compress_cached(data, self.compress_cache)
+        self.compressed += compressed
+        self.cached += cached
+        for extension, cached_path in encodings:
+            self.add_file(cached_path, name + extension)
+
+    def add_file(self, source_path, name):
+        if self.compress_cache is not None and name.endswith(COMPRESSIBLE_EXTENSIONS):
+            # Read whole since it gets compressed right after
+            with open(source_path, "rb") as source_file:
+                self.add_data(name, source_file.read())
+            return
+        with open(source_path, "rb") as source_file:
+            self.add_stream(name, source_file, os.fstat(source_file.fileno()).st_size)
+
+    def add_stream(self, name, source_file, size):
+        if name in self.manifest:
+            raise Exception(f"{name} was written to {self.archive_path} twice")
+        digest = hashlib.sha256()
+        reader = HashingReader(source_file, digest)
+
+        if self.tar is not None:
+            info = tarfile.TarInfo(name)
+            info.size = size
+            info.mtime = ENTRY_MTIME
+            info.mode = 0o644
+            self.tar.addfile(info, reader)
+        else:
+            info = zipfile.ZipInfo(name, ZIP_DATE_TIME)
+            info.file_size = size
+            info.external_attr = 0o644 << 16
+            # Images and .gz files are already compressed
+            info.compress_type = zipfile.ZIP_DEFLATED if name.endswith(COMPRESSIBLE_EXTENSIONS) else zipfile.ZIP_STORED
+            with self.zip.open(info, "w") as entry_file:
+                shutil.copyfileobj(reader, entry_file, COPY_CHUNK)
+
+        self.manifest[name] = {"sha256": digest.hexdigest(), "size": size}
+
+    def close(self):
+        manifest = json.dumps(self.manifest, sort_keys=True, indent=1).encode("utf-8")
+        self.add_stream(MANIFEST_NAME, io.BytesIO(manifest), len(manifest))
+        self.close_streams()
+        os.replace(self.tmp_path, self.archive_path)
+
+    def discard(self):
+        self.close_streams()
+        os.remove(self.tmp_path)
+
+    def close_streams(self):
+        if self.zip is not None:
+            self.zip.close()
+        if self.tar is not None:
+            # Closing the tar doesn't close the file object it was given
+            self.tar.close()
+        if self.stream is not None and self.stream is not self.archive_file:
+            self.stream.close()
+        self.archive_file.close()
+
+
+def archive_entries(archive_path):
+    # (name, data) of every file in the archive, in the order they were written
+    archive_type = archive_format(archive_path)
+    if archive_type == "zip":
+        with zipfile.ZipFile(archive_path) as archive:
+            for info in archive.infolist():
+                if not info.is_dir():
+                    yield info.filename, archive.read(info)
+        return
+
+    if archive_type == "tar.zst" and zstandard is None:
+        raise Exception("Reading .tar.zst archives needs the zstandard package (pip install zstandard)")
+    with open(archive_path, "rb") as archive_file:
+        stream = archive_file
+        if archive_type == "tar.zst":
+            stream = zstandard.ZstdDecompressor().stream_reader(archive_file)
+        with tarfile.open(fileobj=stream, mode="r|") as archive:
+            for member in archive:
+                if member.isfile():
+                    yield member.name, archive.extractfile(member).read()
+
+
+def entry_path(dest_dir, name):
+    # Where an entry goes, refusing names that would land outside dest_dir
+    parts = name.split("/")
+    if name.startswith("/") or ".." in parts or "" in parts:
+        raise ValueError(f"Refusing to extract {name}")
+    return os.path.join(dest_dir, *parts)
+
+
+def read_manifest(path):
+    try:
+        with open(path, "r") as manifest_file:
+            return json.load(manifest_file)
+    except FileNotFoundError:
+        return {}
+
+
+def write_atomically(path, data):
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "wb") as output_file:
+        output_file.write(data)
+    os.replace(tmp_path, path)
+
+
+def extract_archive(archive_path, dest_dir):
+    # The deploy side: updates dest_dir to the archive's content, writing only the entries that changed
+    # since the previous extraction (according to the manifest it left in dest_dir) and deleting files the
+    # archive doesn't have anymore. Unchanged files aren't touched, not even their modification times.
+    # Returns (written, unchanged, removed).
+    os.makedirs(dest_dir, exist_ok=True)
+    previous = read_manifest(os.path.join(dest_dir, MANIFEST_NAME))
+    archive_manifest = None
+    entries = {}
+    written = 0
+    unchanged = 0
+
+    for name, data in archive_entries(archive_path):
+        if name == MANIFEST_NAME:
+            archive_manifest = json.loads(data)
+            continue
+        path = entry_path(dest_dir, name)
+        entry = {"sha256": hashlib.sha256(data).hexdigest(), "size": len(data)}
+        entries[name] = entry
+        # The size check catches files edited on the server since the last extraction
+        if previous.get(name) == entry and os.path.isfile(path) and os.path.getsize(path) == len(data):
+            unchanged += 1
+            continue
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        write_atomically(path, data)
+        written += 1
+
+    if archive_manifest is None:
+        raise Exception(f"{archive_path} has no {MANIFEST_NAME}, it wasn't written by this generator")
+    if archive_manifest != entries:
+        raise Exception(f"{archive_path} doesn't match its manifest, it may be truncated or corrupt")
+
+    removed = 0
+    for name in sorted(set(previous) - set(entries)):
+        path = entry_path(dest_dir, name)
+        if os.path.exists(path):
+            os.remove(path)
+            removed += 1
+        remove_empty_dirs(os.path.dirname(path), dest_dir)
+
+    write_atomically(os.path.join(dest_dir, MANIFEST_NAME), json.dumps(entries, sort_keys=True, indent=1).encode("utf-8"))
+    return written, unchanged, removed
+
+
+def remove_empty_dirs(path, dest_dir):
+    # Walks up from path, stopping at dest_dir or at the first directory that isn't empty
+    dest_dir = os.path.abspath(dest_dir)
+    path = os.path.abspath(path)
+    while path != dest_dir and path.startswith(dest_dir + os.sep):
+        try:
+            os.rmdir(path)
+        except OSError:
+            return
+        path = os.path.dirname(path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Extract a site archive built with --archive, writing only what changed.")
+    parser.add_argument("archive", help="the .tar, .tar.zst or .zip archive")
+    parser.add_argument("dest_dir", help="directory the site is served from")
+    args = parser.parse_args()
+    written, unchanged, removed = extract_archive(args.archive, args.dest_dir)
+    print(f"Extracted {args.archive} into {args.dest_dir}: {written} written, {unchanged} unchanged, {removed} removed")
+
+
+if __name__ == "__main__":
+    main()
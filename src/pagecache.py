@@ -0,0 +1,145 @@
+import hashlib
+import json
+import os
+import tempfile
+
+# The modules whose code decides what a page's HTML looks like. Their source is part of every key, so
+# cached pages from an older (or newer) generator are never reused.
+RENDER_MODULES = [
+    "blockfunctions.py",
+    "highlightfunctions.py",
+    "htmlnode.py",
+    "imagefunctions.py",
+    "inlinefunctions.py",
+    "main.py",
+    "metadata.py",
+    "pageindex.py",
+    "templatefunctions.py",
+    "textnode.py",
+]
+# 512 MiB
+DEFAULT_MAX_BYTES = 512 * 1024 * 1024
+
+
+def generator_version():
+    digest = hashlib.sha256()
+    src_dir = os.path.dirname(os.path.abspath(__file__))
+    for name in RENDER_MODULES:
+        with open(os.path.join(src_dir, name), "rb") as module_file:
+            digest.update(module_file.read())
+    return digest.hexdigest()
+
+
+class DirectoryStore:
+    # Content-addressed blobs in a plain directory (<root>/ab/abcdef...), so it can live on a mounted or
+    # synced volume shared by several machines. Entries are written to a temporary file and renamed, readers
+    # never see half a blob. Reading an entry touches its mtime, and once the store grows over max_bytes the
+    # least recently used entries are deleted until it's back under 90% of the limit.
+    def __init__(self, root, max_bytes=DEFAULT_MAX_BYTES):
+        self.root = root
+        self.max_bytes = max_bytes
+        os.makedirs(root, exist_ok=True)
+        self.size = sum(size for _, _, size in self.entries())
+
+    def path(self, key):
+        return os.path.join(self.root, key[:2], key)
+
+    def get(self, key):
+        path = self.path(key)
+        try:
+            with open(path, "rb") as blob_file:
+                data = blob_file.read()
+        except FileNotFoundError:
+            return None
+        try:
+            os.utime(path)
+        except FileNotFoundError:
+            # Evicted by someone else in the meantime, we already have the data
+            pass
+        return data
+
+    def put(self, key, data):
+        path = self.path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        previous_size = os.path.getsize(path) if os.path.exists(path) else 0
+        # Unique even between threads and machines sharing the store, so two writers of a key can't mix up
+        # their temporary files
+        tmp_fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+        with os.fdopen(tmp_fd, "wb") as blob_file:
+            blob_file.write(data)
+        os.replace(tmp_path, path)
+        self.size += len(data) - previous_size
+        if self.size > self.max_bytes:
+            self.evict(self.max_bytes * 9 // 10)
+
+    def entries(self):
+        # (last use, path, size) of every blob
+        result = []
+        for prefix in os.scandir(self.root):
+            if not prefix.is_dir():
+                continue
+            for entry in os.scandir(prefix.path):
+                if entry.name.endswith(".tmp"):
+                    continue
+                stat = entry.stat()
+                result.append((stat.st_mtime, entry.path, stat.st_size))
+        return result
+
+    def evict(self, target_bytes):
+        entries = sorted(self.entries())
+        # Other machines may have added entries since the size was last counted
+        self.size = sum(size for _, _, size in entries)
+        for _, path, size in entries:
+            if self.size <= target_bytes:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            self.size -= size
+
+
+class PageCache:
+    # Rendered pages with the page index they were rendered with, keyed by hash(source, template fingerprint
+    # (layouts and partials included), build-wide context (basepath, options, images...), generator version).
+    # The key says everything about the output, so the store can be shared between machines: a fresh
+    # checkout gets every page it has in common with some earlier build without rendering it.
+    # The store is anything with get(key) -> bytes or None and put(key, bytes), like DirectoryStore.
+    # The last entry of every page is also kept in memory, a long-running process can pass the same memory
+    # dict to the cache of every build so warm pages don't even touch the store.
+    def __init__(self, store, context, memory=None):
+        self.store = store
+        self.memory = memory if memory is not None else {}
+        self.context = hashlib.sha256(json.dumps([generator_version(), context]).encode("utf-8")).hexdigest()
+        self.hits = 0
+        self.misses = 0
+
+    def key(self, source_hash, template_fingerprint):
+        return hashlib.sha256(f"{source_hash}:{template_fingerprint}:{self.context}".encode("utf-8")).hexdigest()
+
+    def get(self, dest_path, key):
+        # Returns (html, page index dict) or None
+        entry = self.memory.get(dest_path)
+        if entry is None or entry["key"] != key:
+            data = self.store.get(key)
+            entry = None
+            if data is not None:
+                try:
+                    entry = json.loads(data.decode("utf-8"))
+                except ValueError:
+                    entry = None
+            if entry is not None:
+                entry["key"] = key
+                self.memory[dest_path] = entry
+
+        if entry is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return entry["html"], entry["index"]
+
+    def put(self, dest_path, key, html, page_index_dict):
+        entry = {"html": html, "index": page_index_dict}
+        self.store.put(key, json.dumps(entry).encode("utf-8"))
+        entry["key"] = key
+        self.memory[dest_path] = entry
@@ -0,0 +1,125 @@
+import re
+
+from htmlnode import LeafNode, ParentNode
+from textnode import TextType
+
+
+class Heading:
+    def __init__(self, level, slug, text):
+        self.level = level
+        self.slug = slug
+        self.text = text
+
+    def __eq__(self, other):
+        if not isinstance(other, Heading):
+            return False
+        return vars(self) == vars(other)
+
+    def __repr__(self):
+        return f"Heading(level={self.level}, slug={self.slug}, text={self.text})"
+
+
+class PageIndex:
+    # Everything worth knowing about a page that's collected while its blocks are being rendered,
+    # so nobody has to parse the markdown (or walk the HTML tree) a second time to get it.
+    def __init__(self):
+        self.title = None
+        self.metadata = {}
+        self.headings = []
+        self.slug_counts = {}
+        self.text_parts = []
+        self.links = []
+        self.images = []
+        # (url, html node) of every <img>, so their attributes can still be filled in before serializing
+        self.image_nodes = []
+        # (language, code, <pre> node) of every fenced code block with a language, for the highlighter
+        self.code_blocks = []
+        # True when the page wasn't rendered but reused from the page cache
+        self.from_cache = False
+
+    def add_heading(self, level, text):
+        slug = slugify(text)
+        # Repeated headings get "-1", "-2"... appended so every id in the page stays unique.
+        count = self.slug_counts.get(slug, 0)
+        self.slug_counts[slug] = count + 1
+        if count:
+            slug = f"{slug}-{count}"
+
+        self.headings.append(Heading(level, slug, text))
+        return slug
+
+    def add_leaf(self, text_node, html_node):
+        self.text_parts.append(text_node.text)
+        if text_node.text_type == TextType.LINK:
+            self.links.append(text_node.url)
+        elif text_node.text_type == TextType.IMAGE:
+            self.images.append(text_node.url)
+            self.image_nodes.append((text_node.url, html_node))
+
+    def add_code_block(self, language, code, pre_node):
+        self.code_blocks.append((language, code, pre_node))
+
+    def end_text(self):
+        # Called after every block (and list item) so words from different blocks never get glued together.
+        self.text_parts.append("\n")
+
+    def plain_text(self):
+        return "".join(self.text_parts)
+
+    def to_dict(self):
+        # What's left of the index once the page is rendered, for caching it as JSON
+        return {
+            "title": self.title,
+            "metadata": self.metadata,
+            "headings": [[heading.level, heading.slug, heading.text] for heading in self.headings],
+            "text": self.plain_text(),
+            "links": self.links,
+            "images": self.images,
+        }
+
+    def toc_html_node(self):
+        if not self.headings:
+            return None
+
+        root = ParentNode("ul", [])
+        # One (level, ul node) pair per open list, the outermost first. The outermost list takes the level
+        # of the first heading, and skipped levels (an h4 right after an h2) only nest one list deeper.
+        stack = [(self.headings[0].level, root)]
+        for heading in self.headings:
+            while len(stack) > 1 and heading.level < stack[-1][0]:
+                stack.pop()
+            level, list_node = stack[-1]
+            if heading.level > level and list_node.children:
+                nested_list = ParentNode("ul", [])
+                list_node.children[-1].children.append(nested_list)
+                stack.append((heading.level, nested_list))
+                list_node = nested_list
+
+            link = LeafNode("a", heading.text, {"href": f"#{heading.slug}"})
+            list_node.children.append(ParentNode("li", [link]))
+
+        return root
+
+    def toc_html(self):
+        toc = self.toc_html_node()
+        if toc is None:
+            return ""
+        return toc.to_html()
+
+
+def page_index_from_dict(data):
+    page_index = PageIndex()
+    page_index.title = data["title"]
+    page_index.metadata = data["metadata"]
+    page_index.headings = [Heading(level, slug, text) for level, slug, text in data["headings"]]
+    page_index.text_parts = [data["text"]]
+    page_index.links = data["links"]
+    page_index.images = data["images"]
+    page_index.from_cache = True
+    return page_index
+
+
+def slugify(text):
+    slug = re.sub(r"[^\w\s-]", "", text.lower())
+    slug = re.sub(r"[\s_-]+", "-", slug).strip("-")
+    return slug or "section"
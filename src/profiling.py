@@ -0,0 +1,90 @@
+import cProfile
+import os
+import pstats
+import time
+import tracemalloc
+
+# Pages slower than this (in seconds) keep their cProfile stats
+PROFILE_THRESHOLD = 0.5
+# Functions listed per page in the report
+HOT_FUNCTIONS = 5
+
+
+class PageProfile:
+    def __init__(self, path, seconds, peak_bytes, hot_functions=None, dump_path=None):
+        self.path = path
+        self.seconds = seconds
+        self.peak_bytes = peak_bytes
+        # [(function, calls, own seconds, cumulative seconds)] for pages above the threshold
+        self.hot_functions = hot_functions or []
+        self.dump_path = dump_path
+
+    def __eq__(self, other):
+        return vars(self) == vars(other)
+
+    def __repr__(self):
+        return f"PageProfile(path={self.path}, seconds={self.seconds}, peak_bytes={self.peak_bytes})"
+
+
+class Profiler:
+    # Runs every page under cProfile and tracemalloc. Wall time and allocation peak are kept for all of
+    # them, but the cProfile stats only for pages slower than threshold (dumped to dump_dir when given, to be
+    # opened with pstats or snakeviz), so the report can show where those pages spent their time.
+    def __init__(self, threshold=PROFILE_THRESHOLD, dump_dir=None):
+        self.threshold = threshold
+        self.dump_dir = dump_dir
+        self.profiles = []
+        if dump_dir is not None:
+            os.makedirs(dump_dir, exist_ok=True)
+
+    def profile(self, path, function, *args, **kwargs):
+        started_tracing = not tracemalloc.is_tracing()
+        if started_tracing:
+            tracemalloc.start()
+        tracemalloc.reset_peak()
+        baseline = tracemalloc.get_traced_memory()[0]
+
+        profile = cProfile.Profile()
+        start = time.perf_counter()
+        try:
+            return profile.runcall(function, *args, **kwargs)
+        finally:
+            seconds = time.perf_counter() - start
+            peak_bytes = tracemalloc.get_traced_memory()[1] - baseline
+            if started_tracing:
+                tracemalloc.stop()
+            self.record(path, seconds, peak_bytes, profile)
+
+    def record(self, path, seconds, peak_bytes, profile):
+        if seconds < self.threshold:
+            self.profiles.append(PageProfile(path, seconds, peak_bytes))
+            return
+
+        stats = pstats.Stats(profile)
+        dump_path = None
+        if self.dump_dir is not None:
+            dump_path = os.path.join(self.dump_dir, path.replace(os.sep, "_") + ".prof")
+            stats.dump_stats(dump_path)
+        self.profiles.append(PageProfile(path, seconds, peak_bytes, hot_functions(stats), dump_path))
+
+    def worst(self, count=10):
+        return sorted(self.profiles, key=lambda page: page.seconds, reverse=True)[:count]
+
+    def report(self, count=10):
+        lines = [f"Slowest {min(count, len(self.profiles))} of {len(self.profiles)} page(s):"]
+        for page in self.worst(count):
+            lines.append(f"  {page.seconds:8.3f}s  {page.peak_bytes / 1024 / 1024:8.1f} MiB peak  {page.path}")
+            for function, calls, own_seconds, cumulative_seconds in page.hot_functions:
+                lines.append(f"      {own_seconds:8.3f}s own  {cumulative_seconds:8.3f}s total  {calls:>8} calls  {function}")
+            if page.dump_path is not None:
+                lines.append(f"      stats: {page.dump_path}")
+        return "\n".join(lines)
+
+
+def hot_functions(stats, count=HOT_FUNCTIONS):
+    # The functions with the most time spent in their own code
+    entries = []
+    for (filename, line, name), (_, calls, own_seconds, cumulative_seconds, _) in stats.stats.items():
+        entries.append((f"{os.path.basename(filename)}:{line}({name})", calls, own_seconds, cumulative_seconds))
+    entries.sort(key=lambda entry: entry[2], reverse=True)
+    return entries[:count]
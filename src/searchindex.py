@@ -0,0 +1,142 @@
+import gzip
+import hashlib
+import json
+import os
+import re
+import shutil
+
+TOKEN = re.compile(r"\w+")
+# Terms are split into chunks by their first characters, so the browser only downloads the chunk
+# for what's being typed instead of the whole index.
+PREFIX_LENGTH = 2
+# Page ids are a hash of the url instead of a counter, so they don't depend on the order pages were first
+# indexed in: the same site makes the same index whatever cache it was built from.
+PAGE_ID_LENGTH = 12
+# Cached state from another version is dropped and the index is built from scratch
+STATE_VERSION = 2
+
+
+def tokenize(text):
+    return [token.lower() for token in TOKEN.findall(text)]
+
+
+def term_prefix(term):
+    return term[:PREFIX_LENGTH]
+
+
+def page_id(url):
+    return hashlib.sha256(url.encode("utf-8")).hexdigest()[:PAGE_ID_LENGTH]
+
+
+class SearchIndex:
+    # Inverted index (term -> {page id: [positions]}) that survives between builds in cache_dir,
+    # so on every build only the pages whose text changed get tokenized and have their postings updated,
+    # and only the chunks containing a term of those pages get written again.
+    def __init__(self, cache_dir):
+        self.cache_dir = cache_dir
+        self.state_path = os.path.join(cache_dir, "state.json")
+        self.chunks_dir = os.path.join(cache_dir, "chunks")
+        # url -> {"id", "hash", "title", "terms"}
+        self.pages = {}
+        # term -> {page id: [positions]}
+        self.postings = {}
+        self.seen = set()
+        self.dirty_prefixes = set()
+        self.pages_changed = False
+
+        if os.path.exists(self.state_path):
+            with open(self.state_path, "r") as state_file:
+                state = json.load(state_file)
+            if state.get("version") == STATE_VERSION:
+                self.pages = state["pages"]
+                self.postings = state["postings"]
+            elif os.path.exists(self.chunks_dir):
+                shutil.rmtree(self.chunks_dir)
+
+    def update_page(self, url, title, text):
+        self.seen.add(url)
+        page_hash = hashlib.sha256(f"{title}\n{text}".encode("utf-8")).hexdigest()
+        page = self.pages.get(url)
+        if page is not None and page["hash"] == page_hash:
+            return False
+
+        if page is None:
+            page = {"id": page_id(url)}
+            self.pages[url] = page
+        else:
+            self.remove_postings(page)
+
+        positions = {}
+        for position, term in enumerate(tokenize(text)):
+            positions.setdefault(term, []).append(position)
+        for term, term_positions in positions.items():
+            self.postings.setdefault(term, {})[page["id"]] = term_positions
+            self.dirty_prefixes.add(term_prefix(term))
+
+        page["hash"] = page_hash
+        page["title"] = title
+        page["terms"] = list(positions)
+        self.pages_changed = True
+        return True
+
+    def remove_postings(self, page):
+        for term in page["terms"]:
+            term_postings = self.postings[term]
+            del term_postings[page["id"]]
+            if not term_postings:
+                del self.postings[term]
+            self.dirty_prefixes.add(term_prefix(term))
+
+    def remove_unseen_pages(self):
+        # Pages that weren't built this time (deleted or now ignored) leave the index.
+        for url in [url for url in self.pages if url not in self.seen]:
+            self.remove_postings(self.pages.pop(url))
+            self.pages_changed = True
+
+    def write(self, dest_dir):
+        self.remove_unseen_pages()
+        os.makedirs(self.chunks_dir, exist_ok=True)
+
+        if self.dirty_prefixes:
+            chunks = {prefix: {} for prefix in self.dirty_prefixes}
+            for term, term_postings in self.postings.items():
+                prefix = term_prefix(term)
+                if prefix in chunks:
+                    chunks[prefix][term] = term_postings
+
+            for prefix, chunk in chunks.items():
+                chunk_path = os.path.join(self.chunks_dir, f"{prefix}.json.gz")
+                if chunk:
+                    write_gzip_json(chunk_path, chunk)
+                elif os.path.exists(chunk_path):
+                    os.remove(chunk_path)
+
+        if self.pages_changed or not os.path.exists(os.path.join(self.chunks_dir, "pages.json")):
+            pages = {page["id"]: {"url": url, "title": page["title"]} for url, page in self.pages.items()}
+            with open(os.path.join(self.chunks_dir, "pages.json"), "w", encoding="utf-8") as pages_file:
+                json.dump(pages, pages_file, separators=(",", ":"), sort_keys=True)
+
+        with open(self.state_path, "w") as state_file:
+            json.dump({"version": STATE_VERSION, "pages": self.pages, "postings": self.postings}, state_file, separators=(",", ":"))
+
+        # The cached chunks are the index, the output just gets a copy of them.
+        if os.path.exists(dest_dir):
+            shutil.rmtree(dest_dir)
+        shutil.copytree(self.chunks_dir, dest_dir)
+
+        self.seen = set()
+        self.dirty_prefixes = set()
+        self.pages_changed = False
+
+
+def write_gzip_json(path, data):
+    content = json.dumps(data, separators=(",", ":"), sort_keys=True).encode("utf-8")
+    # mtime=0 so unchanged chunks always compress to the exact same bytes
+    with open(path, "wb") as chunk_file:
+        chunk_file.write(gzip.compress(content, mtime=0))
+
+
+def read_gzip_json(path):
+    with open(path, "rb") as chunk_file:
+        return json.loads(gzip.decompress(chunk_file.read()))
+
@@ -0,0 +1,128 @@
+import hashlib
+import re
+
+from discoveryfunctions import file_hash
+
+# {{ Name }} is replaced with the page's value for Name
+VARIABLE = re.compile(r"\{\{\s*(\w+)\s*\}\}")
+# {% include "partials/nav.html" %} pastes another template in place
+INCLUDE = re.compile(r"\{%\s*include\s+\"([^\"]+)\"\s*%\}")
+# {% extends "layout.html" %} (first thing in the file) makes the template a child of a layout: the child's
+# blocks replace the layout's blocks with the same name and anything outside them is ignored.
+EXTENDS = re.compile(r"\s*\{%\s*extends\s+\"([^\"]+)\"\s*%\}")
+# Blocks can't be nested
+BLOCK = re.compile(r"\{%\s*block\s+(\w+)\s*%\}(.*?)\{%\s*endblock\s*%\}", re.DOTALL)
+
+
+class CompiledTemplate:
+    # A template with its includes and layouts already resolved, split once into literal text and variable
+    # names: segments[0], segments[2]... are text and segments[1], segments[3]... are names, so rendering is
+    # a single join instead of a str.replace() over the whole page per variable.
+    def __init__(self, path, segments, dependencies):
+        self.path = path
+        self.segments = segments
+        # {path: file hash} of the template itself and every layout and partial it uses
+        self.dependencies = dependencies
+        content = "\n".join(f"{dep_path}:{dep_hash}" for dep_path, dep_hash in sorted(dependencies.items()))
+        self.fingerprint = hashlib.sha256(content.encode("utf-8")).hexdigest()
+
+    def __eq__(self, other):
+        return vars(self) == vars(other)
+
+    def __repr__(self):
+        return f"CompiledTemplate(path={self.path}, fingerprint={self.fingerprint})"
+
+    def variables(self):
+        return set(self.segments[1::2])
+
+    def render(self, values):
+        # Variables without a value render as empty
+        parts = self.segments[:]
+        for i in range(1, len(parts), 2):
+            parts[i] = values.get(parts[i], "")
+        return "".join(parts)
+
+    def render_chunks(self, values):
+        # Same as render(), for pages that are written piece by piece instead of joined: yields the text and
+        # the values one after the other. A value can also be a function returning an iterable of strings
+        # (a streamed page's content), called every time the variable appears.
+        for i, part in enumerate(self.segments):
+            if i % 2 == 0:
+                yield part
+                continue
+            value = values.get(part, "")
+            if callable(value):
+                yield from value()
+            else:
+                yield value
+
+
+class TemplateCache:
+    # Templates are compiled once per build and kept by path together with the hashes of every file they
+    # were compiled from. Files are hashed once per build (new_build() forgets the hashes), and a template is
+    # compiled again only when one of its files changed, so a compiled template's fingerprint only changes
+    # for the pages that use the edited layout or partial.
+    def __init__(self):
+        self.file_hashes = {}
+        self.compiled = {}
+
+    def new_build(self):
+        self.file_hashes = {}
+
+    def file_hash(self, path):
+        if path not in self.file_hashes:
+            self.file_hashes[path] = file_hash(path)
+        return self.file_hashes[path]
+
+    def get(self, path, minify=False):
+        cached = self.compiled.get((path, minify))
+        if cached is not None and all(self.file_hash(dep_path) == dep_hash for dep_path, dep_hash in cached.dependencies.items()):
+            return cached
+
+        dependencies = {}
+        text = resolve_template(path, dependencies, [])
+        # Block tags are only markers for the layouts, they don't make it to the output
+        text = BLOCK.sub(lambda match: match.group(2), text)
+        if minify:
+            text = minify_template(text)
+        compiled = CompiledTemplate(path, VARIABLE.split(text), {dep_path: self.file_hash(dep_path) for dep_path in dependencies})
+        self.compiled[(path, minify)] = compiled
+        return compiled
+
+
+def resolve_template(path, dependencies, stack):
+    # Returns the template's text with includes and layouts pasted in (block tags are kept so a child can
+    # still replace them). stack holds the templates being resolved, to catch templates including themselves.
+    if path in stack:
+        raise ValueError(f"Template {path} includes or extends itself: {' -> '.join(stack + [path])}")
+    dependencies[path] = True
+    stack = stack + [path]
+
+    with open(path, "r", encoding="utf-8") as template_file:
+        text = template_file.read()
+    text = INCLUDE.sub(lambda match: resolve_template(match.group(1), dependencies, stack), text)
+
+    extends = EXTENDS.match(text)
+    if extends is None:
+        return text
+
+    blocks = {name: content for name, content in BLOCK.findall(text)}
+    layout = resolve_template(extends.group(1), dependencies, stack)
+
+    def replace_block(match):
+        name = match.group(1)
+        if name not in blocks:
+            # The layout's default content
+            return match.group(0)
+        return f"{{% block {name} %}}{blocks[name]}{{% endblock %}}"
+
+    return BLOCK.sub(replace_block, layout)
+
+
+def minify_template(template):
+    # Collapses the whitespace between tags (the template's indentation), leaving anything inside
+    # <pre> and <textarea> alone since whitespace there is part of the content.
+    parts = re.split(r"(<(?:pre|textarea)\b.*?</(?:pre|textarea)>)", template, flags=re.DOTALL | re.IGNORECASE)
+    for i in range(0, len(parts), 2):
+        parts[i] = re.sub(r">\s+<", "><", parts[i])
+    return "".join(parts).strip()
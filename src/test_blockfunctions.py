@@ -1,6 +1,13 @@
+import os
+import re
+import sys
+import tempfile
 import unittest
 
-from blockfunctions import markdown_to_blocks, BlockType, block_to_block_type, markdown_to_html_node, extract_title
+import blockfunctions
+from blockfunctions import markdown_to_blocks, markdown_file_to_blocks, BlockType, block_to_block_type, markdown_to_html_node, markdown_file_to_html_node, extract_title, default_block_registry, split_table_row
+from htmlnode import LeafNode
+
 
 class TestMarkdownToBlocks(unittest.TestCase):
     def test_markdown_to_blocks(self):
@@ -354,6 +361,189 @@ class TestExtractTitle(unittest.TestCase):
         md = "# This is a valid title with **bold**, _italics_ and ```code``` inside."
         self.assertEqual(extract_title(md), "This is a valid title with bold, italics and code inside.")
 
+    def test_title_with_nested_emphasis(self):
+        self.assertEqual(extract_title("# The **bold _and italic_** title"), "The bold and italic title")
+        self.assertEqual(extract_title("# ~~Old~~ New <https://boot.dev>"), "Old New https://boot.dev")
+
+
+class TestMarkdownFileToBlocks(unittest.TestCase):
+    def write_markdown(self, md):
+        md_file = tempfile.NamedTemporaryFile("w", suffix=".md", delete=False, encoding="utf-8")
+        with md_file:
+            md_file.write(md)
+        self.addCleanup(os.remove, md_file.name)
+        return md_file.name
+
+    def test_same_blocks_as_markdown_to_blocks(self):
+        md = """
+
+    # Título con acentos
+
+    This is **bolded** paragraph
+    with two lines   
+       
+    - This is a list
+    - with items
+
+
+    > and a quote ✓
+    """
+        path = self.write_markdown(md)
+        self.assertEqual(list(markdown_file_to_blocks(path)), markdown_to_blocks(md))
+
+    def test_unicode_whitespace_lines(self):
+        # Lines of non-breaking, ideographic and other non-ASCII spaces separate blocks on both paths
+        for space in ["\u00a0", "\u2028", "\u3000 ", "\x1c", "\x85", "\u00a0\t\u2003"]:
+            with self.subTest(space=ascii(space)):
+                md = f"First paragraph\n{space}\nSecond ü paragraph\n\n{space}\n\nThird"
+                path = self.write_markdown(md)
+                self.assertEqual(list(markdown_file_to_blocks(path)), markdown_to_blocks(md))
+                self.assertEqual(len(markdown_to_blocks(md)), 3)
+
+    def test_fence_keeps_its_empty_lines(self):
+        md = "```\nTom\n\n\n\nBombadil\n  \n\n```\n\n\nAfter"
+        path = self.write_markdown(md)
+        self.assertEqual(markdown_to_blocks(md), ["```\nTom\n\n\n\nBombadil\n\n\n```", "After"])
+        self.assertEqual(list(markdown_file_to_blocks(path)), markdown_to_blocks(md))
+
+    def test_whitespace_list_is_complete(self):
+        whitespace = [chr(code) for code in range(sys.maxunicode + 1) if re.match(r"\s", chr(code))]
+        self.assertEqual(whitespace, blockfunctions.UNICODE_WHITESPACE)
+
+    def test_empty_file(self):
+        path = self.write_markdown("")
+        self.assertEqual(list(markdown_file_to_blocks(path)), [])
+
+    def test_file_to_html_node(self):
+        md = "# The title\n\nSome _text_ here\n\n## Subtitle"
+        path = self.write_markdown(md)
+        node, title = markdown_file_to_html_node(path)
+        self.assertEqual(title, "The title")
+        self.assertEqual(node.to_html(), markdown_to_html_node(md).to_html())
+
+    def test_file_without_title(self):
+        path = self.write_markdown("Just a paragraph")
+        with self.assertRaises(Exception):
+            markdown_file_to_html_node(path)
+
+    def test_file_with_front_matter_title(self):
+        path = self.write_markdown("Just a paragraph\n\n# A heading")
+        self.assertEqual(markdown_file_to_html_node(path, title="From front matter")[1], "From front matter")
+
+
+class TestNestedLists(unittest.TestCase):
+    def test_nested_unordered_list(self):
+        md = """
+    - Item 1
+      - Item 1.1
+      - Item 1.2
+        - Item 1.2.1
+    - Item 2
+    """
+        self.assertEqual(
+            markdown_to_html_node(md).to_html(),
+            "<div><ul><li>Item 1<ul><li>Item 1.1</li><li>Item 1.2<ul><li>Item 1.2.1</li></ul></li></ul></li><li>Item 2</li></ul></div>",
+        )
+
+    def test_mixed_nested_lists(self):
+        md = """
+    1. First
+       - a **bold _and italic_** bullet
+       - another bullet
+    2. Second
+       1. Sub first
+       2. Sub second
+    """
+        self.assertEqual(
+            markdown_to_html_node(md).to_html(),
+            "<div><ol><li>First<ul><li>a <b>bold <i>and italic</i></b> bullet</li><li>another bullet</li></ul></li>"
+            "<li>Second<ol><li>Sub first</li><li>Sub second</li></ol></li></ol></div>",
+        )
+
+    def test_nested_block_types(self):
+        self.assertEqual(BlockType.UNORDERED_LIST, block_to_block_type("- a\n  1. b\n  2. c\n- d"))
+        self.assertEqual(BlockType.ORDERED_LIST, block_to_block_type("1. a\n  - b\n2. c"))
+        # Nested ordered lists start counting from 1 again
+        self.assertEqual(BlockType.PARAGRAPH, block_to_block_type("1. a\n  - b\n3. c"))
+        # Items at the same level can't mix markers
+        self.assertEqual(BlockType.PARAGRAPH, block_to_block_type("- a\n1. b"))
+
+    def test_deeply_nested_list(self):
+        md = "\n".join(" " * depth + "- item" for depth in range(1000))
+        html = markdown_to_html_node(md).to_html()
+        self.assertEqual(html.count("<ul>"), 1000)
+        self.assertTrue(html.endswith("</li></ul>" * 1000 + "</div>"))
+
+
+class TestBlockRegistry(unittest.TestCase):
+    def test_block_types(self):
+        self.assertEqual(block_to_block_type("---"), BlockType.HORIZONTAL_RULE)
+        self.assertEqual(block_to_block_type("* * *"), BlockType.HORIZONTAL_RULE)
+        self.assertEqual(block_to_block_type("- item\n- item"), BlockType.UNORDERED_LIST)
+        self.assertEqual(block_to_block_type("|a|b|\n|-|-|"), BlockType.TABLE)
+        self.assertEqual(block_to_block_type("|a|b|\n|not|a delimiter|"), BlockType.PARAGRAPH)
+        self.assertEqual(block_to_block_type("> [!NOTE]\n> text"), BlockType.ADMONITION)
+        self.assertEqual(block_to_block_type("> [!NOTE] not alone\n> text"), BlockType.QUOTE)
+        self.assertEqual(block_to_block_type("_just italic_"), BlockType.PARAGRAPH)
+
+    def test_table(self):
+        md = "| Name | Race | Age |\n|:-----|:----:|----:|\n| **Tom** | ? | old |\n| Frodo \\| Baggins | hobbit |"
+        self.assertEqual(
+            markdown_to_html_node(md).to_html(),
+            '<div><table><thead><tr><th style="text-align: left">Name</th><th style="text-align: center">Race</th><th style="text-align: right">Age</th></tr></thead>'
+            '<tbody><tr><td style="text-align: left"><b>Tom</b></td><td style="text-align: center">?</td><td style="text-align: right">old</td></tr>'
+            '<tr><td style="text-align: left">Frodo | Baggins</td><td style="text-align: center">hobbit</td><td style="text-align: right"></td></tr></tbody></table></div>',
+        )
+
+    def test_split_table_row(self):
+        self.assertEqual(split_table_row("| a | b |"), ["a", "b"])
+        self.assertEqual(split_table_row("| a | b"), ["a", "b"])
+        self.assertEqual(split_table_row("| a \\| b | |"), ["a | b", ""])
+
+    def test_horizontal_rule(self):
+        self.assertEqual(markdown_to_html_node("Before\n\n---\n\nAfter").to_html(), "<div><p>Before</p><hr></hr><p>After</p></div>")
+
+    def test_admonition(self):
+        self.assertEqual(
+            markdown_to_html_node("> [!tip]\n> Read the _appendices_").to_html(),
+            '<div><div class="admonition tip"><p class="admonition-title">Tip</p><p>Read the <i>appendices</i></p></div></div>',
+        )
+
+    def test_fenced_code_with_language(self):
+        md = "```python\nprint(\"Tom\")\n\nprint(\"Bombadil\")\n```\n\nAfter"
+        self.assertEqual(
+            markdown_to_html_node(md).to_html(),
+            '<div><pre><code class="language-python">print("Tom")\n\nprint("Bombadil")\n</code></pre><p>After</p></div>',
+        )
+        # Split by the empty line, glued back together
+        self.assertEqual(len(markdown_to_blocks(md)), 2)
+
+    def test_unclosed_fence_is_left_alone(self):
+        self.assertEqual(markdown_to_blocks("```\n\nText\n\nMore"), ["```", "Text", "More"])
+
+    def test_plugin(self):
+        def is_math(block, lines):
+            return block.startswith("$$") and block.endswith("$$") and len(block) >= 4
+
+        def math_to_html_node(block, page_index=None):
+            return LeafNode("div", block[2:-2].strip(), {"class": "math"})
+
+        registry = default_block_registry()
+        registry.add("math", ["$$"], is_math, math_to_html_node)
+        self.assertEqual(block_to_block_type("$$ x^2 $$", registry), "math")
+        self.assertEqual(markdown_to_html_node("$$ x^2 $$\n\n$5", registry=registry).to_html(), '<div><div class="math">x^2</div><p>$5</p></div>')
+        self.assertEqual(block_to_block_type("$$ x^2 $$"), BlockType.PARAGRAPH)
+
+        with self.assertRaises(ValueError):
+            registry.add(BlockType.TABLE, ["+"], is_math, math_to_html_node)
+
+    def test_dispatch_only_tries_matching_prefixes(self):
+        tried = []
+        registry = default_block_registry()
+        registry.add("traced", ["%"], lambda block, lines: tried.append(block) or False, None)
+        markdown_to_html_node("# Title\n\nText\n\n% maybe", registry=registry)
+        self.assertEqual(tried, ["% maybe"])
+
 
 if __name__ == "__main__":
     unittest.main()
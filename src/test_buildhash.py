@@ -0,0 +1,79 @@
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from buildhash import FileHashes, build_hash, output_hash, read_build_state, write_build_state
+
+
+class TestBuildHash(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.page = os.path.join(self.tmp.name, "index.md")
+        self.write(self.page, "# Home")
+        self.hashes_path = os.path.join(self.tmp.name, "cache", "file-hashes.json")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write(self, path, content, mtime=1000000000):
+        with open(path, "w") as output_file:
+            output_file.write(content)
+        os.utime(path, (mtime, mtime))
+
+    def build_hash(self, settings=None, paths=None):
+        return build_hash(settings or {"basepath": "/"}, paths or [self.page], FileHashes(self.hashes_path))
+
+    def test_same_inputs_same_hash(self):
+        self.assertEqual(self.build_hash(), self.build_hash())
+
+    def test_inputs_change_the_hash(self):
+        first = self.build_hash()
+        self.assertNotEqual(self.build_hash({"basepath": "/site/"}), first)
+
+        self.write(self.page, "# Away")
+        changed = self.build_hash()
+        self.assertNotEqual(changed, first)
+        # A fresh checkout (new modification times) of the same sources is the same build...
+        self.write(self.page, "# Away", mtime=2000000000)
+        self.assertEqual(self.build_hash(), changed)
+        # ...unless pages are dated by them
+        with_mtimes = build_hash({"basepath": "/"}, [self.page], FileHashes(self.hashes_path), with_mtimes=True)
+        self.write(self.page, "# Away", mtime=1000000000)
+        self.assertNotEqual(build_hash({"basepath": "/"}, [self.page], FileHashes(self.hashes_path), with_mtimes=True), with_mtimes)
+
+        os.remove(self.page)
+        self.assertNotEqual(self.build_hash(), changed)
+
+    def test_unchanged_files_are_not_read(self):
+        file_hashes = FileHashes(self.hashes_path)
+        first = file_hashes.get(self.page)
+        file_hashes.save()
+
+        file_hashes = FileHashes(self.hashes_path)
+        with mock.patch("buildhash.file_hash") as file_hash:
+            self.assertEqual(file_hashes.get(self.page), first)
+            file_hash.assert_not_called()
+
+        # A changed file is read again
+        self.write(self.page, "# Away", mtime=2000000000)
+        self.assertNotEqual(FileHashes(self.hashes_path).get(self.page), first)
+
+    def test_output_hash(self):
+        first = output_hash([self.page], FileHashes(self.hashes_path))
+        self.assertEqual(output_hash([self.page], FileHashes(self.hashes_path)), first)
+        # Edited, then deleted
+        self.write(self.page, "# Away", mtime=2000000000)
+        self.assertNotEqual(output_hash([self.page], FileHashes(self.hashes_path)), first)
+        os.remove(self.page)
+        self.assertNotEqual(output_hash([self.page], FileHashes(self.hashes_path)), first)
+
+    def test_build_state(self):
+        path = os.path.join(self.tmp.name, "cache", "build.json")
+        self.assertIsNone(read_build_state(path))
+        write_build_state(path, {"hash": "abc", "templates": ["template.html"]})
+        self.assertEqual(read_build_state(path), {"hash": "abc", "templates": ["template.html"]})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,66 @@
+import gzip
+import os
+import tempfile
+import unittest
+
+import compressfunctions
+from compressfunctions import compression_levels, precompress, MIN_SIZE
+
+
+class TestPrecompress(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.dest = os.path.join(self.tmp.name, "docs")
+        self.cache = os.path.join(self.tmp.name, "cache")
+        os.makedirs(os.path.join(self.dest, "blog"))
+        self.write("index.html", "<p>Hello</p>" * 100)
+        self.write("blog/index.html", "<p>Blog</p>" * 100)
+        self.write("index.css", "body { color: red; }" * 50)
+        self.write("tiny.html", "<p>Hi</p>")
+        self.write("image.png", "not really a png" * 100)
+        self.encodings = 2 if compressfunctions.brotli is not None else 1
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write(self, rel_path, content):
+        with open(os.path.join(self.dest, rel_path), "w") as output_file:
+            output_file.write(content)
+
+    def test_writes_gzip_next_to_files(self):
+        compressed, cached = precompress(self.dest, self.cache)
+        self.assertEqual((compressed, cached), (3 * self.encodings, 0))
+
+        with open(os.path.join(self.dest, "index.html.gz"), "rb") as gz_file:
+            self.assertEqual(gzip.decompress(gz_file.read()).decode(), "<p>Hello</p>" * 100)
+        self.assertTrue(os.path.exists(os.path.join(self.dest, "blog", "index.html.gz")))
+        self.assertTrue(os.path.exists(os.path.join(self.dest, "index.css.gz")))
+        # Too small to be worth it, and not a text format
+        self.assertFalse(os.path.exists(os.path.join(self.dest, "tiny.html.gz")))
+        self.assertFalse(os.path.exists(os.path.join(self.dest, "image.png.gz")))
+
+    def test_unchanged_content_comes_from_cache(self):
+        precompress(self.dest, self.cache)
+        os.remove(os.path.join(self.dest, "index.html.gz"))
+        self.write("blog/index.html", "<p>Changed</p>" * 100)
+
+        compressed, cached = precompress(self.dest, self.cache)
+        self.assertEqual((compressed, cached), (self.encodings, 2 * self.encodings))
+        self.assertTrue(os.path.exists(os.path.join(self.dest, "index.html.gz")))
+
+    def test_same_content_in_many_files(self):
+        # Compressed on several threads at once, into the same cache entry
+        for i in range(64):
+            self.write(f"copy{i}.html", "<p>Same</p>" * 10000)
+        precompress(self.dest, self.cache, workers=8)
+        for i in range(64):
+            self.assertTrue(os.path.exists(os.path.join(self.dest, f"copy{i}.html.gz")))
+        self.assertFalse([name for name in os.listdir(self.cache) if name.endswith(".tmp")])
+
+    def test_compression_levels(self):
+        self.assertEqual(compression_levels(MIN_SIZE), (9, 11))
+        self.assertEqual(compression_levels(100 * 1024 * 1024), (6, 5))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,142 @@
+import os
+import tempfile
+import threading
+import unittest
+
+from daemon import BuildServer, send_request
+from outputfunctions import archive_entries
+
+
+class TestBuildServer(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.cwd = os.getcwd()
+        # The daemon builds the site in the directory it runs from
+        os.chdir(self.tmp.name)
+        os.makedirs("static")
+        os.makedirs(os.path.join("content", "blog", "post"))
+        self.write("template.html", "<title>{{ Title }}</title>{{ Content }}")
+        self.write(os.path.join("content", "index.md"), "# Home\n\nRead [the post](/blog/post/).")
+        self.write(os.path.join("content", "blog", "post", "index.md"), "# Post\n\nText")
+
+        self.socket_path = os.path.join(self.tmp.name, "daemon.sock")
+        self.server = BuildServer(self.socket_path)
+        self.thread = threading.Thread(target=self.server.serve_until_stopped)
+        self.thread.start()
+
+    def tearDown(self):
+        send_request({"command": "stop"}, self.socket_path)
+        self.thread.join()
+        os.chdir(self.cwd)
+        self.tmp.cleanup()
+
+    def write(self, path, content):
+        with open(path, "w") as output_file:
+            output_file.write(content)
+
+    def build(self, args=None):
+        return send_request({"command": "build", "args": args or []}, self.socket_path)
+
+    def statuses(self, response):
+        return {page["url"]: page["status"] for page in response["pages"]}
+
+    def test_warm_builds(self):
+        response = self.build()
+        self.assertTrue(response["ok"], response.get("error"))
+        self.assertEqual(self.statuses(response), {"": "rendered", "blog/post/": "rendered"})
+        with open(os.path.join("docs", "index.html")) as page_file:
+            self.assertIn("<title>Home</title>", page_file.read())
+
+        # Nothing changed at all: the build is skipped
+        response = self.build()
+        self.assertTrue(response["skipped"])
+        self.assertEqual(response["build_hash"], self.build(["--force"])["build_hash"])
+        self.assertEqual(self.statuses(self.build(["--force"])), {"": "cached", "blog/post/": "cached"})
+
+        self.write(os.path.join("content", "blog", "post", "index.md"), "# Post\n\nEdited")
+        self.assertEqual(self.statuses(self.build()), {"": "cached", "blog/post/": "rendered"})
+
+        self.write("template.html", "<h1>{{ Title }}</h1>{{ Content }}")
+        self.assertEqual(self.statuses(self.build()), {"": "rendered", "blog/post/": "rendered"})
+        self.assertEqual(send_request({"command": "ping"}, self.socket_path), {"ok": True, "builds": 6})
+
+    def test_edited_output_is_rebuilt(self):
+        self.assertTrue(self.build()["ok"])
+        self.assertTrue(self.build()["skipped"])
+        self.write(os.path.join("docs", "index.html"), "edited by hand")
+        self.assertFalse(self.build()["skipped"])
+        with open(os.path.join("docs", "index.html")) as page_file:
+            self.assertIn("<title>Home</title>", page_file.read())
+        self.assertTrue(self.build()["skipped"])
+
+        os.remove(os.path.join("docs", "blog", "post", "index.html"))
+        self.assertFalse(self.build()["skipped"])
+
+    def test_failed_build(self):
+        self.write(os.path.join("content", "index.md"), "# Home\n\n[broken](/nowhere/)")
+        response = self.build()
+        self.assertFalse(response["ok"])
+        self.assertIn("/nowhere/", response["error"])
+        # The daemon is still there for the next request
+        self.assertTrue(send_request({"command": "ping"}, self.socket_path)["ok"])
+
+    def test_links_to_generated_files(self):
+        self.write(os.path.join("content", "index.md"), "# Home\n\n[Feed](/atom.xml) and [sitemap](/sitemap.xml)")
+        for args in [[], ["--archive", "site.tar"]]:
+            with self.subTest(args=args):
+                response = self.build(args + ["--force"])
+                self.assertTrue(response["ok"], response.get("error"))
+
+    def test_archive_build(self):
+        response = self.build(["--archive", "site.tar"])
+        self.assertTrue(response["ok"], response.get("error"))
+        self.assertFalse(os.path.exists(os.path.join("docs", "index.html")))
+        names = [name for name, _ in archive_entries("site.tar")]
+        self.assertIn("index.html", names)
+        self.assertIn("blog/post/index.html", names)
+        self.assertIn("sitemap.xml", names)
+
+        # A failed build keeps the previous archive
+        self.write(os.path.join("content", "index.md"), "# Home\n\n[broken](/nowhere/)")
+        self.assertFalse(self.build(["--archive", "site.tar"])["ok"])
+        self.assertEqual([name for name, _ in archive_entries("site.tar")], names)
+        self.assertEqual([name for name in os.listdir(".") if name.endswith(".tmp")], [])
+
+    def test_modification_times_dont_matter(self):
+        self.assertTrue(self.build()["ok"])
+        outputs = {}
+        for name in ["sitemap.xml", "atom.xml", os.path.join("archive", "index.html")]:
+            with open(os.path.join("docs", name)) as output_file:
+                outputs[name] = output_file.read()
+
+        # A fresh checkout: same sources, new modification times
+        for path in [os.path.join("content", "index.md"), os.path.join("content", "blog", "post", "index.md")]:
+            os.utime(path, (2000000000, 2000000000))
+        self.assertTrue(self.build()["skipped"])
+        self.assertTrue(self.build(["--force"])["ok"])
+        for name, content in outputs.items():
+            with open(os.path.join("docs", name)) as output_file:
+                self.assertEqual(output_file.read(), content)
+
+    def test_titles_are_escaped(self):
+        self.write(os.path.join("content", "blog", "post", "index.md"), "---\ntitle: Tom & Jerry\ntags: R&D\n---\nText")
+        self.assertTrue(self.build()["ok"])
+        with open(os.path.join("docs", "blog", "post", "index.html")) as page_file:
+            self.assertIn("<title>Tom &amp; Jerry</title>", page_file.read())
+        with open(os.path.join("docs", "tags", "rd", "index.html")) as listing_file:
+            self.assertIn("<title>Tagged “R&amp;D”</title>", listing_file.read())
+
+    def test_unknown_command(self):
+        self.assertFalse(send_request({"command": "explode"}, self.socket_path)["ok"])
+
+    def test_request_that_is_not_an_object(self):
+        for request in [[], "build", 1, None, {"command": "build", "args": "--force"}]:
+            with self.subTest(request=request):
+                response = send_request(request, self.socket_path)
+                self.assertFalse(response["ok"])
+                self.assertIn("Invalid", response["error"])
+        self.assertTrue(send_request({"command": "ping"}, self.socket_path)["ok"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,76 @@
+import os
+import tempfile
+import unittest
+
+from discoveryfunctions import Page, discover_pages, is_ignored, page_dest_dirs, DEFAULT_IGNORE
+
+
+class TestDiscoverPages(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.content = os.path.join(self.tmp.name, "content")
+        files = [
+            "index.md",
+            "blog/zeta/index.md",
+            "blog/alpha/index.md",
+            "blog/alpha/notes.txt",
+            "drafts/unfinished.md",
+            "_private/secret.md",
+            "blog/.index.md.swp",
+            "blog/backup.md~",
+        ]
+        for file in files:
+            path = os.path.join(self.content, file)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, "w") as f:
+                f.write("# Title")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_finds_markdown_pages_sorted(self):
+        pages = discover_pages(self.content, "docs")
+        self.assertEqual(
+            [page.rel_path for page in pages],
+            [os.path.join("blog", "alpha", "index.html"), os.path.join("blog", "zeta", "index.html"), "index.html"],
+        )
+
+    def test_page_paths(self):
+        pages = discover_pages(self.content, "docs")
+        self.assertEqual(
+            pages[-1],
+            Page(os.path.join(self.content, "index.md"), os.path.join("docs", "index.html"), "index.html"),
+        )
+
+    def test_custom_ignore(self):
+        pages = discover_pages(self.content, "docs", ignore=["blog"])
+        rel_paths = [page.rel_path for page in pages]
+        self.assertIn(os.path.join("drafts", "unfinished.html"), rel_paths)
+        self.assertIn(os.path.join("_private", "secret.html"), rel_paths)
+        self.assertNotIn(os.path.join("blog", "alpha", "index.html"), rel_paths)
+
+    def test_empty_dir(self):
+        empty = os.path.join(self.tmp.name, "empty")
+        os.mkdir(empty)
+        self.assertEqual(discover_pages(empty, "docs"), [])
+
+    def test_page_dest_dirs(self):
+        pages = discover_pages(self.content, "docs")
+        self.assertEqual(
+            page_dest_dirs(pages),
+            ["docs", os.path.join("docs", "blog", "alpha"), os.path.join("docs", "blog", "zeta")],
+        )
+
+
+class TestIsIgnored(unittest.TestCase):
+    def test_default_patterns(self):
+        self.assertTrue(is_ignored("drafts", DEFAULT_IGNORE))
+        self.assertTrue(is_ignored("_private", DEFAULT_IGNORE))
+        self.assertTrue(is_ignored(".index.md.swp", DEFAULT_IGNORE))
+        self.assertTrue(is_ignored("index.md~", DEFAULT_IGNORE))
+        self.assertFalse(is_ignored("index.md", DEFAULT_IGNORE))
+        self.assertFalse(is_ignored("blog", DEFAULT_IGNORE))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,82 @@
+import os
+import tempfile
+import unittest
+import xml.etree.ElementTree as ET
+
+from feedfunctions import AtomFeedWriter, SitemapWriter, w3c_datetime
+
+SITEMAP_NS = "{http://www.sitemaps.org/schemas/sitemap/0.9}"
+ATOM_NS = "{http://www.w3.org/2005/Atom}"
+
+
+class TestSitemapWriter(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.dest = self.tmp.name
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_single_sitemap(self):
+        sitemap = SitemapWriter(self.dest, "https://example.com/")
+        sitemap.add("https://example.com/", 0)
+        sitemap.add("https://example.com/blog/a&b/", 86400)
+        sitemap.add("https://example.com/undated/")
+        sitemap.close()
+
+        self.assertEqual(sorted(os.listdir(self.dest)), ["sitemap.xml"])
+        root = ET.parse(os.path.join(self.dest, "sitemap.xml")).getroot()
+        self.assertEqual(root.tag, f"{SITEMAP_NS}urlset")
+        self.assertEqual(
+            [url.find(f"{SITEMAP_NS}loc").text for url in root],
+            ["https://example.com/", "https://example.com/blog/a&b/", "https://example.com/undated/"],
+        )
+        self.assertEqual(root[1].find(f"{SITEMAP_NS}lastmod").text, "1970-01-02T00:00:00Z")
+        self.assertIsNone(root[2].find(f"{SITEMAP_NS}lastmod"))
+
+    def test_sharded_sitemap(self):
+        sitemap = SitemapWriter(self.dest, "https://example.com/", max_urls=2)
+        for i in range(5):
+            sitemap.add(f"https://example.com/{i}/", 0)
+        sitemap.close()
+
+        self.assertEqual(sorted(os.listdir(self.dest)), ["sitemap-1.xml", "sitemap-2.xml", "sitemap-3.xml", "sitemap.xml"])
+        index = ET.parse(os.path.join(self.dest, "sitemap.xml")).getroot()
+        self.assertEqual(index.tag, f"{SITEMAP_NS}sitemapindex")
+        self.assertEqual(
+            [entry.find(f"{SITEMAP_NS}loc").text for entry in index],
+            [f"https://example.com/sitemap-{i}.xml" for i in range(1, 4)],
+        )
+        last_shard = ET.parse(os.path.join(self.dest, "sitemap-3.xml")).getroot()
+        self.assertEqual(len(last_shard), 1)
+
+    def test_empty_sitemap(self):
+        sitemap = SitemapWriter(self.dest, "https://example.com/")
+        sitemap.close()
+        root = ET.parse(os.path.join(self.dest, "sitemap.xml")).getroot()
+        self.assertEqual(len(root), 0)
+
+
+class TestAtomFeedWriter(unittest.TestCase):
+    def test_feed(self):
+        with tempfile.TemporaryDirectory() as dest:
+            path = os.path.join(dest, "atom.xml")
+            feed = AtomFeedWriter(path, "https://example.com/atom.xml", "https://example.com/", "Fan <Club>")
+            feed.add('The "Majesty"', "https://example.com/blog/majesty/", 60)
+            feed.add("Undated", "https://example.com/blog/undated/")
+            feed.close()
+            self.assertEqual(os.listdir(dest), ["atom.xml"])
+
+            root = ET.parse(path).getroot()
+            self.assertEqual(root.find(f"{ATOM_NS}title").text, "Fan <Club>")
+            entries = root.findall(f"{ATOM_NS}entry")
+            self.assertEqual(len(entries), 2)
+            self.assertEqual(entries[0].find(f"{ATOM_NS}title").text, 'The "Majesty"')
+            self.assertEqual(entries[0].find(f"{ATOM_NS}updated").text, w3c_datetime(60))
+            self.assertEqual(entries[1].find(f"{ATOM_NS}updated").text, w3c_datetime(0))
+            # The newest entry's
+            self.assertEqual(root.find(f"{ATOM_NS}updated").text, w3c_datetime(60))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,85 @@
+import os
+import tempfile
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from unittest import mock
+
+import highlightfunctions
+from blockfunctions import markdown_to_html_node
+from highlightfunctions import Highlighter
+from pageindex import PageIndex
+
+MARKDOWN = """```python
+print("Tom")
+```
+
+```nosuchlanguage
+print("Bombadil")
+```
+
+```
+no language
+```"""
+
+
+@unittest.skipIf(highlightfunctions.pygments is None, "Pygments is not installed")
+class TestHighlighter(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.cache_dir = os.path.join(self.tmp.name, "highlight")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def render(self, highlighter, markdown=MARKDOWN):
+        page_index = PageIndex()
+        node = markdown_to_html_node(markdown, page_index)
+        highlighter.highlight(page_index.code_blocks)
+        return node.to_html()
+
+    def test_highlight(self):
+        highlighter = Highlighter(self.cache_dir)
+        html = self.render(highlighter)
+        self.assertIn('<pre><code class="language-python"><span style=', html)
+        # Unknown and missing languages stay plain
+        self.assertIn('<pre><code class="language-nosuchlanguage">print("Bombadil")\n</code></pre>', html)
+        self.assertIn("<pre><code>\nno language\n</code></pre>", html)
+        self.assertEqual((highlighter.hits, highlighter.misses), (0, 2))
+
+    def test_cache(self):
+        first = self.render(Highlighter(self.cache_dir))
+        highlighter = Highlighter(self.cache_dir)
+        with mock.patch("highlightfunctions.highlight_code") as highlight_code:
+            self.assertEqual(self.render(highlighter), first)
+            highlight_code.assert_not_called()
+        self.assertEqual((highlighter.hits, highlighter.misses), (2, 0))
+        self.assertEqual(highlighter.hit_rate(), 1.0)
+
+        # Another theme is another cache entry
+        highlighter = Highlighter(self.cache_dir, theme="monokai")
+        self.assertNotEqual(self.render(highlighter), first)
+        self.assertEqual(highlighter.misses, 2)
+
+    def test_pool(self):
+        markdown = "\n\n".join(f"```python\nprint({i})\n```" for i in range(highlightfunctions.POOL_MIN_BLOCKS))
+        with ThreadPoolExecutor() as executor:
+            highlighter = Highlighter(self.cache_dir, executor=executor)
+            with mock.patch.object(executor, "map", wraps=executor.map) as pool_map:
+                html = self.render(highlighter, markdown)
+                pool_map.assert_called_once()
+        self.assertEqual(html.count('<code class="language-python"><span'), highlightfunctions.POOL_MIN_BLOCKS)
+
+
+class TestWithoutPygments(unittest.TestCase):
+    def test_code_is_left_alone(self):
+        with tempfile.TemporaryDirectory() as cache_dir, mock.patch("highlightfunctions.pygments", None):
+            highlighter = Highlighter(cache_dir)
+            page_index = PageIndex()
+            node = markdown_to_html_node("```python\nx = 1\n```", page_index)
+            highlighter.highlight(page_index.code_blocks)
+            self.assertEqual(node.to_html(), '<div><pre><code class="language-python">x = 1\n</code></pre></div>')
+            self.assertIsNone(highlighter.fingerprint())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,6 +1,6 @@
 import unittest
 
-from htmlnode import HTMLNode, LeafNode, ParentNode
+from htmlnode import HTMLNode, LeafNode, ParentNode, RawNode
 
 class TestHTMLNode(unittest.TestCase):
     def test_props_to_html(self):
@@ -74,7 +74,16 @@ class TestLeafNode(unittest.TestCase):
 
     def test_leaf_special_chars(self):
         node = LeafNode("p", "Text with <tags> & ampersands")
-        self.assertEqual(node.to_html(), "<p>Text with <tags> & ampersands</p>")
+        self.assertEqual(node.to_html(), "<p>Text with &lt;tags&gt; &amp; ampersands</p>")
+
+    def test_leaf_quotes_not_escaped(self):
+        node = LeafNode(None, 'He said "hi" and \'bye\'')
+        self.assertEqual(node.to_html(), 'He said "hi" and \'bye\'')
+
+    def test_leaf_value_unchanged(self):
+        node = LeafNode("code", "a < b")
+        node.to_html()
+        self.assertEqual(node.value, "a < b")
 
     def test_leaf_multiple_props(self):
         node = LeafNode("input", "", {"type": "text", "id": "username", "placeholder": "Enter username"})
@@ -94,6 +103,10 @@ class TestParentNode(unittest.TestCase):
         parent_node = ParentNode("div", [child_node])
         self.assertEqual(parent_node.to_html(), "<div><span>child</span></div>")
 
+    def test_to_html_without_end_tag(self):
+        parent_node = ParentNode("p", [LeafNode("b", "Tom")])
+        self.assertEqual(parent_node.to_html(True, end_tag=False), "<p><b>Tom</b>")
+
     def test_to_html_with_grandchildren(self):
         grandchild_node = LeafNode("b", "grandchild")
         child_node = ParentNode("span", [grandchild_node])
@@ -157,7 +170,13 @@ class TestParentNode(unittest.TestCase):
             LeafNode("input", "", {"type": "text", "placeholder": "Enter name"})
         ], {"method": "post", "action": "/submit"})
         self.assertEqual(parent.to_html(), 
-                        '<form method="post" action="/submit"><input type="text" placeholder="Enter name"></input></form>')
+                        '<form action="/submit" method="post"><input placeholder="Enter name" type="text"></input></form>')
+
+    def test_props_order_does_not_matter(self):
+        first = LeafNode("img", "", {"src": "/a.png", "alt": "A", "width": "10"})
+        second = LeafNode("img", "", {"width": "10", "alt": "A", "src": "/a.png"})
+        self.assertEqual(first.to_html(), second.to_html())
+        self.assertEqual(first.to_html(), '<img alt="A" src="/a.png" width="10"></img>')
         
     def test_deeply_nested_complex_structure(self):
         html = ParentNode("html", [
@@ -194,7 +213,14 @@ class TestParentNode(unittest.TestCase):
 
     def test_special_characters_in_props(self):
         parent = ParentNode("div", [LeafNode("p", "Test")], {"data-test": "value&<>"})
-        self.assertEqual(parent.to_html(), '<div data-test="value&<>"><p>Test</p></div>')
+        self.assertEqual(parent.to_html(), '<div data-test="value&amp;&lt;&gt;"><p>Test</p></div>')
+
+    def test_quotes_in_props(self):
+        node = LeafNode("a", "Link", {"href": '/search?q="tom"&page=2'})
+        self.assertEqual(node.to_html(), '<a href="/search?q=&quot;tom&quot;&amp;page=2">Link</a>')
+        self.assertEqual(node.to_html(minify=True), '<a href="/search?q=&quot;tom&quot;&amp;page=2">Link</a>')
+        node = LeafNode("a", "Link", {"href": "/tom&bombadil"})
+        self.assertEqual(node.to_html(minify=True), "<a href=/tom&amp;bombadil>Link</a>")
 
     def test_parent_node_without_children_list(self):
         with self.assertRaises(TypeError):
@@ -221,6 +247,60 @@ class TestParentNode(unittest.TestCase):
         # Test that ParentNode is a subclass of HTMLNode
         self.assertTrue(issubclass(ParentNode, HTMLNode))
 
+
+    def test_nesting_deeper_than_recursion_limit(self):
+        node = LeafNode("span", "Deep")
+        for i in range(10000):
+            node = ParentNode("div", [node])
+        html = node.to_html()
+        self.assertEqual(html, "<div>" * 10000 + "<span>Deep</span>" + "</div>" * 10000)
+
+
+
+class TestRawNode(unittest.TestCase):
+    def test_not_escaped(self):
+        node = ParentNode("code", [RawNode('<span style="color: #008000">print</span>(1 &lt; 2)')])
+        self.assertEqual(node.to_html(), '<code><span style="color: #008000">print</span>(1 &lt; 2)</code>')
+
+    def test_untouched_when_minified(self):
+        node = ParentNode("pre", [ParentNode("code", [RawNode("<span>a</span>  b\n")])])
+        self.assertEqual(node.to_html(minify=True), "<pre><code><span>a</span>  b\n</code></pre>")
+
+
+class TestMinifiedHTML(unittest.TestCase):
+    def test_unquoted_attributes(self):
+        node = LeafNode("a", "link", {"href": "/blog/tom", "title": "Tom Bombadil", "data-empty": ""})
+        self.assertEqual(node.to_html(minify=True), '<a data-empty="" href=/blog/tom title="Tom Bombadil">link</a>')
+
+    def test_void_elements(self):
+        node = LeafNode("img", "", {"src": "/a.png", "alt": "An image"})
+        self.assertEqual(node.to_html(minify=True), '<img alt="An image" src=/a.png>')
+
+    def test_optional_end_tags(self):
+        node = ParentNode("div", [
+            ParentNode("p", [LeafNode(None, "First")]),
+            ParentNode("ul", [LeafNode("li", "One"), ParentNode("li", [LeafNode("b", "Two")])]),
+            ParentNode("p", [LeafNode(None, "Before text")]),
+            LeafNode(None, "loose text"),
+            LeafNode("p", "Last"),
+        ])
+        self.assertEqual(
+            node.to_html(minify=True),
+            "<div><p>First<ul><li>One<li><b>Two</b></ul><p>Before text</p>loose text<p>Last</div>",
+        )
+
+    def test_p_end_tag_kept_inside_links(self):
+        node = ParentNode("a", [LeafNode("p", "Inside a link")], {"href": "/"})
+        self.assertEqual(node.to_html(minify=True), "<a href=/><p>Inside a link</p></a>")
+
+    def test_code_untouched(self):
+        node = ParentNode("pre", [LeafNode("code", "def f():\n    return  1\n")])
+        self.assertEqual(node.to_html(minify=True), "<pre><code>def f():\n    return  1\n</code></pre>")
+
+    def test_default_is_not_minified(self):
+        node = ParentNode("ul", [LeafNode("li", "One", {"class": "item"})])
+        self.assertEqual(node.to_html(), '<ul><li class="item">One</li></ul>')
+
     
 if __name__ == "__main__":
     unittest.main()
\ No newline at end of file
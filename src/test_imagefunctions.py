@@ -0,0 +1,122 @@
+import os
+import struct
+import tempfile
+import unittest
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from unittest import mock
+
+import imagefunctions
+from imagefunctions import ImageInfo, png_size, process_images
+from outputfunctions import ArchiveOutput
+
+
+def write_png(path, width, height):
+    # Smallest valid RGB PNG of the given size (all black), no Pillow needed.
+    def chunk(kind, data):
+        return struct.pack(">I", len(data)) + kind + data + struct.pack(">I", zlib.crc32(kind + data))
+
+    raw = b"".join(b"\x00" + b"\x00" * (width * 3) for _ in range(height))
+    with open(path, "wb") as png_file:
+        png_file.write(b"\x89PNG\r\n\x1a\n")
+        png_file.write(chunk(b"IHDR", struct.pack(">IIBBBBB", width, height, 8, 2, 0, 0, 0)))
+        png_file.write(chunk(b"IDAT", zlib.compress(raw)))
+        png_file.write(chunk(b"IEND", b""))
+
+
+class TestImageInfo(unittest.TestCase):
+    def test_props(self):
+        info = ImageInfo(1000, 500, [("images/a-480w.webp", 480), ("images/a-1000w.webp", 1000)])
+        self.assertEqual(
+            info.props("/site/"),
+            {"width": "1000", "height": "500", "srcset": "/site/images/a-480w.webp 480w, /site/images/a-1000w.webp 1000w"},
+        )
+
+    def test_props_without_variants(self):
+        self.assertEqual(ImageInfo(10, 20).props("/"), {"width": "10", "height": "20"})
+
+
+class TestProcessImages(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.static = os.path.join(self.tmp.name, "static")
+        self.dest = os.path.join(self.tmp.name, "docs")
+        self.cache = os.path.join(self.tmp.name, "cache")
+        os.makedirs(os.path.join(self.static, "images"))
+        write_png(os.path.join(self.static, "images", "wide.png"), 1000, 10)
+        with open(os.path.join(self.static, "index.css"), "w") as css_file:
+            css_file.write("body {}")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_png_size(self):
+        self.assertEqual(png_size(os.path.join(self.static, "images", "wide.png")), (1000, 10))
+        self.assertIsNone(png_size(os.path.join(self.static, "index.css")))
+
+    def test_without_pillow(self):
+        with mock.patch.object(imagefunctions, "Image", None):
+            manifest = process_images(self.static, self.dest, self.cache)
+        self.assertEqual(manifest, {"/images/wide.png": ImageInfo(1000, 10)})
+
+    @unittest.skipIf(imagefunctions.Image is None, "Pillow is not installed")
+    def test_variants_are_cached(self):
+        manifest = process_images(self.static, self.dest, self.cache, workers=1)
+        expected = ImageInfo(1000, 10, [(os.path.join("images", "wide.png-480w.webp"), 480), (os.path.join("images", "wide.png-960w.webp"), 960), (os.path.join("images", "wide.png-1000w.webp"), 1000)])
+        self.assertEqual(manifest, {"/images/wide.png": expected})
+        self.assertTrue(os.path.exists(os.path.join(self.dest, "images", "wide.png-480w.webp")))
+
+        # Second run: nothing left to process, the pool is never started
+        with mock.patch.object(imagefunctions, "ProcessPoolExecutor") as executor:
+            self.assertEqual(process_images(self.static, self.dest, self.cache), {"/images/wide.png": expected})
+        executor.assert_not_called()
+
+    @unittest.skipIf(imagefunctions.Image is None, "Pillow is not installed")
+    def test_same_stem(self):
+        imagefunctions.Image.new("RGB", (1000, 10), "red").save(os.path.join(self.static, "images", "wide.jpg"), "JPEG")
+        manifest = process_images(self.static, self.dest, self.cache, workers=1)
+        png_variants = [path for path, _ in manifest["/images/wide.png"].variants]
+        jpg_variants = [path for path, _ in manifest["/images/wide.jpg"].variants]
+        self.assertFalse(set(png_variants) & set(jpg_variants))
+        for path in png_variants + jpg_variants:
+            self.assertTrue(os.path.exists(os.path.join(self.dest, path)))
+
+        # Archives refuse to write the same entry twice
+        output = ArchiveOutput(os.path.join(self.tmp.name, "site.tar"), self.dest)
+        process_images(self.static, self.dest, self.cache, output=output)
+        output.close()
+
+    @unittest.skipIf(imagefunctions.Image is None, "Pillow is not installed")
+    def test_biggest_first(self):
+        write_png(os.path.join(self.static, "images", "small.png"), 10, 10)
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            with mock.patch.object(executor, "submit", wraps=executor.submit) as submit:
+                process_images(self.static, self.dest, self.cache, executor=executor)
+        self.assertEqual([os.path.basename(call.args[2]) for call in submit.call_args_list], ["wide.png", "small.png"])
+        # Timed for the next builds
+        stats = imagefunctions.JobStats(os.path.join(self.cache, imagefunctions.TIMINGS_NAME))
+        self.assertEqual(list(stats.entries), ["png"])
+        self.assertEqual(stats.entries["png"][0], 1000 * 10 + 10 * 10)
+
+    @unittest.skipIf(imagefunctions.Image is None, "Pillow is not installed")
+    def test_timings_change_the_order(self):
+        def fake_timing(function, *args):
+            # JPEGs take ages here
+            function(*args)
+            return None, 10.0 if args[0].endswith(".jpg") else 0.01
+
+        jpeg_path = os.path.join(self.static, "images", "photo.jpg")
+        with mock.patch.object(imagefunctions, "run_timed", fake_timing):
+            for color, expected in [("red", ["wide.png", "photo.jpg"]), ("blue", ["photo.jpg", "wide.png"])]:
+                # New content every time, so nothing comes from the cache
+                imagefunctions.Image.new("RGB", (20, 20), color).save(jpeg_path, "JPEG")
+                write_png(os.path.join(self.static, "images", "wide.png"), 1000, 10 if color == "red" else 11)
+                with ThreadPoolExecutor(max_workers=1) as executor:
+                    with mock.patch.object(executor, "submit", wraps=executor.submit) as submit:
+                        process_images(self.static, self.dest, self.cache, executor=executor)
+                # First by size, then by what the first build measured
+                self.assertEqual([os.path.basename(call.args[2]) for call in submit.call_args_list], expected)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,6 +1,6 @@
 import unittest
 
-from inlinefunctions import text_node_to_html_node, split_nodes_delimiter, extract_markdown_images, extract_markdown_links, split_nodes_image, split_nodes_link, text_to_textnodes
+from inlinefunctions import text_node_to_html_node, split_nodes_delimiter, extract_markdown_images, extract_markdown_links, split_nodes_image, split_nodes_link, text_to_textnodes, text_to_html_nodes, default_inline_registry
 from textnode import TextNode, TextType
 
 
@@ -591,7 +591,124 @@ class TestTextToTextNodes(unittest.TestCase):
         )
 
 
+class TestTextToHTMLNodes(unittest.TestCase):
+    def to_html(self, text):
+        return "".join(node.to_html() for node in text_to_html_nodes(text))
+
+    def test_flat_text(self):
+        self.assertEqual(
+            self.to_html("Some **bold**, _italic_, `code`, a [link](https://boot.dev) and ![img](/a.png)"),
+            'Some <b>bold</b>, <i>italic</i>, <code>code</code>, a <a href="https://boot.dev">link</a> and <img alt="img" src="/a.png"></img>',
+        )
+
+    def test_bold_inside_italic(self):
+        self.assertEqual(self.to_html("_italic with **bold** inside_"), "<i>italic with <b>bold</b> inside</i>")
+
+    def test_italic_inside_bold(self):
+        self.assertEqual(self.to_html("**bold with _italic_ inside**"), "<b>bold with <i>italic</i> inside</b>")
+
+    def test_link_inside_bold(self):
+        self.assertEqual(self.to_html("**see [this](/a_b_c)**"), '<b>see <a href="/a_b_c">this</a></b>')
+
+    def test_code_is_literal(self):
+        self.assertEqual(self.to_html("`**not _bold_**`"), "<code>**not _bold_**</code>")
+
+    def test_plain_emphasis_stays_a_leaf(self):
+        nodes = text_to_html_nodes("**bold**")
+        self.assertEqual(len(nodes), 1)
+        self.assertEqual(nodes[0].tag, "b")
+        self.assertEqual(nodes[0].value, "bold")
+
+    def test_empty_delimiters(self):
+        self.assertEqual(self.to_html("**** _ _"), "<b></b> <i> </i>")
+
+    def test_unclosed_delimiters(self):
+        with self.assertRaises(Exception) as context:
+            text_to_html_nodes("**I forgot to close the delimiter")
+        self.assertEqual(str(context.exception), "Closing delimiter ** not found")
+
+        with self.assertRaises(Exception):
+            text_to_html_nodes("**bold _italic** text_")
+
+        with self.assertRaises(Exception):
+            text_to_html_nodes("`no closing backtick")
+
+    def test_deep_nesting(self):
+        text = "**_" * 5000 + "deep" + "_**" * 5000
+        html = self.to_html(text)
+        self.assertTrue(html.startswith("<b><i><b><i>"))
+        self.assertEqual(html.count("<b>"), 5000)
+        self.assertEqual(html.count("<i>"), 5000)
+
+    def test_on_leaf(self):
+        leaves = []
+        text_to_html_nodes("A **[link](/x)** and ![img](/y.png)", lambda text_node, html_node: leaves.append(text_node))
+        self.assertEqual(
+            leaves,
+            [
+                TextNode("A ", TextType.NORMAL),
+                TextNode("link", TextType.LINK, "/x"),
+                TextNode(" and ", TextType.NORMAL),
+                TextNode("img", TextType.IMAGE, "/y.png"),
+            ],
+        )
+
+
+class TestInlineRegistry(unittest.TestCase):
+    def to_html(self, text, registry=None):
+        if registry is None:
+            return "".join(node.to_html() for node in text_to_html_nodes(text))
+        return "".join(node.to_html() for node in text_to_html_nodes(text, registry=registry))
+
+    def test_strikethrough(self):
+        self.assertEqual(self.to_html("~~gone~~ and ~~**bold** gone~~"), "<del>gone</del> and <del><b>bold</b> gone</del>")
+
+    def test_unclosed_strikethrough_is_text(self):
+        self.assertEqual(self.to_html("costs ~~5 dollars"), "costs ~~5 dollars")
+        self.assertEqual(self.to_html("~~gone~~ and **~~bold**"), "<del>gone</del> and <b>~~bold</b>")
+        leaves = []
+        text_to_html_nodes("a ~~b **c**", lambda text_node, html_node: leaves.append(text_node.text))
+        self.assertEqual(leaves, ["a ~~b ", "c"])
+        # The older delimiters still have to be closed
+        with self.assertRaises(Exception):
+            text_to_html_nodes("~~a~~ **b")
+
+    def test_autolink(self):
+        leaves = []
+        text_to_html_nodes("See <https://boot.dev> or a < b", lambda text_node, html_node: leaves.append(text_node))
+        self.assertIn(TextNode("https://boot.dev", TextType.LINK, "https://boot.dev"), leaves)
+        self.assertEqual(self.to_html("See <https://boot.dev> or a < b"), 'See <a href="https://boot.dev">https://boot.dev</a> or a &lt; b')
+
+    def test_plugins(self):
+        def parse_mention(text, start):
+            end = start + 1
+            while end < len(text) and text[end].isalnum():
+                end += 1
+            if end == start + 1:
+                return None
+            return TextNode(text[start + 1:end], TextType.LINK, f"/users/{text[start + 1:end]}/"), end
+
+        registry = default_inline_registry()
+        registry.add_leaf("@", parse_mention)
+        registry.add_delimiter("==", "mark", TextType.NORMAL)
+        self.assertEqual(
+            self.to_html("==hi== @frodo, email me @ home", registry),
+            '<mark>hi</mark> <a href="/users/frodo/">frodo</a>, email me @ home',
+        )
+        # One dispatch table entry per first character
+        self.assertEqual(sorted(registry.dispatch), sorted("![`<*_~@="))
+        # The default registry doesn't know about them
+        self.assertEqual(self.to_html("==hi== @frodo"), "==hi== @frodo")
+
+    def test_longest_trigger_first(self):
+        registry = default_inline_registry()
+        registry.add_delimiter("*", "em", TextType.NORMAL)
+        self.assertEqual(self.to_html("**bold** *em*", registry), "<b>bold</b> <em>em</em>")
+
+    def test_duplicate_trigger(self):
+        with self.assertRaises(ValueError):
+            default_inline_registry().add_delimiter("**", "strong", TextType.BOLD)
 
 
 if __name__ == "__main__":
-    unittest.main()
\ No newline at end of file
+    unittest.main()
@@ -0,0 +1,62 @@
+import os
+import tempfile
+import unittest
+
+from jobscheduler import JobStats, longest_first, run_timed
+
+
+class TestJobStats(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "stats", "timings.json")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_default_rate(self):
+        self.assertEqual(JobStats(self.path).estimate("png", 1000, 0.5), 500)
+
+    def test_estimates_from_previous_builds(self):
+        stats = JobStats(self.path)
+        stats.record("png", 100, 1.0)
+        stats.record("png", 100, 1.0)
+        stats.record("jpeg", 200, 8.0)
+        stats.save()
+
+        stats = JobStats(self.path)
+        # The rate of its kind...
+        self.assertEqual(stats.estimate("png", 100, 0.5), 1.0)
+        self.assertEqual(stats.estimate("jpeg", 100, 0.5), 4.0)
+        # ...or of everything measured so far for a new kind
+        self.assertEqual(stats.estimate("webp", 100, 0.5), 2.5)
+
+    def test_latest_build_of_every_kind_is_kept(self):
+        stats = JobStats(self.path)
+        stats.record("png", 100, 1.0)
+        stats.record("jpeg", 100, 1.0)
+        stats.save()
+        stats = JobStats(self.path)
+        stats.record("png", 100, 3.0)
+        stats.save()
+        self.assertEqual(JobStats(self.path).entries, {"jpeg": [100, 1.0], "png": [100, 3.0]})
+
+    def test_corrupt_file(self):
+        os.makedirs(os.path.dirname(self.path))
+        with open(self.path, "w") as stats_file:
+            stats_file.write("{not json")
+        self.assertEqual(JobStats(self.path).estimate("png", 10, 0.5), 5)
+
+
+class TestLongestFirst(unittest.TestCase):
+    def test_order(self):
+        self.assertEqual(longest_first([1.0, 5.0, 3.0, 5.0]), [1, 3, 2, 0])
+        self.assertEqual(longest_first([]), [])
+
+    def test_run_timed(self):
+        result, seconds = run_timed(max, 1, 2)
+        self.assertEqual(result, 2)
+        self.assertGreaterEqual(seconds, 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,59 @@
+import unittest
+
+from blockfunctions import markdown_to_html_node
+from linkcheck import BrokenLink, LinkChecker, candidate_paths, is_internal
+from pageindex import PageIndex
+
+
+class TestIsInternal(unittest.TestCase):
+    def test_internal(self):
+        self.assertTrue(is_internal("/blog/tom"))
+        self.assertTrue(is_internal("images/tom.png"))
+        self.assertTrue(is_internal("../contact"))
+
+    def test_external(self):
+        self.assertFalse(is_internal("https://www.boot.dev"))
+        self.assertFalse(is_internal("mailto:someone@example.com"))
+        self.assertFalse(is_internal("//cdn.example.com/a.js"))
+        self.assertFalse(is_internal("#introduction"))
+        self.assertFalse(is_internal(""))
+
+
+class TestCandidatePaths(unittest.TestCase):
+    def test_absolute(self):
+        self.assertEqual(candidate_paths("", "/blog/tom"), ["blog/tom", "blog/tom/index.html", "blog/tom.html"])
+        self.assertEqual(candidate_paths("blog/tom/", "/"), ["index.html"])
+        self.assertEqual(candidate_paths("", "/contact/#form"), ["contact/index.html"])
+
+    def test_relative(self):
+        self.assertEqual(candidate_paths("blog/tom/", "../../images/tom.png?v=2")[0], "images/tom.png")
+        self.assertEqual(candidate_paths("blog/tom/", "notes")[0], "blog/tom/notes")
+
+
+class TestLinkChecker(unittest.TestCase):
+    def test_check(self):
+        md = """
+    # Title
+
+    [Home](/), [Tom](/blog/tom), [missing](/blog/nope) and [external](https://www.boot.dev)
+
+    - ![Tom](/images/tom.png)
+    - ![Gone](/images/gone.png)
+    """
+        page_index = PageIndex()
+        markdown_to_html_node(md, page_index)
+
+        checker = LinkChecker()
+        checker.add_page("contact/", page_index)
+        broken = checker.check({"index.html", "blog/tom/index.html", "contact/index.html", "images/tom.png"})
+        self.assertEqual(
+            broken,
+            [BrokenLink("contact/", "/blog/nope", "link"), BrokenLink("contact/", "/images/gone.png", "image")],
+        )
+
+    def test_no_references(self):
+        self.assertEqual(LinkChecker().check(set()), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
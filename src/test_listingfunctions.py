@@ -0,0 +1,100 @@
+import os
+import tempfile
+import unittest
+
+from listingfunctions import build_listings, paginate, write_listings
+
+
+def post(n, tags=()):
+    return {"url": f"blog/post-{n}/", "title": f"Post {n}", "date": f"2024-01-{n:02d}", "tags": list(tags)}
+
+
+class TestPaginate(unittest.TestCase):
+    def test_slices(self):
+        entries = [post(n) for n in range(5, 0, -1)]
+        listings = paginate("archive", "Archive", entries, 2)
+        self.assertEqual([len(listing.entries) for listing in listings], [1, 2, 2])
+        self.assertEqual([listing.rel_path() for listing in listings], ["archive/index.html", "archive/page/2/index.html", "archive/page/1/index.html"])
+        self.assertEqual(listings[0].entries, [entries[0]])
+        self.assertEqual(listings[2].entries, entries[3:])
+
+    def test_empty_listing(self):
+        listings = paginate("archive", "Archive", [], 10)
+        self.assertEqual(len(listings), 1)
+        self.assertEqual(listings[0].entries, [])
+        self.assertEqual(listings[0].rel_path(), "archive/index.html")
+
+    def test_html(self):
+        listings = paginate("archive", "Archive", [post(3), post(2), post(1)], 1)
+        html = listings[1].html_node().to_html()
+        self.assertIn('<a href="/blog/post-2/">Post 2</a>', html)
+        self.assertIn('<a href="/archive/" rel="prev">Newer</a>', html)
+        self.assertIn('<a href="/archive/page/1/" rel="next">Older</a>', html)
+        self.assertIn("Page 2", html)
+
+    def test_undated_entry(self):
+        undated = dict(post(1), date="")
+        html = paginate("archive", "Archive", [post(2), undated], 10)[0].html_node().to_html()
+        self.assertIn('<li><time datetime="2024-01-02">2024-01-02</time> <a href="/blog/post-2/">Post 2</a></li>', html)
+        self.assertIn('<li><a href="/blog/post-1/">Post 1</a></li>', html)
+
+
+class TestBuildListings(unittest.TestCase):
+    def test_tags_keep_order(self):
+        posts = [post(3, ["elves"]), post(2, ["Dwarves"]), post(1, ["elves", "Dwarves"])]
+        listings = build_listings(posts, 10)
+        self.assertEqual([listing.rel_dir for listing in listings], ["archive", "tags/dwarves", "tags/elves"])
+        self.assertEqual([entry["url"] for entry in listings[2].entries], ["blog/post-3/", "blog/post-1/"])
+
+
+class TestWriteListings(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.dest = os.path.join(self.tmp.name, "docs")
+        self.cache = os.path.join(self.tmp.name, "cache")
+        self.rendered_titles = []
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def render(self, title, html_node):
+        self.rendered_titles.append(title)
+        return html_node.to_html()
+
+    def test_only_changed_pages_are_rendered(self):
+        posts = [post(n) for n in range(5, 0, -1)]
+        self.assertEqual(write_listings(paginate("archive", "Archive", posts, 2), self.dest, self.cache, self.render, "ctx"), (3, 0))
+        self.assertEqual(write_listings(paginate("archive", "Archive", posts, 2), self.dest, self.cache, self.render, "ctx"), (0, 3))
+
+        # The new post only goes to the front page, the older pages keep their entries and links
+        posts = [post(6)] + posts
+        rendered, reused = write_listings(paginate("archive", "Archive", posts, 2), self.dest, self.cache, self.render, "ctx")
+        self.assertEqual((rendered, reused), (1, 2))
+
+        # The front page is full, the next post opens a new one: the old front page moves to page/3 and
+        # page/2 gets its "Newer" link updated, page/1 stays the same
+        posts = [post(7)] + posts
+        rendered, reused = write_listings(paginate("archive", "Archive", posts, 2), self.dest, self.cache, self.render, "ctx")
+        self.assertEqual((rendered, reused), (3, 1))
+        with open(os.path.join(self.dest, "archive", "page", "3", "index.html")) as listing_file:
+            self.assertIn("Post 6", listing_file.read())
+        self.assertEqual(len(os.listdir(self.cache)), 4)
+
+    def test_unchanged_tag_pages_are_reused(self):
+        posts = [post(2, ["elves"]), post(1, ["dwarves"])]
+        write_listings(build_listings(posts, 10), self.dest, self.cache, self.render, "ctx")
+        posts = [post(3, ["elves"])] + posts
+        rendered, reused = write_listings(build_listings(posts, 10), self.dest, self.cache, self.render, "ctx")
+        # The archive and the elves tag change, dwarves doesn't
+        self.assertEqual((rendered, reused), (2, 1))
+        with open(os.path.join(self.dest, "tags", "dwarves", "index.html")) as listing_file:
+            self.assertIn("Post 1", listing_file.read())
+
+    def test_context_change_renders_everything(self):
+        posts = [post(1)]
+        write_listings(build_listings(posts, 10), self.dest, self.cache, self.render, "old template")
+        self.assertEqual(write_listings(build_listings(posts, 10), self.dest, self.cache, self.render, "new template"), (1, 0))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,50 @@
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+import main
+from main import generate_page
+from memorybudget import MemoryBudget
+
+
+class TestGeneratePage(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.template_path = os.path.join(self.tmp.name, "template.html")
+        self.source_path = os.path.join(self.tmp.name, "page.md")
+        self.dest_path = os.path.join(self.tmp.name, "index.html")
+        with open(self.template_path, "w") as template_file:
+            template_file.write("<title>{{ Title }}</title>{{ Content }}")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def render(self, markdown, large_file=False, memory_budget=None):
+        with open(self.source_path, "w") as source_file:
+            source_file.write(markdown)
+        # Every source counts as a big one with a threshold of 0
+        threshold = 0 if large_file else main.MMAP_THRESHOLD
+        with mock.patch.object(main, "MMAP_THRESHOLD", threshold), mock.patch("builtins.print"):
+            page_index = generate_page(self.source_path, self.template_path, self.dest_path, "/", memory_budget=memory_budget)
+        with open(self.dest_path, "r") as page_file:
+            return page_index.title, page_file.read()
+
+    def test_front_matter_title(self):
+        # A budget that's already used up streams the page
+        for large_file, memory_budget in [(False, None), (True, None), (False, MemoryBudget(0)), (True, MemoryBudget(0))]:
+            with self.subTest(large_file=large_file, streamed=memory_budget is not None):
+                self.assertEqual(self.render("---\ntitle: Tom\n---\nNo heading", large_file, memory_budget)[0], "Tom")
+                self.assertEqual(self.render("---\ntitle: Tom\n---\n# Bombadil", large_file, memory_budget)[0], "Tom")
+                self.assertEqual(self.render("# Bombadil", large_file, memory_budget)[0], "Bombadil")
+
+    def test_title_is_escaped(self):
+        for large_file, memory_budget in [(False, None), (True, None), (False, MemoryBudget(0))]:
+            with self.subTest(large_file=large_file, streamed=memory_budget is not None):
+                title, html = self.render("# Tom & Jerry </title> <b>", large_file, memory_budget)
+                self.assertEqual(title, "Tom & Jerry </title> <b>")
+                self.assertTrue(html.startswith("<title>Tom &amp; Jerry &lt;/title&gt; &lt;b&gt;</title>"))
+
+
+if __name__ == "__main__":
+    unittest.main()
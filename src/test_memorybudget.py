@@ -0,0 +1,111 @@
+import os
+import tempfile
+import threading
+import time
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from unittest import mock
+
+import main
+from main import generate_page, rebase_chunks, rebase_urls
+from memorybudget import PAGE_MEMORY_FACTOR, MemoryBudget, current_rss, run_within_budget
+
+MIB = 1024 * 1024
+
+
+class TestMemoryBudget(unittest.TestCase):
+    @unittest.skipIf(current_rss() is None, "no /proc on this platform")
+    def test_current_rss(self):
+        self.assertGreater(current_rss(), MIB)
+
+    def test_should_stream(self):
+        with mock.patch("memorybudget.current_rss", return_value=100 * MIB):
+            budget = MemoryBudget(200 * MIB)
+            self.assertFalse(budget.should_stream(MIB))
+            self.assertTrue(budget.should_stream(100 * MIB // PAGE_MEMORY_FACTOR + 1))
+            # Workers count too
+            budget.record_worker(1234, 99 * MIB)
+            self.assertTrue(budget.should_stream(MIB))
+            self.assertEqual(budget.peak, 199 * MIB)
+
+
+class TestRunWithinBudget(unittest.TestCase):
+    def run_jobs(self, estimates):
+        lock = threading.Lock()
+        running = [0]
+        most_running = [0]
+
+        def job(value):
+            with lock:
+                running[0] += 1
+                most_running[0] = max(most_running[0], running[0])
+            time.sleep(0.02)
+            with lock:
+                running[0] -= 1
+            return value * 2
+
+        with mock.patch("memorybudget.current_rss", return_value=0):
+            budget = MemoryBudget(100)
+            with ThreadPoolExecutor(max_workers=4) as pool:
+                results = run_within_budget(pool, job, [(i,) for i in range(len(estimates))], estimates, budget)
+        return results, most_running[0]
+
+    def test_small_jobs_run_together(self):
+        results, most_running = self.run_jobs([10] * 8)
+        self.assertEqual(results, [i * 2 for i in range(8)])
+        self.assertGreater(most_running, 1)
+
+    def test_big_jobs_run_alone(self):
+        # Each one is more than half of the budget, and the last one more than all of it
+        results, most_running = self.run_jobs([60, 60, 60, 500])
+        self.assertEqual(results, [0, 2, 4, 6])
+        self.assertEqual(most_running, 1)
+
+
+class TestStreamedPages(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.template_path = os.path.join(self.tmp.name, "template.html")
+        self.source_path = os.path.join(self.tmp.name, "page.md")
+        with open(self.template_path, "w") as template_file:
+            template_file.write('<title>{{ Title }}</title><nav>{{ TOC }}</nav><a href="/">Home</a>{{ Content }}')
+        with open(self.source_path, "w") as source_file:
+            source_file.write(
+                "# Tom Bombadil\n\n## Songs\n\nHey dol! [merry dol](/songs/) ![Tom](/images/tom.png)\n\n"
+                "- ring a dong\n- dillo\n\nOld Tom Bombadil\n\n```python\nprint('tom')\n```\n\n> Goldberry"
+            )
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def render(self, minify, memory_budget=None):
+        dest_path = os.path.join(self.tmp.name, "index.html")
+        with mock.patch("builtins.print"):
+            page_index = generate_page(self.source_path, self.template_path, dest_path, "/tom/", minify=minify, memory_budget=memory_budget)
+        with open(dest_path, "r") as page_file:
+            return page_file.read(), page_index.to_dict()
+
+    def test_same_page_as_rendered_whole(self):
+        # A budget that's already used up streams every page
+        for minify in [False, True]:
+            with self.subTest(minify=minify):
+                budget = MemoryBudget(0)
+                streamed = self.render(minify, budget)
+                self.assertEqual(budget.streamed_pages, 1)
+                self.assertEqual(streamed, self.render(minify))
+
+    def test_big_budget_renders_whole(self):
+        with mock.patch.object(main, "write_streamed_page") as write_streamed_page:
+            self.render(False, MemoryBudget(1024 * 1024 * MIB))
+        write_streamed_page.assert_not_called()
+
+    def test_rebase_chunks(self):
+        html = '<a href="/tom/">Tom</a><img src=/tom.png><a href="/">Home</a>'
+        for size in range(1, 10):
+            chunks = [html[i:i + size] for i in range(0, len(html), size)]
+            for minify in [False, True]:
+                self.assertEqual("".join(rebase_chunks(chunks, "/base/", minify)), rebase_urls(html, "/base/", minify))
+
+
+if __name__ == "__main__":
+    unittest.main()
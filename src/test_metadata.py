@@ -0,0 +1,122 @@
+import os
+import tempfile
+import unittest
+
+from metadata import MetadataIndex, page_timestamp, read_front_matter, split_front_matter
+
+
+class TestSplitFrontMatter(unittest.TestCase):
+    def test_front_matter(self):
+        md = """---
+date: 2024-05-01
+tags: [lotr, elves]
+draft: false
+template: "templates/post.html"
+---
+# Title
+
+Text"""
+        metadata, body = split_front_matter(md)
+        self.assertEqual(
+            metadata,
+            {"date": "2024-05-01", "tags": ["lotr", "elves"], "draft": False, "template": "templates/post.html"},
+        )
+        self.assertEqual(body, "# Title\n\nText")
+
+    def test_comma_separated_tags(self):
+        metadata, _ = split_front_matter("---\ntags: lotr, tolkien\ndraft: yes\n---\n# Title")
+        self.assertEqual(metadata, {"tags": ["lotr", "tolkien"], "draft": True})
+
+    def test_without_front_matter(self):
+        md = "# Title\n\n---\n\nNot front matter"
+        self.assertEqual(split_front_matter(md), ({}, md))
+
+    def test_unclosed_front_matter(self):
+        md = "---\ndate: 2024-05-01\n# Title"
+        self.assertEqual(split_front_matter(md), ({}, md))
+
+    def test_invalid_line(self):
+        with self.assertRaises(ValueError):
+            split_front_matter("---\njust some words\n---\n# Title")
+
+    def test_read_front_matter(self):
+        md = "---\ndate: 2024-05-01\n---\n# Título\n"
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "page.md")
+            with open(path, "w", encoding="utf-8") as md_file:
+                md_file.write(md)
+            metadata, start = read_front_matter(path)
+            with open(path, "rb") as md_file:
+                rest = md_file.read()[start:].decode("utf-8")
+        self.assertEqual(metadata, {"date": "2024-05-01"})
+        self.assertEqual(rest, split_front_matter(md)[1])
+
+    def test_read_front_matter_windows_line_endings(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "page.md")
+            with open(path, "wb") as md_file:
+                md_file.write(b"---\r\ntitle: Tom\r\ndate: 2024-05-01\r\n---\r\n# Tom\r\n")
+            metadata, start = read_front_matter(path)
+            with open(path, "rb") as md_file:
+                rest = md_file.read()[start:]
+        self.assertEqual(metadata, {"title": "Tom", "date": "2024-05-01"})
+        self.assertEqual(rest, b"# Tom\r\n")
+
+
+class TestMetadataIndex(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "metadata.sqlite")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_pages_query(self):
+        index = MetadataIndex(self.path)
+        index.update("blog/a/", "content/blog/a/index.md", "A", {"date": "2024-01-01", "tags": ["lotr"]}, 0)
+        index.update("blog/b/", "content/blog/b/index.md", "B", {"date": "2024-03-01", "tags": ["lotr", "elves"]}, 0)
+        index.update("blog/c/", "content/blog/c/index.md", "C", {"date": "2024-02-01", "draft": True}, 0)
+        index.close()
+
+        index = MetadataIndex(self.path)
+        self.assertEqual([page["url"] for page in index.pages()], ["blog/b/", "blog/a/"])
+        self.assertEqual([page["url"] for page in index.pages(include_drafts=True)], ["blog/b/", "blog/c/", "blog/a/"])
+        self.assertEqual([page["url"] for page in index.pages(tag="elves")], ["blog/b/"])
+        self.assertEqual(index.pages(tag="elves")[0]["tags"], ["elves", "lotr"])
+        index.close()
+
+    def test_changed_pages(self):
+        index = MetadataIndex(self.path)
+        self.assertTrue(index.update("a/", "a.md", "A", {"date": "2024-01-01"}, 0))
+        self.assertTrue(index.update("b/", "b.md", "B", {"date": "2024-01-01"}, 0))
+        index.close()
+
+        index = MetadataIndex(self.path)
+        self.assertFalse(index.update("a/", "a.md", "A", {"date": "2024-01-01"}, 0))
+        index.remove_unseen()
+        self.assertEqual(index.changed, {"b/"})
+        self.assertEqual([page["url"] for page in index.pages()], ["a/"])
+        index.close()
+
+    def test_date_falls_back_to_modification_time(self):
+        index = MetadataIndex(self.path)
+        index.update("a/", "a.md", "A", {}, 86400)
+        index.update("b/", "b.md", "B", {})
+        self.assertEqual([page["date"] for page in index.pages()], ["1970-01-02", ""])
+        index.close()
+
+    def test_page_timestamp(self):
+        path = os.path.join(self.tmp.name, "a.md")
+        with open(path, "w") as md_file:
+            md_file.write("# A")
+        os.utime(path, (86400, 86400))
+        self.assertEqual(page_timestamp({"date": "1970-01-02"}, path), 86400)
+        self.assertEqual(page_timestamp({"date": "1970-01-02T01:00:00+01:00"}, path), 86400)
+        self.assertIsNone(page_timestamp({}, path))
+        self.assertEqual(page_timestamp({}, path, mtime_dates=True), 86400)
+        with self.assertRaises(ValueError):
+            page_timestamp({"date": "last spring"}, path)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,165 @@
+import json
+import os
+import tarfile
+import tempfile
+import unittest
+import zipfile
+from unittest import mock
+
+import outputfunctions
+from outputfunctions import MANIFEST_NAME, ArchiveOutput, DirectoryOutput, archive_entries, extract_archive
+
+
+class ArchiveTestCase(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = os.path.join(self.tmp.name, "docs")
+        self.static = os.path.join(self.tmp.name, "static")
+        os.makedirs(os.path.join(self.static, "images"))
+        self.write(os.path.join(self.static, "index.css"), "body { color: red; }")
+        self.write(os.path.join(self.static, "images", "tom.png"), "not really a png")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write(self, path, content):
+        with open(path, "w") as output_file:
+            output_file.write(content)
+
+    def read(self, path):
+        with open(path, "r") as input_file:
+            return input_file.read()
+
+    def make_archive(self, name, pages, compress_cache=None):
+        archive_path = os.path.join(self.tmp.name, name)
+        output = ArchiveOutput(archive_path, self.root, compress_cache)
+        output.copytree(self.static, self.root)
+        for rel_path, html in pages.items():
+            output.makedirs(os.path.dirname(os.path.join(self.root, rel_path)))
+            output.write(os.path.join(self.root, rel_path), html)
+        output.close()
+        return archive_path
+
+
+class TestArchiveOutput(ArchiveTestCase):
+    def test_tar(self):
+        archive_path = self.make_archive("site.tar", {"index.html": "<h1>Home</h1>", "blog/tom/index.html": "<h1>Tom</h1>"})
+        with tarfile.open(archive_path) as archive:
+            names = archive.getnames()
+            self.assertEqual(archive.extractfile("blog/tom/index.html").read(), b"<h1>Tom</h1>")
+            self.assertEqual({member.mtime for member in archive.getmembers()}, {0})
+        self.assertEqual(names, ["images/tom.png", "index.css", "index.html", "blog/tom/index.html", MANIFEST_NAME])
+        self.assertFalse(os.path.exists(self.root))
+        self.assertEqual(os.listdir(self.tmp.name).count("site.tar"), 1)
+
+    def test_zip(self):
+        archive_path = self.make_archive("site.zip", {"index.html": "<h1>Home</h1>"})
+        with zipfile.ZipFile(archive_path) as archive:
+            self.assertEqual(archive.read("index.html"), b"<h1>Home</h1>")
+            manifest = json.loads(archive.read(MANIFEST_NAME))
+            self.assertEqual(archive.getinfo("index.html").compress_type, zipfile.ZIP_DEFLATED)
+            self.assertEqual(archive.getinfo("images/tom.png").compress_type, zipfile.ZIP_STORED)
+        self.assertEqual(sorted(manifest), ["images/tom.png", "index.css", "index.html"])
+        self.assertEqual(manifest["index.html"]["size"], len("<h1>Home</h1>"))
+
+    def test_precompressed_entries(self):
+        cache = os.path.join(self.tmp.name, "compressed")
+        archive_path = self.make_archive("site.tar", {"index.html": "<p>Tom Bombadil</p>" * 100, "small.html": "<p>Tom</p>"}, cache)
+        names = [name for name, _ in archive_entries(archive_path)]
+        self.assertIn("index.html.gz", names)
+        self.assertNotIn("small.html.gz", names)
+        self.assertNotIn("images/tom.png.gz", names)
+
+    def test_same_path_twice(self):
+        output = ArchiveOutput(os.path.join(self.tmp.name, "site.tar"), self.root)
+        output.write(os.path.join(self.root, "index.html"), "one")
+        with self.assertRaises(Exception):
+            output.write(os.path.join(self.root, "index.html"), "two")
+        with self.assertRaises(ValueError):
+            output.write(os.path.join(self.tmp.name, "outside.html"), "three")
+        output.discard()
+        self.assertEqual(sorted(os.listdir(self.tmp.name)), ["static"])
+
+    def test_write_chunks(self):
+        output = ArchiveOutput(os.path.join(self.tmp.name, "site.tar"), self.root)
+        output.write_chunks(os.path.join(self.root, "index.html"), ["<h1>", "Home", "</h1>"])
+        output.close()
+        self.assertEqual(dict(archive_entries(os.path.join(self.tmp.name, "site.tar")))["index.html"], b"<h1>Home</h1>")
+        self.assertEqual(sorted(os.listdir(self.tmp.name)), ["site.tar", "static"])
+
+    def test_unknown_format(self):
+        with self.assertRaises(ValueError):
+            ArchiveOutput(os.path.join(self.tmp.name, "site.rar"), self.root)
+
+    def test_zstd_missing(self):
+        with mock.patch("outputfunctions.zstandard", None):
+            with self.assertRaises(Exception):
+                ArchiveOutput(os.path.join(self.tmp.name, "site.tar.zst"), self.root)
+
+    @unittest.skipIf(outputfunctions.zstandard is None, "zstandard is not installed")
+    def test_tar_zst(self):
+        archive_path = self.make_archive("site.tar.zst", {"index.html": "<h1>Home</h1>"})
+        self.assertEqual(dict(archive_entries(archive_path))["index.html"], b"<h1>Home</h1>")
+
+
+class TestExtractArchive(ArchiveTestCase):
+    def test_extract(self):
+        dest = os.path.join(self.tmp.name, "www")
+        for name in ["site.tar", "site.zip"]:
+            with self.subTest(name):
+                archive_path = self.make_archive(name, {"index.html": "<h1>Home</h1>", "blog/tom/index.html": "<h1>Tom</h1>"})
+                extract_archive(archive_path, dest)
+                self.assertEqual(self.read(os.path.join(dest, "blog", "tom", "index.html")), "<h1>Tom</h1>")
+                self.assertEqual(self.read(os.path.join(dest, "index.css")), "body { color: red; }")
+                self.assertTrue(os.path.exists(os.path.join(dest, MANIFEST_NAME)))
+
+    def test_only_changes_are_written(self):
+        dest = os.path.join(self.tmp.name, "www")
+        archive_path = self.make_archive("site.tar", {"index.html": "<h1>Home</h1>", "blog/tom/index.html": "<h1>Tom</h1>", "blog/old/index.html": "Old"})
+        self.assertEqual(extract_archive(archive_path, dest), (5, 0, 0))
+        os.utime(os.path.join(dest, "index.html"), (1, 1))
+
+        archive_path = self.make_archive("site.tar", {"index.html": "<h1>Home</h1>", "blog/tom/index.html": "<h1>Tom!</h1>"})
+        self.assertEqual(extract_archive(archive_path, dest), (1, 3, 1))
+        self.assertEqual(os.path.getmtime(os.path.join(dest, "index.html")), 1)
+        self.assertEqual(self.read(os.path.join(dest, "blog", "tom", "index.html")), "<h1>Tom!</h1>")
+        # Emptied directories go too
+        self.assertFalse(os.path.exists(os.path.join(dest, "blog", "old")))
+
+        # Files changed on the server are put back
+        self.write(os.path.join(dest, "index.css"), "edited by hand")
+        self.assertEqual(extract_archive(archive_path, dest), (1, 3, 0))
+        self.assertEqual(self.read(os.path.join(dest, "index.css")), "body { color: red; }")
+
+    def test_unsafe_names(self):
+        archive_path = os.path.join(self.tmp.name, "evil.tar")
+        with tarfile.open(archive_path, "w") as archive:
+            archive.add(os.path.join(self.static, "index.css"), "../evil.css")
+        with self.assertRaises(ValueError):
+            extract_archive(archive_path, os.path.join(self.tmp.name, "www"))
+        self.assertFalse(os.path.exists(os.path.join(self.tmp.name, "evil.css")))
+
+    def test_missing_manifest(self):
+        archive_path = os.path.join(self.tmp.name, "other.zip")
+        with zipfile.ZipFile(archive_path, "w") as archive:
+            archive.writestr("index.html", "<h1>Home</h1>")
+        with self.assertRaises(Exception):
+            extract_archive(archive_path, os.path.join(self.tmp.name, "www"))
+
+
+class TestDirectoryOutput(unittest.TestCase):
+    def test_writes_files(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            output = DirectoryOutput()
+            output.makedirs(os.path.join(tmp, "blog"))
+            output.write(os.path.join(tmp, "blog", "index.html"), "<h1>Blog</h1>")
+            output.write(os.path.join(tmp, "data.bin"), b"\x00\x01")
+            output.write_chunks(os.path.join(tmp, "big.html"), ["<p>Tom", "</p>"])
+            self.assertEqual(os.path.getsize(os.path.join(tmp, "big.html")), len("<p>Tom</p>"))
+            self.assertTrue(output.exists(os.path.join(tmp, "blog", "index.html")))
+            with open(os.path.join(tmp, "data.bin"), "rb") as data_file:
+                self.assertEqual(data_file.read(), b"\x00\x01")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,92 @@
+import os
+import tempfile
+import time
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+
+from pagecache import DirectoryStore, PageCache
+
+
+class TestDirectoryStore(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = os.path.join(self.tmp.name, "store")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_get_and_put(self):
+        store = DirectoryStore(self.root)
+        self.assertIsNone(store.get("ab12"))
+        store.put("ab12", b"data")
+        self.assertEqual(store.get("ab12"), b"data")
+        self.assertTrue(os.path.exists(os.path.join(self.root, "ab", "ab12")))
+        # A second store on the same directory (another machine) sees it and counts its size
+        self.assertEqual(DirectoryStore(self.root).get("ab12"), b"data")
+        self.assertEqual(DirectoryStore(self.root).size, 4)
+
+    def test_same_key_from_many_writers(self):
+        store = DirectoryStore(self.root)
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            list(executor.map(lambda _: store.put("ab12", b"x" * 100000), range(32)))
+        self.assertEqual(store.get("ab12"), b"x" * 100000)
+        self.assertEqual(os.listdir(os.path.join(self.root, "ab")), ["ab12"])
+
+    def test_lru_eviction(self):
+        store = DirectoryStore(self.root, max_bytes=300)
+        for i, key in enumerate(["aa", "bb", "cc"]):
+            store.put(key, b"x" * 100)
+            # mtime is the last use, make every entry clearly older than the next one
+            os.utime(store.path(key), (time.time() - 100 + i, time.time() - 100 + i))
+        store.get("aa")
+
+        store.put("dd", b"x" * 100)
+        self.assertIsNone(store.get("bb"))
+        self.assertIsNone(store.get("cc"))
+        self.assertEqual(store.get("aa"), b"x" * 100)
+        self.assertEqual(store.get("dd"), b"x" * 100)
+        self.assertEqual(store.size, 200)
+
+
+class TestPageCache(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.store = DirectoryStore(os.path.join(self.tmp.name, "pages"))
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_hit_and_miss(self):
+        cache = PageCache(self.store, ["/", False])
+        key = cache.key("source", "template")
+        self.assertIsNone(cache.get("docs/index.html", key))
+        cache.put("docs/index.html", key, "<p>x</p>", {"title": "X"})
+
+        cache = PageCache(self.store, ["/", False])
+        self.assertEqual(cache.get("docs/index.html", cache.key("source", "template")), ("<p>x</p>", {"title": "X"}))
+        self.assertIsNone(cache.get("docs/index.html", cache.key("source", "edited template")))
+        self.assertEqual((cache.hits, cache.misses), (1, 1))
+
+    def test_content_addressed(self):
+        # Another checkout with the same source and template gets the page, wherever it's written to
+        PageCache(self.store, ["/", False]).put("/runner-1/docs/index.html", PageCache(self.store, ["/", False]).key("source", "template"), "<p>x</p>", {})
+        cache = PageCache(DirectoryStore(self.store.root), ["/", False])
+        self.assertEqual(cache.get("/runner-2/docs/index.html", cache.key("source", "template")), ("<p>x</p>", {}))
+
+    def test_memory(self):
+        memory = {}
+        cache = PageCache(self.store, ["/", False], memory)
+        key = cache.key("source", "template")
+        cache.put("docs/index.html", key, "<p>x</p>", {})
+        os.remove(self.store.path(key))
+        self.assertEqual(PageCache(self.store, ["/", False], memory).get("docs/index.html", key), ("<p>x</p>", {}))
+
+    def test_context_is_part_of_the_key(self):
+        self.assertNotEqual(
+            PageCache(self.store, ["/", False]).key("source", "template"),
+            PageCache(self.store, ["/repo/", False]).key("source", "template"),
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
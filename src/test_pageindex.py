@@ -0,0 +1,85 @@
+import json
+import unittest
+
+from blockfunctions import markdown_to_html_node
+from pageindex import Heading, PageIndex, page_index_from_dict, slugify
+
+
+class TestSlugify(unittest.TestCase):
+    def test_slugify(self):
+        self.assertEqual(slugify("Hello, World!"), "hello-world")
+        self.assertEqual(slugify("  Spaces   and_underscores "), "spaces-and-underscores")
+        self.assertEqual(slugify("Ñandú über"), "ñandú-über")
+        self.assertEqual(slugify("!!!"), "section")
+
+
+class TestPageIndex(unittest.TestCase):
+    def test_headings_collected_while_rendering(self):
+        md = """
+    # The **Title**
+
+    Some paragraph
+
+    ## Intro
+
+    ### Details with `code`
+
+    ## Intro
+    """
+        page_index = PageIndex()
+        html = markdown_to_html_node(md, page_index).to_html()
+        self.assertEqual(
+            page_index.headings,
+            [
+                Heading(1, "the-title", "The Title"),
+                Heading(2, "intro", "Intro"),
+                Heading(3, "details-with-code", "Details with code"),
+                Heading(2, "intro-1", "Intro"),
+            ],
+        )
+        self.assertIn('<h1 id="the-title">The <b>Title</b></h1>', html)
+        self.assertIn('<h2 id="intro-1">Intro</h2>', html)
+
+    def test_no_ids_without_page_index(self):
+        html = markdown_to_html_node("# Title").to_html()
+        self.assertEqual(html, "<div><h1>Title</h1></div>")
+
+    def test_toc(self):
+        page_index = PageIndex()
+        page_index.add_heading(1, "Title")
+        page_index.add_heading(2, "First")
+        page_index.add_heading(4, "Deep")
+        page_index.add_heading(2, "Second")
+        self.assertEqual(
+            page_index.toc_html(),
+            '<ul><li><a href="#title">Title</a><ul><li><a href="#first">First</a><ul><li><a href="#deep">Deep</a></li></ul></li>'
+            '<li><a href="#second">Second</a></li></ul></li></ul>',
+        )
+
+    def test_toc_starting_deeper(self):
+        page_index = PageIndex()
+        page_index.add_heading(2, "A")
+        page_index.add_heading(1, "B")
+        self.assertEqual(page_index.toc_html(), '<ul><li><a href="#a">A</a></li><li><a href="#b">B</a></li></ul>')
+
+    def test_empty_toc(self):
+        self.assertEqual(PageIndex().toc_html(), "")
+
+    def test_dict_round_trip(self):
+        page_index = PageIndex()
+        page_index.metadata = {"tags": ["lotr"]}
+        markdown_to_html_node("# Title\n\nSee [this](/blog/tom/) ![img](/images/tolkien.png)", page_index)
+        page_index.title = "Title"
+
+        restored = page_index_from_dict(json.loads(json.dumps(page_index.to_dict())))
+        self.assertEqual(restored.title, "Title")
+        self.assertEqual(restored.metadata, {"tags": ["lotr"]})
+        self.assertEqual(restored.headings, page_index.headings)
+        self.assertEqual(restored.plain_text(), page_index.plain_text())
+        self.assertEqual(restored.links, ["/blog/tom/"])
+        self.assertEqual(restored.images, ["/images/tolkien.png"])
+        self.assertEqual(restored.toc_html(), page_index.toc_html())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,52 @@
+import os
+import tempfile
+import time
+import unittest
+
+from profiling import Profiler
+
+
+def slow_page(seconds):
+    time.sleep(seconds)
+    return "done"
+
+
+def allocating_page():
+    return len([bytearray(1024) for _ in range(1024)])
+
+
+class TestProfiler(unittest.TestCase):
+    def test_records_every_page(self):
+        profiler = Profiler(threshold=10)
+        self.assertEqual(profiler.profile("fast.md", slow_page, 0), "done")
+        self.assertEqual(profiler.profile("big.md", allocating_page), 1024)
+
+        self.assertEqual([page.path for page in profiler.profiles], ["fast.md", "big.md"])
+        self.assertGreater(profiler.profiles[1].peak_bytes, 1024 * 1024)
+        # Below the threshold, no cProfile stats are kept
+        self.assertEqual(profiler.profiles[0].hot_functions, [])
+
+    def test_slow_pages_keep_stats(self):
+        with tempfile.TemporaryDirectory() as dump_dir:
+            profiler = Profiler(threshold=0.01, dump_dir=dump_dir)
+            profiler.profile(os.path.join("content", "slow.md"), slow_page, 0.02)
+            profiler.profile("fast.md", slow_page, 0)
+
+            slow = profiler.worst(1)[0]
+            self.assertEqual(slow.path, os.path.join("content", "slow.md"))
+            self.assertTrue(any("slow_page" in function for function, _, _, _ in slow.hot_functions))
+            self.assertTrue(os.path.exists(slow.dump_path))
+
+            report = profiler.report()
+            self.assertIn("Slowest 2 of 2 page(s)", report)
+            self.assertLess(report.index("slow.md"), report.index("fast.md"))
+
+    def test_failing_page_is_still_recorded(self):
+        profiler = Profiler()
+        with self.assertRaises(ZeroDivisionError):
+            profiler.profile("broken.md", lambda: 1 / 0)
+        self.assertEqual(profiler.profiles[0].path, "broken.md")
+
+
+if __name__ == "__main__":
+    unittest.main()
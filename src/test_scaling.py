@@ -0,0 +1,142 @@
+import random
+import time
+import unittest
+
+from blockfunctions import markdown_to_blocks, markdown_to_html_node
+from htmlnode import LeafNode, ParentNode
+from inlinefunctions import text_to_html_nodes, text_to_textnodes
+from textnode import TextType
+
+# Inputs are timed at size n and 10n. Linear code takes ~10 times longer on the big one and quadratic code
+# ~100 times, this leaves plenty of room for noise in between.
+MAX_RATIO = 30
+SIZE = 500
+REPEAT = 3
+
+
+def best_time(function, argument):
+    best = None
+    for _ in range(REPEAT):
+        start = time.perf_counter()
+        function(argument)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+class ScalingTestCase(unittest.TestCase):
+    def assertLinear(self, function, make_input, size=SIZE):
+        small = best_time(function, make_input(size))
+        large = best_time(function, make_input(size * 10))
+        # Guard against timer resolution when the small input is too fast to measure
+        ratio = large / max(small, 1e-4)
+        self.assertLess(ratio, MAX_RATIO, f"{size} -> {size * 10}: {small:.4f}s -> {large:.4f}s (x{ratio:.0f})")
+
+
+class TestInlineScaling(ScalingTestCase):
+    INPUTS = {
+        "bold": lambda n: "a **b** " * n,
+        "italic": lambda n: "a _b_ " * n,
+        "code": lambda n: "a `b` " * n,
+        "links": lambda n: "see [a](https://a.com) " * n,
+        "images": lambda n: "![a](/a.png) " * n,
+        "mixed": lambda n: "**b** _i_ `c` [l](/l) ![i](/i.png) " * n,
+        "plain": lambda n: "just words " * n * 10,
+    }
+
+    def test_text_to_textnodes(self):
+        for name, make_input in self.INPUTS.items():
+            with self.subTest(name):
+                self.assertLinear(text_to_textnodes, make_input)
+
+    def test_text_to_html_nodes(self):
+        for name, make_input in self.INPUTS.items():
+            with self.subTest(name):
+                self.assertLinear(text_to_html_nodes, make_input)
+
+    def test_nested_emphasis(self):
+        self.assertLinear(text_to_html_nodes, lambda n: "**_" * n + "deep" + "_**" * n)
+
+
+class TestBlockScaling(ScalingTestCase):
+    INPUTS = {
+        "paragraphs": lambda n: "Some **text** here\nand there.\n\n" * n,
+        "list": lambda n: "\n".join(f"- item {i} with [a link](/{i})" for i in range(n)),
+        "ordered list": lambda n: "\n".join(f"{i}. item" for i in range(1, n + 1)),
+        "nested lists": lambda n: "- a\n  - b\n    - c\n" * n,
+        "code block": lambda n: "```\n" + "x = 1  # **not bold**\n" * n + "```",
+        "quote": lambda n: "\n".join("> quoted _line_" for _ in range(n)),
+    }
+
+    def test_markdown_to_blocks(self):
+        for name, make_input in self.INPUTS.items():
+            with self.subTest(name):
+                self.assertLinear(markdown_to_blocks, make_input)
+
+    def test_markdown_to_html(self):
+        for name, make_input in self.INPUTS.items():
+            with self.subTest(name):
+                self.assertLinear(lambda markdown: markdown_to_html_node(markdown).to_html(), make_input)
+
+
+class TestToHTMLScaling(ScalingTestCase):
+    def test_wide_tree(self):
+        self.assertLinear(lambda node: node.to_html(), lambda n: ParentNode("div", [LeafNode("b", "x", {"class": "c"}) for _ in range(n * 5)]))
+
+    def test_deep_tree(self):
+        def make_input(n):
+            node = LeafNode(None, "deep")
+            for _ in range(n):
+                node = ParentNode("span", [node])
+            return node
+
+        self.assertLinear(lambda node: node.to_html(), make_input)
+
+
+class TestInlineFuzz(unittest.TestCase):
+    # Random (but reproducible) mixes of every inline element, checking that nothing is lost or duplicated
+    PIECES = [
+        ("words ", TextType.NORMAL, "words "),
+        ("**bold**", TextType.BOLD, "bold"),
+        ("_italic_", TextType.ITALIC, "italic"),
+        ("`co_de`", TextType.CODE, "co_de"),
+        ("[link](/url)", TextType.LINK, "link"),
+        ("![image](/image.png)", TextType.IMAGE, "image"),
+        (" [not a link] ", TextType.NORMAL, " [not a link] "),
+    ]
+
+    def test_random_inline_text(self):
+        rng = random.Random(4)
+        for _ in range(200):
+            pieces = [rng.choice(self.PIECES) for _ in range(rng.randint(1, 40))]
+            markdown = "".join(piece[0] for piece in pieces)
+
+            nodes = text_to_textnodes(markdown)
+            self.assertEqual("".join(node.text for node in nodes), "".join(piece[2] for piece in pieces), markdown)
+            self.assertEqual(
+                [node.text_type for node in nodes if node.text_type != TextType.NORMAL],
+                [piece[1] for piece in pieces if piece[1] != TextType.NORMAL],
+                markdown,
+            )
+
+            # The nested parser reports emphasis contents as plain text leaves, the rest must be the same
+            leaves = []
+            text_to_html_nodes(markdown, lambda text_node, html_node: leaves.append(text_node))
+            self.assertEqual([leaf.text for leaf in leaves], [node.text for node in nodes], markdown)
+            self.assertEqual([leaf.url for leaf in leaves], [node.url for node in nodes], markdown)
+
+    def test_random_nesting(self):
+        rng = random.Random(7)
+        for _ in range(100):
+            depth = rng.randint(1, 200)
+            delimiters = [rng.choice(["**", "_"]) for _ in range(depth)]
+            # Two equal delimiters in a row would close instead of nest
+            delimiters = [delimiter for i, delimiter in enumerate(delimiters) if i == 0 or delimiter != delimiters[i - 1]]
+            markdown = "".join(delimiters) + "x" + "".join(reversed(delimiters))
+            html = ParentNode("p", text_to_html_nodes(markdown)).to_html()
+            self.assertEqual(html.count("<b>") + html.count("<i>"), len(delimiters))
+            self.assertIn("x", html)
+
+
+if __name__ == "__main__":
+    unittest.main()
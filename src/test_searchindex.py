@@ -0,0 +1,107 @@
+import json
+import os
+import tempfile
+import unittest
+
+from searchindex import SearchIndex, page_id, read_gzip_json, tokenize, term_prefix
+
+
+class TestTokenize(unittest.TestCase):
+    def test_tokenize(self):
+        self.assertEqual(tokenize("The Lord of the **Rings**, 1954!"), ["the", "lord", "of", "the", "rings", "1954"])
+
+    def test_term_prefix(self):
+        self.assertEqual(term_prefix("rings"), "ri")
+        self.assertEqual(term_prefix("a"), "a")
+
+
+class TestSearchIndex(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.cache_dir = os.path.join(self.tmp.name, "cache")
+        self.dest_dir = os.path.join(self.tmp.name, "docs", "search")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def chunk(self, prefix):
+        return read_gzip_json(os.path.join(self.dest_dir, f"{prefix}.json.gz"))
+
+    def test_postings_with_positions(self):
+        index = SearchIndex(self.cache_dir)
+        index.update_page("blog/tom/", "Tom", "Tom Bombadil was a mistake, Tom")
+        index.update_page("", "Home", "Welcome to the Tolkien fan club")
+        index.write(self.dest_dir)
+
+        tom, home = page_id("blog/tom/"), page_id("")
+        to_chunk = self.chunk("to")
+        self.assertEqual(to_chunk["tom"], {tom: [0, 5]})
+        self.assertEqual(to_chunk["to"], {home: [1]})
+        self.assertEqual(to_chunk["tolkien"], {home: [3]})
+
+        with open(os.path.join(self.dest_dir, "pages.json")) as pages_file:
+            self.assertEqual(json.load(pages_file), {tom: {"url": "blog/tom/", "title": "Tom"}, home: {"url": "", "title": "Home"}})
+
+    def test_incremental_update(self):
+        index = SearchIndex(self.cache_dir)
+        index.update_page("a/", "A", "alpha beta")
+        index.update_page("b/", "B", "beta gamma")
+        index.write(self.dest_dir)
+
+        # A new build only re-tokenizes the pages that changed
+        index = SearchIndex(self.cache_dir)
+        self.assertFalse(index.update_page("a/", "A", "alpha beta"))
+        self.assertTrue(index.update_page("b/", "B", "beta delta"))
+        self.assertEqual(index.dirty_prefixes, {"be", "ga", "de"})
+        index.write(self.dest_dir)
+
+        a, b = page_id("a/"), page_id("b/")
+        self.assertEqual(self.chunk("be")["beta"], {a: [1], b: [0]})
+        self.assertEqual(self.chunk("de")["delta"], {b: [1]})
+        self.assertFalse(os.path.exists(os.path.join(self.dest_dir, "ga.json.gz")))
+        self.assertEqual(self.chunk("al")["alpha"], {a: [0]})
+
+    def test_removed_pages(self):
+        index = SearchIndex(self.cache_dir)
+        index.update_page("a/", "A", "alpha")
+        index.update_page("b/", "B", "bravo")
+        index.write(self.dest_dir)
+
+        index = SearchIndex(self.cache_dir)
+        index.update_page("a/", "A", "alpha")
+        index.write(self.dest_dir)
+
+        self.assertFalse(os.path.exists(os.path.join(self.dest_dir, "br.json.gz")))
+        with open(os.path.join(self.dest_dir, "pages.json")) as pages_file:
+            self.assertEqual(json.load(pages_file), {page_id("a/"): {"url": "a/", "title": "A"}})
+
+    def test_same_index_whatever_the_order(self):
+        # Built in one go and built incrementally (in another order) end up the same
+        index = SearchIndex(self.cache_dir)
+        index.update_page("b/", "B", "beta")
+        index.write(self.dest_dir)
+        index = SearchIndex(self.cache_dir)
+        index.update_page("a/", "A", "alpha beta")
+        index.update_page("b/", "B", "beta")
+        index.write(self.dest_dir)
+
+        other_dest = os.path.join(self.tmp.name, "other")
+        index = SearchIndex(os.path.join(self.tmp.name, "other-cache"))
+        index.update_page("a/", "A", "alpha beta")
+        index.update_page("b/", "B", "beta")
+        index.write(other_dest)
+        for name in ["pages.json", "al.json.gz", "be.json.gz"]:
+            with open(os.path.join(self.dest_dir, name), "rb") as first, open(os.path.join(other_dest, name), "rb") as second:
+                self.assertEqual(first.read(), second.read(), name)
+
+    def test_old_state_is_dropped(self):
+        os.makedirs(os.path.join(self.cache_dir, "chunks"))
+        with open(os.path.join(self.cache_dir, "state.json"), "w") as state_file:
+            json.dump({"pages": {"a/": {"id": 0}}, "postings": {}, "next_id": 1}, state_file)
+        index = SearchIndex(self.cache_dir)
+        self.assertEqual(index.pages, {})
+        self.assertFalse(os.path.exists(os.path.join(self.cache_dir, "chunks")))
+
+
+if __name__ == "__main__":
+    unittest.main()
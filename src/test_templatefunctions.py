@@ -0,0 +1,81 @@
+import os
+import tempfile
+import unittest
+
+from templatefunctions import TemplateCache, minify_template
+
+
+class TestTemplates(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.cwd = os.getcwd()
+        # Template paths are relative to the directory the site is built from
+        os.chdir(self.tmp.name)
+        os.mkdir("partials")
+        self.write("layout.html", '<html><head><title>{{ Title }}</title></head><body>{% include "partials/nav.html" %}{% block main %}<p>Default</p>{% endblock %}</body></html>')
+        self.write("partials/nav.html", '<nav><a href="/">Home</a></nav>')
+        self.write("post.html", '{% extends "layout.html" %}\n{% block main %}<article>{{ Content }}</article>{% endblock %}')
+        self.write("plain.html", "<h1>{{ Title }}</h1>{{Content}}")
+
+    def tearDown(self):
+        os.chdir(self.cwd)
+        self.tmp.cleanup()
+
+    def write(self, path, content):
+        with open(path, "w") as template_file:
+            template_file.write(content)
+
+    def test_render(self):
+        template = TemplateCache().get("plain.html")
+        self.assertEqual(template.segments, ["<h1>", "Title", "</h1>", "Content", ""])
+        self.assertEqual(template.render({"Title": "Hi", "Content": "<p>x</p>"}), "<h1>Hi</h1><p>x</p>")
+        self.assertEqual(template.render({"Title": "Hi"}), "<h1>Hi</h1>")
+
+    def test_render_chunks(self):
+        template = TemplateCache().get("plain.html")
+        chunks = list(template.render_chunks({"Title": "Hi", "Content": lambda: iter(["<p>x", "</p>"])}))
+        self.assertEqual(chunks, ["<h1>", "Hi", "</h1>", "<p>x", "</p>", ""])
+
+    def test_layout_and_partial(self):
+        template = TemplateCache().get("post.html")
+        self.assertEqual(
+            template.render({"Title": "Tom", "Content": "<p>Bombadil</p>"}),
+            '<html><head><title>Tom</title></head><body><nav><a href="/">Home</a></nav><article><p>Bombadil</p></article></body></html>',
+        )
+        self.assertEqual(set(template.dependencies), {"post.html", "layout.html", "partials/nav.html"})
+        self.assertEqual(TemplateCache().get("layout.html").render({}), '<html><head><title></title></head><body><nav><a href="/">Home</a></nav><p>Default</p></body></html>')
+
+    def test_compiled_once_per_build(self):
+        templates = TemplateCache()
+        first = templates.get("post.html")
+        self.assertIs(templates.get("post.html"), first)
+
+        # Same files in the next build: still the same compiled template
+        templates.new_build()
+        self.assertIs(templates.get("post.html"), first)
+
+    def test_partial_edit_only_changes_templates_using_it(self):
+        templates = TemplateCache()
+        post = templates.get("post.html")
+        plain = templates.get("plain.html")
+
+        self.write("partials/nav.html", '<nav><a href="/blog/">Blog</a></nav>')
+        templates.new_build()
+        self.assertNotEqual(templates.get("post.html").fingerprint, post.fingerprint)
+        self.assertIn("/blog/", templates.get("post.html").render({}))
+        self.assertIs(templates.get("plain.html"), plain)
+
+    def test_include_cycle(self):
+        self.write("partials/nav.html", '{% include "partials/nav.html" %}')
+        with self.assertRaises(ValueError):
+            TemplateCache().get("post.html")
+
+    def test_minify(self):
+        self.write("spaced.html", "<div>\n  <p>{{ Content }}</p>\n</div>\n<pre>\n  keep\n</pre>")
+        template = TemplateCache().get("spaced.html", minify=True)
+        self.assertEqual(template.render({"Content": "x"}), "<div><p>x</p></div>\n<pre>\n  keep\n</pre>")
+        self.assertEqual(minify_template("<a>\n</a>"), "<a></a>")
+
+
+if __name__ == "__main__":
+    unittest.main()
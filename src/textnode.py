@@ -7,6 +7,7 @@ class TextType(Enum):
     CODE= "code"
     LINK = "link"
     IMAGE = "image"
+    STRIKETHROUGH = "strikethrough"
 
 class TextNode:
     def __init__(self, text, text_type, url=None):